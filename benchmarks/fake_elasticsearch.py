@@ -0,0 +1,386 @@
+"""In-process stand-in for the parts of the Elasticsearch client the server uses.
+
+It keeps documents in dictionaries and evaluates the query DSL subset the
+server builds (bool, match, multi_match, term, terms, range, ids, match_all),
+so the server's own request handling, query building and serialisation can
+be benchmarked without a cluster. Latency numbers include a linear scan over
+the stored documents and are meant for comparing runs, not for absolute
+Elasticsearch sizing.
+"""
+import copy
+import fnmatch
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch import NotFoundError
+
+NODE = NodeConfig("http", "localhost", 9200)
+
+
+def not_found(index: str, doc_id: str) -> NotFoundError:
+    meta = ApiResponseMeta(404, "1.1", HttpHeaders(), 0.0, NODE)
+    return NotFoundError(f"{index}/{doc_id} not found", meta, {"found": False})
+
+
+def tokens(value: Any) -> List[str]:
+    return str(value).lower().split()
+
+
+def get_field(document: dict, field: str) -> Any:
+    value = document
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def comparable(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def resolve_date_math(name: str) -> str:
+    """``<reviews-{now/d}-000001>`` -> ``reviews-2024.01.31-000001``; day rounding only."""
+    if not (name.startswith("<") and name.endswith(">")):
+        return name
+    return name[1:-1].replace("{now/d}", datetime.now().strftime("%Y.%m.%d"))
+
+
+class FakeIndices:
+    """Index, alias, template and rollover calls; partitions are plain dictionaries."""
+
+    def __init__(self, es: "FakeElasticsearch"):
+        self.es = es
+        self.templates: Dict[str, dict] = {}
+        self.meta: Dict[str, dict] = {}
+        self.blocks: Dict[str, set] = {}
+        self.write_indices: Dict[str, str] = {}
+
+    def exists(self, index: str, **kwargs) -> bool:
+        return any(part in self.es.indices_data for part in index.split(","))
+
+    def create(self, index: str, aliases: dict = None, **kwargs) -> dict:
+        index = resolve_date_math(index)
+        self.es.indices_data.setdefault(index, {})
+        for template in self.templates.values():
+            if any(fnmatch.fnmatch(index, pattern) for pattern in template["index_patterns"]):
+                for alias in template["template"].get("aliases", {}):
+                    self.put_alias(index, alias)
+        for alias, options in (aliases or {}).items():
+            self.put_alias(index, alias, **options)
+        return {"acknowledged": True, "index": index}
+
+    def put_index_template(self, name: str, index_patterns: List[str], template: dict = None, **kwargs) -> dict:
+        self.templates[name] = {"index_patterns": index_patterns, "template": template or {}}
+        return {"acknowledged": True}
+
+    def exists_alias(self, name: str, index: Optional[str] = None, **kwargs) -> bool:
+        members = self.es.aliases.get(name, [])
+        return bool(members) if index is None else index in members
+
+    def put_alias(self, index: str, name: str, is_write_index: Optional[bool] = None, **kwargs) -> dict:
+        members = self.es.aliases.setdefault(name, [])
+        if index not in members:
+            members.append(index)
+        if is_write_index:
+            self.write_indices[name] = index
+        return {"acknowledged": True}
+
+    def delete_alias(self, index: str, name: str, **kwargs) -> dict:
+        self.es.aliases.get(name, []).remove(index)
+        return {"acknowledged": True}
+
+    def get_alias(self, name: str, **kwargs) -> dict:
+        write_index = self.write_indices.get(name)
+        return {
+            index: {"aliases": {name: {"is_write_index": True} if index == write_index else {}}}
+            for index in self.es.aliases.get(name, [])
+        }
+
+    def get_mapping(self, index: str, **kwargs) -> dict:
+        return {name: {"mappings": {"_meta": self.meta.get(name, {})}} for name in self.es.resolve(index)}
+
+    def put_mapping(self, index: str, meta: dict = None, **kwargs) -> dict:
+        if meta is not None:
+            self.meta[index] = meta
+        return {"acknowledged": True}
+
+    def rollover(self, alias: str, conditions: dict = None, dry_run: bool = False, **kwargs) -> dict:
+        old_index = self.write_indices.get(alias) or self.es.aliases[alias][-1]
+        prefix, _, number = old_index.rpartition("-")
+        new_index = f"{prefix}-{int(number) + 1:06d}"
+        max_docs = (conditions or {}).get("max_docs")
+        met = {f"[max_docs: {max_docs}]": len(self.es.indices_data[old_index]) >= max_docs} if max_docs else {}
+        rolled_over = any(met.values()) and not dry_run
+        if rolled_over:
+            self.create(new_index, aliases={alias: {"is_write_index": True}})
+        return {
+            "old_index": old_index,
+            "new_index": new_index,
+            "rolled_over": rolled_over,
+            "dry_run": dry_run,
+            "conditions": met,
+        }
+
+    def add_block(self, index: str, block: str, **kwargs) -> dict:
+        self.blocks.setdefault(index, set()).add(block)
+        return {"acknowledged": True}
+
+    def forcemerge(self, index: str, **kwargs) -> dict:
+        self.es.count_call("forcemerge")
+        return {"_shards": {"failed": 0}}
+
+    def refresh(self, index: Optional[str] = None, **kwargs) -> dict:
+        return {"_shards": {"failed": 0}}
+
+
+class FakeElasticsearch:
+    def __init__(self):
+        self.indices_data: Dict[str, Dict[str, dict]] = {}
+        self.aliases: Dict[str, List[str]] = {}
+        self.indices = FakeIndices(self)
+        self.calls: Dict[str, int] = {}
+        # Painless is not evaluated: scripts are run by Python functions
+        # registered under their source, called with (ctx._source, params)
+        self.scripts: Dict[str, Callable[[dict, dict], None]] = {}
+
+    def count_call(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def resolve(self, index: str) -> List[str]:
+        names = []
+        for part in index.split(","):
+            if part in self.aliases:
+                names.extend(self.aliases[part])
+            elif any(ch in part for ch in "*?"):
+                names.extend(fnmatch.filter(self.indices_data, part))
+            elif part in self.indices_data:
+                names.append(part)
+        return names
+
+    def options(self, **kwargs) -> "FakeElasticsearch":
+        return self
+
+    def ping(self, **kwargs) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+    # Documents
+
+    def index(self, index: str, id: str, body: dict = None, document: dict = None, **kwargs):
+        self.count_call("index")
+        self.indices_data.setdefault(index, {})[id] = copy.deepcopy(document or body)
+        return {"_index": index, "_id": id, "result": "created"}
+
+    def get(self, index: str, id: str, **kwargs):
+        self.count_call("get")
+        for name in self.resolve(index) or [index]:
+            document = self.indices_data.get(name, {}).get(id)
+            if document is not None:
+                return {"_index": name, "_id": id, "found": True, "_source": document}
+        raise not_found(index, id)
+
+    def update(self, index: str, id: str, body: dict = None, doc: dict = None, **kwargs):
+        self.count_call("update")
+        document = self.get(index, id)["_source"]
+        document.update((body or {}).get("doc") or doc or {})
+        return {"_index": index, "_id": id, "result": "updated"}
+
+    def delete(self, index: str, id: str, **kwargs):
+        self.count_call("delete")
+        self.get(index, id)
+        for name in self.resolve(index) or [index]:
+            self.indices_data.get(name, {}).pop(id, None)
+        return {"_index": index, "_id": id, "result": "deleted"}
+
+    def mget(self, index: str, body: dict = None, ids: List[str] = None, **kwargs):
+        self.count_call("mget")
+        ids = ids or (body or {}).get("ids", [])
+        docs = []
+        for doc_id in ids:
+            try:
+                docs.append(self.get(index, doc_id))
+            except NotFoundError:
+                docs.append({"_index": index, "_id": doc_id, "found": False})
+        return {"docs": docs}
+
+    def bulk(self, operations: List[dict] = None, body: List[dict] = None, **kwargs):
+        self.count_call("bulk")
+        operations = operations or body
+        items = []
+        i = 0
+        while i < len(operations):
+            action, meta = next(iter(operations[i].items()))
+            index = meta.get("_index") or kwargs.get("index")
+            if kwargs.get("require_alias") and index not in self.aliases:
+                i += 1 if action == "delete" else 2
+                items.append({action: {"_index": index, "_id": meta.get("_id"), "status": 404, "error": {"type": "index_not_found_exception"}}})
+                continue
+            index = self.indices.write_indices.get(index) or (self.aliases.get(index) or [index])[-1]
+            doc_id = meta.get("_id")
+            store = self.indices_data.setdefault(index, {})
+            if "write" in self.indices.blocks.get(index, ()):
+                i += 1 if action == "delete" else 2
+                items.append({action: {"_index": index, "_id": doc_id, "status": 403, "error": {"type": "cluster_block_exception"}}})
+                continue
+            if action == "delete":
+                status = 200 if store.pop(doc_id, None) is not None else 404
+                i += 1
+            else:
+                source = operations[i + 1]
+                i += 2
+                if action == "create" and doc_id in store:
+                    status = 409
+                elif action == "update":
+                    if doc_id in store:
+                        if "script" in source:
+                            script = source["script"]
+                            self.scripts[script["source"]](store[doc_id], copy.deepcopy(script.get("params", {})))
+                        else:
+                            store[doc_id].update(source.get("doc", {}))
+                        status = 200
+                    elif source.get("doc_as_upsert") or "upsert" in source:
+                        store[doc_id] = copy.deepcopy(source.get("upsert") or source.get("doc"))
+                        status = 201
+                    else:
+                        status = 404
+                else:
+                    store[doc_id] = copy.deepcopy(source)
+                    status = 201
+            item = {"_index": index, "_id": doc_id, "status": status}
+            if status >= 400:
+                item["error"] = {"type": "version_conflict_engine_exception" if status == 409 else "not_found"}
+            items.append({action: item})
+        return {"errors": any(item[next(iter(item))]["status"] >= 400 for item in items), "items": items}
+
+    # Search
+
+    def search(self, index: str, body: dict = None, from_: int = 0, size: int = 10, **kwargs):
+        self.count_call("search")
+        body = dict(body or {})
+        body.update({k: v for k, v in kwargs.items() if k in ("query", "sort", "_source")})
+        query = body.get("query", {"match_all": {}})
+
+        hits = []
+        for name in self.resolve(index):
+            for doc_id, document in self.indices_data[name].items():
+                if self.matches(query, document, doc_id):
+                    hits.append({"_index": name, "_id": doc_id, "_score": 1.0, "_source": document})
+
+        for sort in reversed(body.get("sort", [])):
+            field, order = next(iter(sort.items())) if isinstance(sort, dict) else (sort, "asc")
+            order = order.get("order", "asc") if isinstance(order, dict) else order
+            hits.sort(
+                key=lambda hit: comparable(get_field(hit["_source"], field)) or 0,
+                reverse=order == "desc",
+            )
+
+        from_ = body.get("from", from_)
+        size = body.get("size", size)
+        page = [self.project(hit, body.get("_source")) for hit in hits[from_ : from_ + size]]
+        response = {
+            "took": 1,
+            "timed_out": False,
+            "hits": {"total": {"value": len(hits), "relation": "eq"}, "max_score": 1.0, "hits": page},
+        }
+        if body.get("aggs"):
+            response["aggregations"] = self.aggregate(body["aggs"], hits)
+        return response
+
+    @staticmethod
+    def aggregate(aggs: dict, hits: List[dict]) -> dict:
+        """``min`` and ``max`` over ISO date strings."""
+        results = {}
+        for name, spec in aggs.items():
+            kind, options = next(iter(spec.items()))
+            values = [get_field(hit["_source"], options["field"]) for hit in hits]
+            values = [comparable(value) for value in values if value is not None]
+            value = (min if kind == "min" else max)(values) if values else None
+            results[name] = {"value": value, "value_as_string": value} if value is not None else {"value": None}
+        return results
+
+    def count(self, index: str, body: dict = None, query: dict = None, **kwargs):
+        result = self.search(index, body={"query": query or (body or {}).get("query", {"match_all": {}})}, size=0)
+        return {"count": result["hits"]["total"]["value"]}
+
+    @staticmethod
+    def project(hit: dict, source_filter: Any) -> dict:
+        if source_filter is None or source_filter is True:
+            return {**hit, "_source": copy.deepcopy(hit["_source"])}
+        if source_filter is False:
+            return {k: v for k, v in hit.items() if k != "_source"}
+        includes = source_filter if isinstance(source_filter, list) else source_filter.get("includes", [])
+        source = {}
+        for field in includes:
+            value = get_field(hit["_source"], field)
+            if value is not None:
+                target = source
+                parts = field.split(".")
+                for part in parts[:-1]:
+                    target = target.setdefault(part, {})
+                target[parts[-1]] = value
+        return {**hit, "_source": source}
+
+    def matches(self, query: dict, document: dict, doc_id: Optional[str] = None) -> bool:
+        kind, spec = next(iter(query.items()))
+        if kind == "match_all":
+            return True
+        if kind == "bool":
+            clauses = lambda key: spec.get(key, []) if isinstance(spec.get(key, []), list) else [spec[key]]  # noqa: E731
+            if not all(self.matches(q, document, doc_id) for q in clauses("must") + clauses("filter")):
+                return False
+            if any(self.matches(q, document, doc_id) for q in clauses("must_not")):
+                return False
+            should = clauses("should")
+            minimum = spec.get("minimum_should_match", 0 if clauses("must") or clauses("filter") else 1)
+            return not should or sum(self.matches(q, document, doc_id) for q in should) >= min(minimum, len(should))
+        if kind == "ids":
+            return doc_id in spec.get("values", [])
+        if kind in ("match", "match_phrase", "match_phrase_prefix", "match_bool_prefix"):
+            field, value = next(iter(spec.items()))
+            value = value.get("query") if isinstance(value, dict) else value
+            field_tokens = tokens(get_field(document, field) or "")
+            wanted = tokens(value)
+            if kind == "match":
+                return any(token in field_tokens for token in wanted)
+            text = " ".join(field_tokens)
+            return " ".join(wanted) in text or (kind != "match_phrase" and all(
+                any(t.startswith(w) for t in field_tokens) for w in wanted
+            ))
+        if kind == "multi_match":
+            fields = [field.split("^")[0] for field in spec.get("fields", [])]
+            kind = "match_bool_prefix" if spec.get("type") == "bool_prefix" else "match"
+            return any(
+                self.matches({kind: {field: spec["query"]}}, document) for field in fields
+            )
+        if kind == "term":
+            field, value = next(iter(spec.items()))
+            value = value.get("value") if isinstance(value, dict) else value
+            return comparable(get_field(document, field)) == comparable(value)
+        if kind == "terms":
+            field, values = next(iter(spec.items()))
+            return comparable(get_field(document, field)) in [comparable(v) for v in values]
+        if kind == "range":
+            field, bounds = next(iter(spec.items()))
+            value = comparable(get_field(document, field))
+            if value is None:
+                return False
+            checks = {"gte": value.__ge__, "gt": value.__gt__, "lte": value.__le__, "lt": value.__lt__}
+            return all(
+                checks[op](comparable(bound)) is True
+                for op, bound in bounds.items()
+                if op in checks
+            )
+        if kind == "exists":
+            return get_field(document, spec["field"]) is not None
+        raise NotImplementedError(f"Query type not supported by the stand-in: {kind}")
@@ -0,0 +1,302 @@
+"""Local stand-in for the Flipkart and Amazon review sites.
+
+Pages are rendered from the fixture templates in ``fixtures/`` with
+deterministic review content and working "Next" pagination, so the real
+platform parsers and fetchers can run against them without network access.
+"""
+import json
+import random
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+FLIPKART_PRODUCT = {
+    "slug": "bench-phone-teal-128-gb",
+    "item_id": "itmbench0000001",
+    "product_id": "MOBBENCH0000001",
+    "title": "Bench Phone (Teal, 128 GB)",
+}
+AMAZON_PRODUCT = {
+    "product_id": "B0BENCH001",
+    "title": "Bench Phone (Teal, 128 GB)",
+}
+
+WORDS = (
+    "battery camera display performance value delivery quality sound design "
+    "charging heating gaming screen build price speaker storage software update "
+    "excellent good average poor amazing decent smooth laggy bright premium"
+).split()
+NAMES = ["Asha", "Rohan", "Meera", "Vikram", "Priya", "Arjun", "Kavya", "Rahul", "Neha", "Sanjay"]
+LOCATIONS = ["Bengaluru", "Mumbai", "Delhi", "Kiratpur", "Pune", "Chennai", "Kolkata", "Jaipur"]
+MONTHS = ["January", "March", "May", "July", "September", "October", "December"]
+
+
+def load_fixture(platform: str, name: str) -> str:
+    return (FIXTURES_DIR / platform / f"{name}.html").read_text(encoding="utf-8")
+
+
+def filler(kind: str, count: int) -> str:
+    # Navigation and footer markup so pages carry realistic non-review weight
+    links = "".join(
+        f'<li class="{kind}-item"><a href="/{kind}/{i}" title="Category {i}">Category {i}</a></li>'
+        for i in range(count)
+    )
+    return f'<ul class="{kind}">{links}</ul>'
+
+
+class FixtureSite:
+    """Renders review pages; ``overlap`` repeats reviews from the previous page,
+    like a listing that shifts while it is being crawled."""
+
+    def __init__(self, total_pages: int = 20, reviews_per_page: int = 10, overlap: int = 0):
+        self.total_pages = total_pages
+        self.reviews_per_page = reviews_per_page
+        self.overlap = overlap
+        self.templates = {
+            platform: (load_fixture(platform, "page"), load_fixture(platform, "review"))
+            for platform in ("flipkart", "amazon")
+        }
+        self.navigation = filler("nav", 120)
+        self.footer = filler("footer", 80)
+
+    def review_fields(self, number: int) -> dict:
+        rng = random.Random(number)
+        words = lambda n: " ".join(rng.choice(WORDS) for _ in range(n))  # noqa: E731
+        return {
+            "review_number": number,
+            "rating": rng.randint(1, 5),
+            "title": words(3).capitalize(),
+            "description": words(rng.randint(12, 60)).capitalize() + ".",
+            "extra": words(rng.randint(0, 20)),
+            "reviewer": f"{rng.choice(NAMES)} {number}",
+            "location": rng.choice(LOCATIONS),
+            "upvotes": rng.randint(0, 500),
+            "downvotes": rng.randint(0, 50),
+        }
+
+    def review_numbers(self, page: int) -> List[int]:
+        first = max(0, (page - 1) * self.reviews_per_page - self.overlap)
+        return list(range(first, first + self.reviews_per_page + (self.overlap if page > 1 else 0)))
+
+    def render(self, platform: str, page: int) -> str:
+        page_template, review_template = self.templates[platform]
+        reviews = []
+        for number in self.review_numbers(page):
+            fields = self.review_fields(number)
+            if platform == "flipkart":
+                fields["posted_at"] = f"{number % 11 + 1} months ago"
+            else:
+                fields["posted_at"] = f"{number % 28 + 1} {MONTHS[number % len(MONTHS)]} 2024"
+            reviews.append(review_template.format(**fields))
+
+        has_next = page < self.total_pages
+        if platform == "flipkart":
+            product = FLIPKART_PRODUCT
+            next_href = f"{self.flipkart_path()}&page={page + 1}"
+            pagination = f'<a class="_9QVEpD" href="{next_href}"><span>Next</span></a>' if has_next else ""
+        else:
+            product = AMAZON_PRODUCT
+            next_href = f"{self.amazon_path()}?reviewerType=all_reviews&pageNumber={page + 1}"
+            pagination = (
+                f'<li class="a-last"><a href="{next_href}">Next page<span class="a-letter-space"></span></a></li>'
+                if has_next
+                else '<li class="a-disabled a-last">Next page</li>'
+            )
+
+        return page_template.format(
+            product_title=product["title"],
+            product_id=product["product_id"],
+            page=page,
+            total_pages=self.total_pages,
+            navigation=self.navigation,
+            footer=self.footer,
+            reviews="\n".join(reviews),
+            pagination=pagination,
+        )
+
+    @staticmethod
+    def flipkart_path() -> str:
+        product = FLIPKART_PRODUCT
+        return f"/{product['slug']}/product-reviews/{product['item_id']}?pid={product['product_id']}"
+
+    @staticmethod
+    def amazon_path() -> str:
+        return f"/amazon-bench/product-reviews/{AMAZON_PRODUCT['product_id']}/"
+
+
+class FakeReviewSite:
+    """Serves :class:`FixtureSite` pages over HTTP on a local port."""
+
+    def __init__(self, site: Optional[FixtureSite] = None):
+        self.site = site or FixtureSite()
+        self.requests = 0
+        handler = self.make_handler()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def url(self, platform: str) -> str:
+        if platform == "flipkart":
+            return self.base_url + FixtureSite.flipkart_path()
+        return self.base_url + FixtureSite.amazon_path() + "?pageNumber=1"
+
+    def make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.requests += 1
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                platform = "flipkart" if "pid" in query else "amazon"
+                page = int((query.get("page") or query.get("pageNumber") or ["1"])[0])
+                if page > fake.site.total_pages:
+                    self.send_error(404)
+                    return
+                body = fake.site.render(platform, page).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class CallbackSink:
+    """Receives the worker's review callbacks and counts what arrives.
+
+    Like the server, it answers with how many of the reviews were new.
+    """
+
+    def __init__(self):
+        self.reviews = 0
+        self.review_ids = set()
+        self.batches = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.make_handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/api/v1/reviews/ingest"
+
+    def make_handler(self):
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                reviews = json.loads(body)
+                with sink.lock:
+                    sink.batches += 1
+                    sink.bytes += len(body)
+                    sink.reviews += len(reviews)
+                    new_ids = {review["review_id"] for review in reviews} - sink.review_ids
+                    sink.review_ids |= new_ids
+                answer = json.dumps(
+                    {"status": "Success", "created": len(new_ids), "duplicates": len(reviews) - len(new_ids)}
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(answer)))
+                self.end_headers()
+                self.wfile.write(answer)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StandInProxy:
+    """Plain HTTP proxy on a local port that forwards, refuses with 403 or serves a captcha.
+
+    ``behaviour`` is ``forward``, ``refuse`` or ``captcha``; the captcha page
+    is what Amazon answers with status 200 when it blocks an address.
+    """
+
+    CAPTCHA_PAGE = (
+        "<html><body><form action='/errors/validateCaptcha'>"
+        "<h4>Enter the characters you see below</h4></form></body></html>"
+    )
+
+    def __init__(self, behaviour: str = "forward"):
+        self.behaviour = behaviour
+        self.requests = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.make_handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def make_handler(self):
+        proxy = self
+        # The proxy itself must not go through any proxy from the environment
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                proxy.requests += 1
+                if proxy.behaviour == "refuse":
+                    self.send_error(403)
+                    return
+                status, body = 200, StandInProxy.CAPTCHA_PAGE.encode()
+                if proxy.behaviour == "forward":
+                    # Requests through a proxy carry the absolute URL as the path
+                    try:
+                        with opener.open(self.path, timeout=10) as response:
+                            status, body = response.status, response.read()
+                    except urllib.error.HTTPError as e:
+                        status, body = e.code, e.read()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
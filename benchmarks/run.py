@@ -0,0 +1,708 @@
+"""Offline benchmarks for the crawl, ingest, search, suggest and batch paths and start-up time.
+
+Everything runs locally: review pages come from the fixture site in
+``fake_site.py`` and Elasticsearch is replaced by the in-process stand-in in
+``fake_elasticsearch.py``, or with ``--storage sqlite`` by the embedded SQLite
+store. The embedded scenario crawls, ingests and searches in one process, as
+an embedded install does, and the proxy scenario crawls through local
+stand-in proxies to check rotation and ban handling. Results are printed (or written with ``--output``)
+as JSON, and ``--baseline`` compares them with an earlier run. The startup,
+suggest and batch scenarios also fail the run when they exceed their budgets.
+
+    python benchmarks/run.py --output bench.json
+    python benchmarks/run.py --scenarios parse,search --baseline bench.json
+    python benchmarks/run.py --scenarios ingest,search,embedded --storage sqlite
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform as py_platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+sys.path[:0] = [str(BENCH_DIR), str(ROOT / "tautaras_server"), str(ROOT / "tautaras_worker")]
+
+# Settings must be in place before the worker and server modules read them
+os.environ.setdefault("REDIS_HOST", "redis://127.0.0.1:6379")
+os.environ["SEEN_FILTER"] = "memory"
+os.environ["CRAWL_DELAY_MIN"] = "0"
+os.environ["CRAWL_DELAY_MAX"] = "0"
+os.environ["SNAPSHOT_DIR"] = ""
+os.environ["PROXY_LIST"] = ""
+os.environ["WORKER_METRICS_PORT"] = ""
+# In-process broker and result backend for the batch scenario
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_BAKCEND_URI", "cache+memory://")
+# Nothing consumes the in-process broker, and one client submits everything
+os.environ["ADMISSION_MAX_WAIT"] = "0"
+os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+
+from fake_elasticsearch import FakeElasticsearch  # noqa: E402
+from fake_site import CallbackSink, FakeReviewSite, FixtureSite, StandInProxy  # noqa: E402
+
+PLATFORMS = ("flipkart", "amazon")
+SCENARIOS = ("parse", "crawl", "proxy", "ingest", "search", "suggest", "batch", "embedded", "startup")
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def metric(value: float, unit: str, better: str) -> dict:
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def latency_metrics(prefix: str, latencies) -> dict:
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        f"{prefix}_p50_ms": metric(percentile(ms, 50), "ms", "lower"),
+        f"{prefix}_p90_ms": metric(percentile(ms, 90), "ms", "lower"),
+        f"{prefix}_p99_ms": metric(percentile(ms, 99), "ms", "lower"),
+        f"{prefix}_max_ms": metric(max(ms) if ms else 0.0, "ms", "lower"),
+    }
+
+
+def fixture_reviews(site: FixtureSite, pages: int):
+    """Review payloads exactly as the worker would post them."""
+    from logic.platforms import get_platform
+    from logic.review_extractor import build_reviews
+
+    batches = []
+    for platform_name in PLATFORMS:
+        platform = get_platform(platform_name)
+        for page_number in range(1, pages + 1):
+            page = platform.parse_page(site.render(platform_name, page_number), "http://bench/")
+            batches.append(
+                build_reviews(
+                    page.reviews,
+                    f"bench-{platform_name}",
+                    f"BENCH-{platform_name.upper()}",
+                    "Bench Phone Teal 128 Gb",
+                    platform_name,
+                )
+            )
+    return batches
+
+
+def scenario_parse(args) -> dict:
+    from logic.platforms import get_platform
+
+    site = FixtureSite(total_pages=args.pages)
+    metrics = {}
+    for platform_name in PLATFORMS:
+        platform = get_platform(platform_name)
+        pages = [site.render(platform_name, n) for n in range(1, args.pages + 1)]
+        reviews = 0
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            for number, html in enumerate(pages, start=1):
+                reviews += len(platform.parse_page(html, f"http://bench/?page={number}").reviews)
+        elapsed = time.perf_counter() - started
+        parsed = len(pages) * args.rounds
+        metrics[f"{platform_name}_pages_per_sec"] = metric(parsed / elapsed, "pages/s", "higher")
+        metrics[f"{platform_name}_reviews_per_sec"] = metric(reviews / elapsed, "reviews/s", "higher")
+        metrics[f"{platform_name}_ms_per_page"] = metric(elapsed / parsed * 1000, "ms", "lower")
+    return {"params": {"pages": args.pages, "rounds": args.rounds}, "metrics": metrics}
+
+
+def scenario_crawl(args) -> dict:
+    from logic.platforms import PLATFORMS as REGISTRY
+    from logic.review_extractor import review_extractor
+
+    metrics = {}
+    site = FixtureSite(total_pages=args.pages, overlap=args.overlap)
+    for platform_name in PLATFORMS:
+        platform = REGISTRY[platform_name]
+        fetch_mode = platform.fetch_mode
+        # The fixture site is plain HTTP; no browser is needed to read it
+        platform.fetch_mode = "http"
+        try:
+            with FakeReviewSite(site) as fake_site, CallbackSink() as sink:
+                started = time.perf_counter()
+                result = review_extractor(
+                    {
+                        "url": fake_site.url(platform_name),
+                        "task_id": f"bench-crawl-{platform_name}",
+                        "callback_url": sink.url,
+                        "platform": platform_name,
+                    }
+                )
+                elapsed = time.perf_counter() - started
+                pages = fake_site.requests
+                # Nothing changed since, so a refresh should stop at the first page
+                refresh = review_extractor(
+                    {
+                        "url": fake_site.url(platform_name),
+                        "task_id": f"bench-refresh-{platform_name}",
+                        "callback_url": sink.url,
+                        "platform": platform_name,
+                        "incremental": True,
+                    }
+                )
+                refresh_pages = fake_site.requests - pages
+        finally:
+            platform.fetch_mode = fetch_mode
+
+        for run in (result, refresh):
+            if run.get("status") != "Reviews extracted successfully":
+                raise RuntimeError(f"Crawl of {platform_name} failed: {run}")
+        metrics[f"{platform_name}_pages_per_sec"] = metric(pages / elapsed, "pages/s", "higher")
+        metrics[f"{platform_name}_reviews_per_sec"] = metric(sink.reviews / elapsed, "reviews/s", "higher")
+        metrics[f"{platform_name}_callback_kb_per_page"] = metric(
+            sink.bytes / 1024 / max(pages, 1), "KiB", "lower"
+        )
+        metrics[f"{platform_name}_refresh_pages"] = metric(refresh_pages, "pages", "lower")
+    return {"params": {"pages": args.pages, "overlap": args.overlap}, "metrics": metrics}
+
+
+def scenario_proxy(args) -> dict:
+    """Crawl Amazon through stand-in proxies: one serves a captcha, one refuses, one forwards.
+
+    The pool meets them in that order. The crawl must finish through the
+    forwarding proxy, with both bad proxies banned and never credited with a
+    success, or the run fails.
+    """
+    from logic import proxy_pool
+    from logic.platforms import PLATFORMS as REGISTRY
+    from logic.proxy_pool import MemoryProxyState, ProxyPool
+    from logic.review_extractor import review_extractor
+
+    class InOrderProxyPool(ProxyPool):
+        def choose(self, candidates, weights):
+            return candidates[0]
+
+    site = FixtureSite(total_pages=args.pages, overlap=args.overlap)
+    with FakeReviewSite(site) as fake_site, CallbackSink() as sink, StandInProxy(
+        "captcha"
+    ) as captcha, StandInProxy("refuse") as refusing, StandInProxy("forward") as forwarding:
+        proxies = {"captcha": captcha, "refuse": refusing, "forward": forwarding}
+        state = MemoryProxyState()
+        proxy_pool.proxy_pool = InOrderProxyPool([proxy.url for proxy in proxies.values()], state=state)
+        try:
+            started = time.perf_counter()
+            result = review_extractor(
+                {
+                    "url": fake_site.url("amazon"),
+                    "task_id": "bench-proxy-amazon",
+                    "callback_url": sink.url,
+                    "platform": "amazon",
+                }
+            )
+            elapsed = time.perf_counter() - started
+        finally:
+            proxy_pool.proxy_pool = None
+        stats = state.get_stats([proxy.url for proxy in proxies.values()])
+
+    expected = {
+        "captcha": {"success": 0, "bans": 1},
+        "refuse": {"success": 0, "bans": 1},
+        "forward": {"success": fake_site.requests, "bans": 0},
+    }
+    found = {
+        name: {"success": stats[proxy.url]["success"], "bans": stats[proxy.url]["bans"]}
+        for name, proxy in proxies.items()
+    }
+    if result.get("status") != "Reviews extracted successfully" or found != expected:
+        raise RuntimeError(f"Proxy rotation failed: {result.get('status')}, proxy stats {found}")
+    if len(sink.review_ids) != site.reviews_per_page * args.pages:
+        raise RuntimeError(f"Proxy crawl delivered {len(sink.review_ids)} distinct reviews")
+
+    metrics = {
+        "seconds": metric(elapsed, "s", "lower"),
+        "bad_proxy_requests": metric(captcha.requests + refusing.requests, "requests", "lower"),
+    }
+    return {"params": {"pages": args.pages, "proxies": list(proxies)}, "metrics": metrics}
+
+
+class CountingStore:
+    """Counts the client calls made on a store that does not count them itself."""
+
+    def __init__(self, store):
+        self.store = store
+        self.indices = store.indices
+        self.calls = {}
+
+    def __getattr__(self, name):
+        attribute = getattr(self.store, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return attribute(*args, **kwargs)
+
+        return call
+
+
+def make_store(storage: str):
+    from core.infra.elasticstack.elastic import script_functions
+
+    if storage == "sqlite":
+        from core.infra.embedded.sqlite_store import SqliteStore
+
+        path = Path(tempfile.mkdtemp(prefix="tautaras_bench_")) / "bench.db"
+        return CountingStore(SqliteStore(str(path)))
+    fake = FakeElasticsearch()
+    fake.scripts = script_functions
+    return fake
+
+
+def server_app(storage: str = "fake"):
+    from core.infra.cache.cache_manager import Cache
+    from core.infra.cache.memory_backend import MemoryBackend
+    from core.infra.elasticstack import elastic, index_manager
+    from core.infra.elasticstack.mappings import PRODUCT_MAPPINGS
+    from core.server import app
+
+    # Ingest reads the products marked for a summary rebuild from the cache
+    Cache.init(backend=MemoryBackend())
+    store = make_store(storage)
+    elastic.client = store
+    index_manager.invalidate_partitions()
+    index_manager.bootstrap()
+    elastic.ensure_index("products", PRODUCT_MAPPINGS)
+    store.calls.clear()
+    return app, store
+
+
+async def timed_requests(app, requests, concurrency: int):
+    import httpx
+
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                method, url, kwargs = queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.request(method, url, **kwargs)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def scenario_ingest(args) -> dict:
+    app, fake = server_app(args.storage)
+    batches = fixture_reviews(FixtureSite(total_pages=args.pages), args.pages)
+    requests = [
+        ("POST", "/api/v1/reviews/ingest", {"content": json.dumps(batch)}) for batch in batches
+    ]
+    latencies, errors, elapsed = asyncio.run(timed_requests(app, requests, args.concurrency))
+    reviews = sum(len(batch) for batch in batches)
+
+    metrics = {
+        "reviews_per_sec": metric(reviews / elapsed, "reviews/s", "higher"),
+        "batches_per_sec": metric(len(batches) / elapsed, "batches/s", "higher"),
+        "errors": metric(errors, "requests", "lower"),
+        "es_calls_per_batch": metric(sum(fake.calls.values()) / len(batches), "calls", "lower"),
+    }
+    metrics.update(latency_metrics("batch", latencies))
+    return {
+        "params": {"batches": len(batches), "reviews": reviews, "concurrency": args.concurrency},
+        "metrics": metrics,
+    }
+
+
+def seed_documents(fake: FakeElasticsearch, count: int) -> None:
+    site = FixtureSite()
+    operations = []
+    for number in range(count):
+        fields = site.review_fields(number)
+        platform_name = PLATFORMS[number % 2]
+        timestamp = datetime(2024, 1 + number % 12, 1 + number % 28, tzinfo=timezone.utc).isoformat()
+        review_id = f"{number:064x}"
+        operations.append({"create": {"_index": "reviews-write", "_id": review_id}})
+        operations.append(
+            {
+                "review_id": review_id,
+                "token_id": f"bench-{number % 50}",
+                "product_id": f"BENCH{number % 50:05d}",
+                "product_name": f"Bench Product {number % 50}",
+                "site_name": platform_name,
+                "rating": float(fields["rating"]),
+                "title": fields["title"],
+                "description": fields["description"],
+                "posted_at": timestamp,
+                "reviewer": fields["reviewer"],
+                "reviewer_details": {"location": fields["location"]},
+                "indexed_at": timestamp,
+                "updated_at": timestamp,
+            }
+        )
+    fake.bulk(operations=operations)
+    fake.calls.clear()
+
+
+def search_queries(count: int):
+    rng = random.Random(7)
+    mix = [
+        lambda: {},
+        lambda: {"product_name": f"Bench Product {rng.randint(0, 49)}"},
+        lambda: {"reviewer": f"Asha {rng.randint(0, 999)}"},
+        lambda: {"page": rng.randint(1, 20), "size": 100},
+    ]
+    return [("GET", "/api/v1/reviews", {"params": rng.choice(mix)()}) for _ in range(count)]
+
+
+def scenario_search(args) -> dict:
+    app, fake = server_app(args.storage)
+    seed_documents(fake, args.documents)
+    requests = search_queries(args.requests)
+    latencies, errors, elapsed = asyncio.run(timed_requests(app, requests, args.concurrency))
+
+    metrics = {
+        "requests_per_sec": metric(len(requests) / elapsed, "req/s", "higher"),
+        "errors": metric(errors, "requests", "lower"),
+    }
+    metrics.update(latency_metrics("latency", latencies))
+    return {
+        "params": {
+            "documents": args.documents,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "metrics": metrics,
+    }
+
+
+def seed_products(fake: FakeElasticsearch, count: int) -> None:
+    operations = []
+    for number in range(count):
+        platform_name = PLATFORMS[number % 2]
+        operations.append({"index": {"_index": "products", "_id": f"{platform_name}:BENCH{number:05d}"}})
+        operations.append(
+            {
+                "product_id": f"BENCH{number:05d}",
+                "product_name": f"Bench Phone {number} Teal {64 << number % 3} Gb",
+                "site_name": platform_name,
+            }
+        )
+    fake.bulk(operations=operations)
+    fake.calls.clear()
+
+
+def suggest_queries(count: int, products: int):
+    """Keystroke sequences over product names, skewed towards a few popular ones."""
+    rng = random.Random(11)
+    requests = []
+    while len(requests) < count:
+        name = f"bench phone {int(rng.paretovariate(1.2)) % products}"
+        for end in range(1, len(name) + 1):
+            requests.append(("GET", "/api/v1/reviews/suggest", {"params": {"prefix": name[:end]}}))
+    return requests[:count]
+
+
+def scenario_suggest(args) -> dict:
+    """As-you-type product suggestions, one request per keystroke."""
+    from api.v1.crawler.search import suggest_cache
+
+    app, fake = server_app(args.storage)
+    seed_products(fake, args.products)
+    suggest_cache.entries.clear()
+    requests = suggest_queries(args.requests, args.products)
+    latencies, errors, elapsed = asyncio.run(timed_requests(app, requests, args.concurrency))
+
+    metrics = {
+        "requests_per_sec": metric(len(requests) / elapsed, "req/s", "higher"),
+        "errors": metric(errors, "requests", "lower"),
+        "es_searches_per_request": metric(fake.calls.get("search", 0) / len(requests), "calls", "lower"),
+    }
+    metrics.update(latency_metrics("latency", latencies))
+    return {
+        "params": {"products": args.products, "requests": args.requests, "concurrency": args.concurrency},
+        "metrics": metrics,
+        "budgets": {"latency_p90_ms": args.suggest_p90_budget},
+    }
+
+
+def batch_urls(count: int):
+    return [
+        f"https://www.flipkart.com/bench-phone-{n}/p/itm{n:06d}?pid=BENCH{n:06d}&utm_source=bench"
+        if n % 2
+        else f"https://www.amazon.in/dp/B{n:09d}?ref_=bench"
+        for n in range(count)
+    ]
+
+
+def scenario_batch(args) -> dict:
+    """Submit one large batch, submit it again (every job already queued), then read its status."""
+    import httpx
+    from core.infra.cache.cache_manager import Cache
+    from core.infra.cache.memory_backend import MemoryBackend
+
+    app, _ = server_app(args.storage)
+    Cache.init(backend=MemoryBackend(max_entries=args.batch_urls * 2 + 10))
+    urls = batch_urls(args.batch_urls)
+
+    async def run_batch():
+        timings = {}
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None
+        ) as client:
+            for name in ("submit", "resubmit"):
+                started = time.perf_counter()
+                response = await client.post("/api/v1/reviews/extract/batch", json={"urls": urls})
+                timings[name] = time.perf_counter() - started
+                response.raise_for_status()
+                timings[f"{name}_new_jobs"] = response.json()["submitted"]
+            started = time.perf_counter()
+            response = await client.get(f"/api/v1/reviews/batch/{response.json()['batch_id']}")
+            timings["status"] = time.perf_counter() - started
+            response.raise_for_status()
+        return timings
+
+    timings = asyncio.run(run_batch())
+    metrics = {
+        "submit_seconds": metric(timings["submit"], "s", "lower"),
+        "resubmit_seconds": metric(timings["resubmit"], "s", "lower"),
+        "status_seconds": metric(timings["status"], "s", "lower"),
+        "urls_per_sec": metric(len(urls) / timings["submit"], "urls/s", "higher"),
+        "resubmitted_jobs": metric(timings["resubmit_new_jobs"], "jobs", "lower"),
+    }
+    return {
+        "params": {"urls": len(urls), "new_jobs": timings["submit_new_jobs"]},
+        "metrics": metrics,
+        "budgets": {"submit_seconds": args.batch_budget},
+    }
+
+
+def scenario_embedded(args) -> dict:
+    """Crawl the fixture site with in-process jobs into SQLite, then search what was stored."""
+    from api.v1.crawler.review import store_reviews
+    from core.infra.cache.cache_manager import Cache
+    from core.infra.cache.memory_backend import MemoryBackend
+    from core.infra.embedded.executor import InProcessExecutor
+    from logic.platforms import PLATFORMS as REGISTRY
+
+    app, store = server_app("sqlite")
+    Cache.init(backend=MemoryBackend())
+    site = FixtureSite(total_pages=args.pages, overlap=args.overlap)
+    executor = InProcessExecutor(workers=len(PLATFORMS))
+    fetch_modes = {name: REGISTRY[name].fetch_mode for name in PLATFORMS}
+
+    async def crawl(fake_site):
+        executor.attach(asyncio.get_running_loop(), store_reviews)
+        job_ids = [
+            executor.submit({"url": fake_site.url(name), "callback_url": None, "platform": name})
+            for name in PLATFORMS
+        ]
+        while any(executor.state(job_id)[0] in ("PENDING", "STARTED") for job_id in job_ids):
+            await asyncio.sleep(0.01)
+        return [executor.state(job_id) for job_id in job_ids]
+
+    try:
+        for name in PLATFORMS:
+            REGISTRY[name].fetch_mode = "http"
+        with FakeReviewSite(site) as fake_site:
+            started = time.perf_counter()
+            states = asyncio.run(crawl(fake_site))
+            elapsed = time.perf_counter() - started
+            pages = fake_site.requests
+    finally:
+        executor.shutdown()
+        for name, fetch_mode in fetch_modes.items():
+            REGISTRY[name].fetch_mode = fetch_mode
+    failed = [state for state in states if state[0] != "SUCCESS"]
+    if failed:
+        raise RuntimeError(f"Embedded crawl failed: {failed}")
+    stored = store.search(index="reviews-read", body={"size": 0})["hits"]["total"]["value"]
+
+    rng = random.Random(5)
+    terms = ("battery", "camera quality", "excellent sound", "smooth gaming performance")
+    requests = [
+        ("GET", "/api/v1/reviews/search", {"params": {"q": rng.choice(terms)}})
+        if number % 2
+        else ("GET", "/api/v1/reviews", {"params": {"min_rating": 4, "page": rng.randint(1, 5)}})
+        for number in range(args.requests)
+    ]
+    latencies, errors, search_elapsed = asyncio.run(timed_requests(app, requests, args.concurrency))
+
+    metrics = {
+        "pages_per_sec": metric(pages / elapsed, "pages/s", "higher"),
+        "reviews_per_sec": metric(stored / elapsed, "reviews/s", "higher"),
+        "stored_reviews": metric(stored, "reviews", "higher"),
+        "requests_per_sec": metric(len(requests) / search_elapsed, "req/s", "higher"),
+        "errors": metric(errors, "requests", "lower"),
+    }
+    metrics.update(latency_metrics("latency", latencies))
+    return {
+        "params": {"pages": args.pages, "requests": args.requests, "concurrency": args.concurrency},
+        "metrics": metrics,
+    }
+
+
+def startup_report(app: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, str(BENCH_DIR / "startup_report.py"), app, "--json"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def scenario_startup(args) -> dict:
+    """Cold import time of each app in a fresh interpreter, median of several runs."""
+    metrics, budgets = {}, {}
+    for name, budget in (
+        ("server", args.server_startup_budget),
+        ("worker", args.worker_startup_budget),
+    ):
+        runs = [startup_report(name) for _ in range(args.startup_runs)]
+        import_ms = percentile([run["import_seconds"] * 1000 for run in runs], 50)
+        metrics[f"{name}_import_ms"] = metric(import_ms, "ms", "lower")
+        metrics[f"{name}_modules"] = metric(runs[-1]["modules_imported"], "modules", "lower")
+        budgets[f"{name}_import_ms"] = budget * 1000
+    return {"params": {"runs": args.startup_runs}, "metrics": metrics, "budgets": budgets}
+
+
+def over_budget(results: dict):
+    """Return the metrics above the absolute budgets some scenarios declare."""
+    violations = []
+    for scenario, result in results.items():
+        for name, budget in result.get("budgets", {}).items():
+            value = result["metrics"][name]["value"]
+            if value > budget:
+                violations.append({"scenario": scenario, "metric": name, "budget": budget, "current": value})
+    return violations
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Return the metrics that got worse than ``baseline`` by more than ``tolerance``."""
+    regressions = []
+    for scenario, result in results.items():
+        old_metrics = baseline.get("results", {}).get(scenario, {}).get("metrics", {})
+        for name, new in result["metrics"].items():
+            old = old_metrics.get(name)
+            if not old or not old["value"]:
+                continue
+            change = (new["value"] - old["value"]) / abs(old["value"])
+            worse = -change if new["better"] == "higher" else change
+            if worse > tolerance:
+                regressions.append(
+                    {
+                        "scenario": scenario,
+                        "metric": name,
+                        "baseline": old["value"],
+                        "current": new["value"],
+                        "change_pct": round(change * 100, 1),
+                    }
+                )
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--pages", type=int, default=20, help="Fixture pages per platform")
+    parser.add_argument("--rounds", type=int, default=5, help="Parse passes over the fixture pages")
+    parser.add_argument("--overlap", type=int, default=3, help="Reviews repeated between consecutive pages")
+    parser.add_argument("--documents", type=int, default=5000, help="Reviews seeded for the search scenario")
+    parser.add_argument("--requests", type=int, default=500, help="Search and suggest requests to send")
+    parser.add_argument("--products", type=int, default=2000, help="Products seeded for the suggest scenario")
+    parser.add_argument("--suggest-p90-budget", type=float, default=20, help="Maximum suggest p90 latency in ms; misses scan the stand-in linearly")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent API clients")
+    parser.add_argument("--batch-urls", type=int, default=5000, help="URLs in the batch scenario's submission")
+    parser.add_argument("--batch-budget", type=float, default=1.0, help="Maximum seconds to submit the batch")
+    parser.add_argument("--storage", choices=("fake", "sqlite"), default="fake", help="Store behind the ingest, search, suggest and batch scenarios")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--startup-runs", type=int, default=3, help="Fresh interpreters per app for the startup scenario")
+    parser.add_argument("--server-startup-budget", type=float, default=0.8, help="Maximum server import time in seconds")
+    parser.add_argument("--worker-startup-budget", type=float, default=0.5, help="Maximum worker import time in seconds")
+    args = parser.parse_args(argv)
+
+    scenario_functions = {
+        "parse": scenario_parse,
+        "crawl": scenario_crawl,
+        "proxy": scenario_proxy,
+        "ingest": scenario_ingest,
+        "search": scenario_search,
+        "suggest": scenario_suggest,
+        "batch": scenario_batch,
+        "embedded": scenario_embedded,
+        "startup": scenario_startup,
+    }
+    selected = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(selected) - set(scenario_functions)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    import logging
+
+    logging.disable(logging.WARNING)
+
+    results = {}
+    for name in selected:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = scenario_functions[name](args)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": py_platform.python_version(),
+        "machine": py_platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+    exit_code = 0
+    violations = over_budget(results)
+    if violations:
+        report["budget_violations"] = violations
+        exit_code = 1
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        report["regressions"] = regressions
+        exit_code = 1 if regressions else exit_code
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+    print(payload)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Report where server or worker start-up time goes.
+
+Imports the app in a fresh interpreter with ``-X importtime`` and prints the
+totals with the most expensive packages and modules. ``--warm-up`` also runs
+the server's lifespan warm-up against the configured backends; ``--browser``
+also times launching and closing one Chrome with the worker's profile, which
+browser jobs pay on their first page.
+
+    python benchmarks/startup_report.py server --warm-up
+    python benchmarks/startup_report.py worker --browser --json
+"""
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Each child imports the app, optionally times one extra step, and prints its
+# timings as the last line of stdout
+SERVER_CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+import core.server
+imported = time.perf_counter()
+extra = None
+if {extra}:
+    async def run_lifespan():
+        async with core.server.app.router.lifespan_context(core.server.app):
+            return time.perf_counter()
+    extra = asyncio.run(run_lifespan()) - imported
+print(json.dumps({{"import_seconds": imported - started, "extra_seconds": extra}}))
+"""
+
+WORKER_CHILD = """
+import json, time
+started = time.perf_counter()
+import tasks
+imported = time.perf_counter()
+extra = None
+if {extra}:
+    from logic.fetchers import BrowserFetcher
+    BrowserFetcher().close()
+    extra = time.perf_counter() - imported
+print(json.dumps({{"import_seconds": imported - started, "extra_seconds": extra}}))
+"""
+
+# app -> (directory, child script, label of the extra step)
+APPS = {
+    "server": ("tautaras_server", SERVER_CHILD, "Warm-up"),
+    "worker": ("tautaras_worker", WORKER_CHILD, "Browser launch"),
+}
+
+
+def parse_importtime(stderr: str):
+    """Yield ``(module, depth, self_us, cumulative_us)`` from ``-X importtime`` output."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        yield name.strip(), depth, int(self_us), int(cumulative_us)
+
+
+def build_report(stdout: str, stderr: str, top: int) -> dict:
+    modules = list(parse_importtime(stderr))
+    packages = defaultdict(int)
+    for name, _, self_us, _ in modules:
+        packages[name.split(".")[0]] += self_us
+
+    report = json.loads(stdout.strip().splitlines()[-1])
+    report["modules_imported"] = len(modules)
+    report["top_packages_ms"] = {
+        name: round(us / 1000, 1)
+        for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    }
+    # Shallow entries only; deeper ones are already inside their parent's cumulative time
+    shallow = [module for module in modules if module[1] <= 2]
+    shallow.sort(key=lambda module: module[3], reverse=True)
+    report["top_imports_ms"] = {
+        name: round(cumulative / 1000, 1) for name, _, _, cumulative in shallow[:top]
+    }
+    return report
+
+
+def print_report(report: dict, extra_label: str) -> None:
+    print(f"Import time:    {report['import_seconds'] * 1000:8.1f} ms ({report['modules_imported']} modules)")
+    if report["extra_seconds"] is not None:
+        print(f"{extra_label + ':':<15} {report['extra_seconds'] * 1000:8.1f} ms")
+    print("\nSelf time by package:")
+    for name, ms in report["top_packages_ms"].items():
+        print(f"  {ms:8.1f} ms  {name}")
+    print("\nCumulative time of top-level imports:")
+    for name, ms in report["top_imports_ms"].items():
+        print(f"  {ms:8.1f} ms  {name}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("app", choices=sorted(APPS))
+    parser.add_argument("--warm-up", action="store_true", help="Server: also run the lifespan warm-up")
+    parser.add_argument("--browser", action="store_true", help="Worker: also time one Chrome launch")
+    parser.add_argument("--top", type=int, default=15, help="Number of packages and modules to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--budget", type=float, help="Exit with status 1 when import time exceeds this many seconds")
+    args = parser.parse_args(argv)
+
+    app_dir, child, extra_label = APPS[args.app]
+    extra = args.warm_up if args.app == "server" else args.browser
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", child.format(extra=extra)],
+        cwd=ROOT / app_dir,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:], file=sys.stderr)
+        return result.returncode
+
+    report = build_report(result.stdout, result.stderr, args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, extra_label)
+
+    if args.budget is not None and report["import_seconds"] > args.budget:
+        print(f"Import time {report['import_seconds']:.3f}s exceeds budget {args.budget:.3f}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
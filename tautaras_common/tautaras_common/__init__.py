@@ -0,0 +1,4 @@
+"""Code shared by the server and the worker.
+
+Installed into both images; the apps configure it from their own ``.env``.
+"""
@@ -0,0 +1,150 @@
+"""Queued, rate-limited JSON logging shared by the server and the worker (see "Logging" in the readme).
+
+Records are resolved in the caller's thread and written by a listener thread,
+so a slow stream never holds up a request or a task. Each app passes its
+settings and the third-party loggers to route through the queue.
+"""
+import atexit
+import json
+import logging
+import logging.config
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterable
+
+from tautaras_common.tracing import current_span
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through ``extra=``
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+listener = None
+listener_pid = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "location": f"{record.module}:{record.lineno}",
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        suppressed = getattr(record, "suppressed", None)
+        return f"{line} ({suppressed} similar messages suppressed)" if suppressed else line
+
+
+class TraceContextFilter(logging.Filter):
+    """Copies the current trace ids onto the record before it leaves the caller's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = current_span.get()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most ``limit`` records per call site every ``interval`` seconds."""
+
+    def __init__(self, limit: int, interval: float):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        # (path, line) -> [window start, records let through, records dropped]
+        self.sites = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0:
+            return True
+        key = (record.pathname, record.lineno)
+        with self.lock:
+            site = self.sites.get(key)
+            if site is None or record.created - site[0] >= self.interval:
+                if site and site[2]:
+                    record.suppressed = site[2]
+                self.sites[key] = [record.created, 1, 0]
+                return True
+            if site[1] < self.limit:
+                site[1] += 1
+                return True
+            site[2] += 1
+            return False
+
+
+class LogQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback here, leave the formatting to the listener
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def stop_listener() -> None:
+    if listener is not None and listener_pid == os.getpid():
+        listener.stop()
+
+
+def setup_logging(
+    level: str = "INFO",
+    log_format: str = "json",
+    rate_limit: int = 20,
+    rate_interval: float = 1,
+    routed_loggers: Iterable[str] = (),
+) -> None:
+    """Send the root logger's records through a queue; once per process."""
+    global listener, listener_pid
+    if listener_pid == os.getpid():
+        return
+
+    stream_handler = logging.StreamHandler()
+    if log_format.lower() == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(TextFormatter(TEXT_FORMAT))
+
+    queue_handler = LogQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(TraceContextFilter())
+    queue_handler.addFilter(RateLimitFilter(limit=rate_limit, interval=rate_interval))
+
+    logging.config.dictConfig(
+        {
+            "version": 1,
+            "disable_existing_loggers": False,
+            "root": {"level": level.upper()},
+            # Send the app's third-party records through the same queue and format
+            "loggers": {name: {"handlers": [], "propagate": True} for name in routed_loggers},
+        }
+    )
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+
+    listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    listener_pid = os.getpid()
+    # Flush what is still queued on exit
+    atexit.register(stop_listener)
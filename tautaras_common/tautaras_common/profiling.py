@@ -0,0 +1,104 @@
+"""Sampling profiler writing flame graph input.
+
+A background thread snapshots Python stacks with ``sys._current_frames``
+every ``interval`` seconds and counts them in the folded format
+("frame;frame;frame count") read by flamegraph.pl, speedscope and inferno.
+Nothing is installed per call, so code that is not being profiled pays
+nothing. The newest ``max_files`` profiles in a directory are kept.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+# Leaf frames from these modules are threads parked on a lock or a selector
+IDLE_MODULES = ("threading.py", "selectors.py", "queue.py", "base_events.py")
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def is_idle(frame) -> bool:
+    return frame.f_code.co_filename.endswith(IDLE_MODULES)
+
+
+def fold(frame, root: Optional[str] = None) -> str:
+    stack = []
+    while frame is not None:
+        stack.append(frame_name(frame))
+        frame = frame.f_back
+    if root is not None:
+        stack.append(root)
+    return ";".join(reversed(stack))
+
+
+class SamplingProfiler:
+    """Samples one thread until stopped, or with no ``thread_id`` every busy thread.
+
+    Sampling every thread roots each stack at its thread's name, to tell the
+    event loop apart from the pool threads.
+    """
+
+    def __init__(self, interval: float, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="sampling-profiler", daemon=True)
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frame = frames.get(self.thread_id)
+                if frame is not None:
+                    self.samples += 1
+                    self.stacks[fold(frame)] += 1
+                continue
+            self.samples += 1
+            for thread_id, frame in frames.items():
+                if thread_id == own_id or is_idle(frame):
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self.stacks[fold(frame, names.get(thread_id, str(thread_id)))] += 1
+
+    def start(self) -> "SamplingProfiler":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def write(self, directory: str, label: str, max_files: int) -> Optional[Path]:
+        if not self.stacks:
+            return None
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        safe_label = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in label)[:80]
+        target = path / f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{safe_label}.folded"
+        target.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()),
+            encoding="utf-8",
+        )
+        prune(path, max_files)
+        return target
+
+
+def prune(directory: Path, max_files: int) -> None:
+    profiles = sorted(directory.glob("*.folded"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in profiles[max_files:]:
+        try:
+            stale.unlink()
+        except OSError:
+            # Another process pruned it first
+            pass
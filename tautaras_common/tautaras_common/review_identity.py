@@ -0,0 +1,36 @@
+"""Review ids: the worker sets them on crawled reviews, the server on ingested ones that lack one."""
+import hashlib
+import json
+import re
+from typing import Any, Dict
+
+REVIEW_ID_PATTERN = re.compile(r"^[a-f0-9]{64}$")
+
+
+def canonical_review_key(review: Dict[str, Any]) -> str:
+    """Encode the identifying fields of a review unambiguously.
+
+    The fields are serialised as a JSON array, so field boundaries are explicit
+    and ("ab", "c") can never collide with ("a", "bc"). Relative dates such as
+    "2 months ago" change between crawls and are not part of the identity.
+    """
+    reviewer_details = review.get("reviewer_details") or {}
+    values = [
+        review.get("site_name"),
+        review.get("product_id") or review.get("product_name"),
+        review.get("reviewer"),
+        reviewer_details.get("location"),
+        review.get("rating"),
+        review.get("title"),
+        review.get("description"),
+    ]
+    values = [None if value is None else str(value) for value in values]
+    return json.dumps(values, ensure_ascii=False, separators=(",", ":"))
+
+
+def compute_review_id(review: Dict[str, Any]) -> str:
+    return hashlib.sha256(canonical_review_key(review).encode("utf-8")).hexdigest()
+
+
+def is_valid_review_id(review_id) -> bool:
+    return isinstance(review_id, str) and bool(REVIEW_ID_PATTERN.match(review_id))
@@ -0,0 +1,151 @@
+"""Minimal tracing with W3C ``traceparent`` propagation.
+
+Spans are kept in a context variable, so nested ``start_span`` blocks form a
+tree within a request or task, and the ``traceparent`` header carries the
+trace from the API through Celery to the worker and back with its review
+callbacks. Finished spans are appended as JSON lines with OTLP field names to
+the path given to ``configure`` (``{pid}`` is replaced by the process id);
+without one, ids are still propagated but nothing is written.
+"""
+import atexit
+import contextvars
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+service_name = "tautaras"
+exporter = None
+configured = False
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = "OK"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return format_traceparent(self.trace_id, self.span_id)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "service": service_name,
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class FileExporter:
+    """Buffers finished spans and appends them to a JSON lines file."""
+
+    def __init__(self, path: str, batch_size: int = 64):
+        self.path = path
+        self.batch_size = batch_size
+        self.buffer = []
+        self.lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def export(self, span: Span) -> None:
+        with self.lock:
+            self.buffer.append(span.to_dict())
+            if len(self.buffer) < self.batch_size:
+                return
+            lines, self.buffer = self.buffer, []
+        self.write(lines)
+
+    def flush(self) -> None:
+        with self.lock:
+            lines, self.buffer = self.buffer, []
+        self.write(lines)
+
+    def write(self, lines) -> None:
+        if not lines:
+            return
+        path = self.path.format(pid=os.getpid())
+        with open(path, "a", encoding="utf-8") as trace_file:
+            trace_file.write("".join(json.dumps(line, default=str) + "\n" for line in lines))
+
+
+def configure(name: str, export_path: Optional[str] = None) -> None:
+    """Name the service on exported spans and write them to ``export_path``.
+
+    Only the first call counts: in embedded mode the worker code runs in the
+    server process and keeps the server's settings.
+    """
+    global service_name, exporter, configured
+    if configured:
+        return
+    service_name = name
+    exporter = FileExporter(export_path) if export_path else None
+    configured = True
+
+
+def parse_traceparent(header: Optional[str]):
+    match = TRACEPARENT_PATTERN.match(header or "")
+    return (match.group(1), match.group(2)) if match else (None, None)
+
+
+def format_traceparent(trace_id: str, span_id: str) -> str:
+    return f"00-{trace_id}-{span_id}-01"
+
+
+@contextmanager
+def start_span(name: str, traceparent: Optional[str] = None, **attributes):
+    """Open a span under ``traceparent`` if given, else under the current span."""
+    trace_id, parent_span_id = parse_traceparent(traceparent)
+    if not trace_id:
+        parent = current_span.get()
+        trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        parent_span_id = parent.span_id if parent else None
+
+    span = Span(name, trace_id, parent_span_id, attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "ERROR"
+        span.attributes["error"] = repr(e)
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        current_span.reset(token)
+        if exporter:
+            exporter.export(span)
+
+
+def flush() -> None:
+    """Write buffered spans now; prefork children exit without running atexit."""
+    if exporter:
+        exporter.flush()
+
+
+def current_traceparent() -> Optional[str]:
+    span = current_span.get()
+    return span.traceparent if span else None
@@ -1,8 +1,11 @@
 from fastapi import APIRouter
 
 from .v1 import v1_router
+from .v1.monitoring import metrics_router
 
 router = APIRouter()
 router.include_router(v1_router, prefix="/api/v1")
+# Served at the conventional Prometheus scrape path
+router.include_router(metrics_router, tags=["monitoring"])
 
 __all__ = ["router"]
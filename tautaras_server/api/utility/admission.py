@@ -0,0 +1,171 @@
+"""Admission control for extraction jobs.
+
+Two checks run before anything is queued. A token bucket per client, shared
+by every server process through the cache backend, caps how fast one client
+can submit. The broker's queue depth and the workers' pool size give the
+wait a new job would see; once that would pass ``ADMISSION_MAX_WAIT`` the
+request is turned away with 429 and a ``Retry-After``, so bursts are shed
+at the door instead of queueing for hours.
+
+Queue depth is read with a passive declare and cached for a couple of
+seconds per process, and jobs this process sends in the meantime are added
+to it. Worker pool sizes change rarely and are inspected once a minute. If
+the broker cannot be read, jobs are admitted as before.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import logging
+import math
+import threading
+import time
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+from core.config.env_config import sttgs
+from core.infra.cache.cache_manager import Cache
+from core.infra.celery.jobs import queue_depth, worker_concurrency
+
+logger = logging.getLogger(__name__)
+
+# Per client; 0 disables the rate limit
+RATE_LIMIT_PER_MINUTE = float(sttgs.get("RATE_LIMIT_PER_MINUTE", 30))
+RATE_LIMIT_BURST = int(sttgs.get("RATE_LIMIT_BURST", 10))
+
+# Longest estimated wait a new job may face; 0 disables the queue check
+MAX_WAIT = int(sttgs.get("ADMISSION_MAX_WAIT", 3600))
+# Hard cap on waiting jobs, whatever the estimate; 0 for none
+MAX_QUEUE_DEPTH = int(sttgs.get("ADMISSION_MAX_QUEUE_DEPTH", 0))
+# Average seconds one worker process spends on a job
+JOB_SECONDS = float(sttgs.get("EXTRACT_JOB_SECONDS", 120))
+QUEUE_CACHE_TTL = float(sttgs.get("ADMISSION_QUEUE_TTL", 2))
+WORKER_STATS_TTL = float(sttgs.get("ADMISSION_WORKER_STATS_TTL", 60))
+# Pool size assumed per worker when inspection gets no answer
+WORKER_CONCURRENCY = int(sttgs.get("WORKER_CONCURRENCY", 1))
+NO_WORKERS_RETRY_AFTER = 30
+
+queue_state = None
+capacity_state = None
+refresh_lock = threading.Lock()
+
+
+def client_id(request: Request) -> str:
+    # The proxy's address is replaced by the client's when the server trusts it
+    return request.client.host if request.client else "unknown"
+
+
+def worker_capacity(consumers: int, now: float) -> int:
+    global capacity_state
+    if consumers == 0:
+        return 0
+    if capacity_state is None or capacity_state["consumers"] != consumers or now - capacity_state["at"] > WORKER_STATS_TTL:
+        try:
+            capacity = worker_concurrency(consumers)
+        except Exception as e:
+            logger.warning(f"Could not inspect worker pools: {e}")
+            capacity = None
+        capacity_state = {
+            "consumers": consumers,
+            "capacity": capacity or consumers * WORKER_CONCURRENCY,
+            "at": now,
+        }
+    return capacity_state["capacity"]
+
+
+def read_queue() -> Optional[dict]:
+    """Cached queue depth and worker capacity; None when the broker cannot be read."""
+    global queue_state
+    now = time.monotonic()
+    if queue_state is not None and now - queue_state["at"] < QUEUE_CACHE_TTL:
+        return queue_state
+    if not refresh_lock.acquire(blocking=False):
+        # Another request is reading the broker; the last reading will do
+        return queue_state
+    try:
+        depth, consumers = queue_depth()
+        queue_state = {
+            "depth": depth,
+            "capacity": worker_capacity(consumers, now),
+            "admitted": 0,
+            "at": now,
+        }
+    except Exception as e:
+        logger.warning(f"Could not read the task queue, admitting jobs: {e}")
+        queue_state = None
+    finally:
+        refresh_lock.release()
+    return queue_state
+
+
+def too_busy(status_code: int, message: str, retry_after: int, estimated_start: Optional[str] = None):
+    detail = {"success": False, "message": message, "retry_after": retry_after}
+    if estimated_start:
+        detail["estimated_start"] = estimated_start
+    return HTTPException(status_code=status_code, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+async def check_rate_limit(request: Request, cost: int = 1) -> None:
+    """Raise 429 once the client has used up its submissions.
+
+    A cost above the burst is charged as a full bucket, so one large batch
+    cannot put the client into hours of debt.
+    """
+    if RATE_LIMIT_PER_MINUTE <= 0:
+        return
+    key = f"ratelimit::{client_id(request)}"
+    cost = min(cost, RATE_LIMIT_BURST)
+    try:
+        wait = await Cache.backend.take_tokens(key, RATE_LIMIT_PER_MINUTE / 60, RATE_LIMIT_BURST, cost)
+    except Exception as e:
+        logger.warning(f"Could not check the rate limit, allowing the request: {e}")
+        return
+    if wait > 0:
+        logger.info(f"Rate limited {key} for {wait:.1f}s")
+        raise too_busy(429, "Too many requests", max(1, math.ceil(wait)))
+
+
+async def admit_jobs(count: int) -> dict:
+    """How many of ``count`` new jobs can be queued now.
+
+    Returns ``admitted``, the ``estimated_start`` of the last of the jobs and,
+    if some were held back, ``retry_after`` seconds until they would fit.
+    Raises 503 when no worker is consuming the queue. Nothing is counted
+    against the queue until ``count_admitted`` is called for the jobs sent.
+    """
+    admission = {"admitted": count, "estimated_start": None, "retry_after": 0}
+    if count == 0 or (MAX_WAIT <= 0 and MAX_QUEUE_DEPTH <= 0):
+        return admission
+    state = await run_in_threadpool(read_queue)
+    if state is None:
+        return admission
+    if state["capacity"] == 0:
+        raise too_busy(503, "No workers are taking jobs", NO_WORKERS_RETRY_AFTER)
+
+    throughput = state["capacity"] / JOB_SECONDS
+    backlog = state["depth"] + state["admitted"]
+    limit = MAX_WAIT * throughput if MAX_WAIT > 0 else math.inf
+    if MAX_QUEUE_DEPTH > 0:
+        limit = min(limit, MAX_QUEUE_DEPTH)
+    admitted = min(count, max(0, int(limit - backlog)))
+
+    admission["admitted"] = admitted
+    # The last job starts once everything ahead of it has been picked up; for
+    # held back jobs that holds if they are resubmitted after retry_after
+    ahead = backlog + count - 1
+    admission["estimated_start"] = (
+        datetime.now(timezone.utc) + timedelta(seconds=ahead / throughput)
+    ).isoformat()
+    if admitted < count:
+        admission["retry_after"] = max(1, math.ceil((backlog + count - limit) / throughput))
+        logger.info(
+            f"Queue of {state['depth']} for {state['capacity']} worker processes: "
+            f"admitted {admitted} of {count} jobs, retry in {admission['retry_after']}s"
+        )
+    return admission
+
+
+def count_admitted(count: int) -> None:
+    """Add jobs just sent to the cached queue depth until the broker is read again."""
+    state = queue_state
+    if state is not None:
+        state["admitted"] += count
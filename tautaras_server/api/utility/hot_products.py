@@ -0,0 +1,68 @@
+"""Product popularity and crawl freshness, shared with the worker's refresher.
+
+Requests naming a product are counted in memory and added to the day's
+``popularity::<date>`` sorted set every few seconds with one pipelined
+write, so counting costs a request nothing. The worker's ``crawl::<product
+id>`` records say when a product was last crawled; extract requests for a
+product crawled within ``PRODUCT_FRESH_TTL`` are answered from the stored
+reviews, and older ones are answered the same way while an incremental
+refresh runs in the background.
+"""
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+import asyncio
+import logging
+
+from core.config.env_config import sttgs
+from core.infra.cache.cache_manager import Cache
+
+logger = logging.getLogger(__name__)
+
+POPULARITY_FLUSH_INTERVAL = float(sttgs.get("POPULARITY_FLUSH_INTERVAL", 10))
+# Kept for the worker's window of days, plus one
+POPULARITY_TTL = (int(sttgs.get("POPULARITY_DAYS", 7)) + 1) * 24 * 60 * 60
+# A product crawled this recently is served without crawling again
+PRODUCT_FRESH_TTL = int(sttgs.get("PRODUCT_FRESH_TTL", 6 * 60 * 60))
+# Same as the worker's: a queued refresh holds the product this long at most
+REFRESH_LOCK_TTL = int(sttgs.get("REFRESH_LOCK_TTL", 2 * 60 * 60))
+
+pending = Counter()
+
+
+def record_request(product_id: Optional[str]) -> None:
+    if product_id:
+        pending[product_id] += 1
+
+
+async def flush_popularity() -> None:
+    global pending
+    if not pending:
+        return
+    counts, pending = pending, Counter()
+    key = f"popularity::{datetime.now(timezone.utc).date().isoformat()}"
+    try:
+        await Cache.backend.increment_scores(key, dict(counts), POPULARITY_TTL)
+    except Exception as e:
+        logger.warning(f"Could not record the popularity of {len(counts)} products: {e}")
+
+
+async def flush_popularity_periodically() -> None:
+    while True:
+        await asyncio.sleep(POPULARITY_FLUSH_INTERVAL)
+        await flush_popularity()
+
+
+async def crawl_state(product_id: str) -> Tuple[Optional[dict], Optional[dict]]:
+    """The product's last crawl record and the refresh in progress, in one round trip."""
+    return tuple(await Cache.backend.get_many([f"crawl::{product_id}", f"refreshing::{product_id}"]))
+
+
+async def take_refresh_lock(product_id: str, job_id: str) -> bool:
+    """The same lock the worker's beat run takes; only its holder queues the refresh."""
+    return await Cache.backend.add(f"refreshing::{product_id}", {"job_id": job_id}, REFRESH_LOCK_TTL)
+
+
+def crawl_age(crawl: dict) -> float:
+    refreshed_at = datetime.fromisoformat(crawl["refreshed_at"])
+    return (datetime.now(timezone.utc) - refreshed_at).total_seconds()
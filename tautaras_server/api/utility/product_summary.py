@@ -0,0 +1,306 @@
+"""Per-product review summaries, kept on the product documents.
+
+Ingest folds each batch of newly created reviews into the summary with one
+scripted update per product, so an overview is a single document read no
+matter how many reviews the product has. ``rebuild_summaries`` recomputes
+them from the reviews when the incremental numbers cannot be trusted, e.g.
+after restoring an index or for products ingested before summaries existed.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from fastapi.concurrency import run_in_threadpool
+
+from core.config.env_config import sttgs
+from core.infra.cache.cache_manager import Cache
+from core.infra.elasticstack import index_manager
+from core.infra.elasticstack.elastic import bulk_update_documents, get_client, script_functions
+from core.infra.metrics.metrics import track_call
+
+logger = logging.getLogger(__name__)
+
+PRODUCTS_INDEX = "products"
+SUMMARY_FIELDS = [
+    "product_id",
+    "product_name",
+    "site_name",
+    "review_count",
+    "rating_count",
+    "average_rating",
+    "rating_counts",
+    "newest_review_at",
+    "updated_at",
+]
+
+# Adds one batch to a stored summary. The source never changes, only the
+# params, so Elasticsearch compiles it once.
+SUMMARY_SCRIPT = """
+def s = ctx._source;
+s.product_id = params.product_id;
+s.site_name = params.site_name;
+if (params.product_name != null) { s.product_name = params.product_name; }
+s.review_count = (s.review_count == null ? 0 : s.review_count) + params.review_count;
+s.rating_count = (s.rating_count == null ? 0 : s.rating_count) + params.rating_count;
+s.rating_sum = (s.rating_sum == null ? 0.0 : s.rating_sum) + params.rating_sum;
+s.average_rating = s.rating_count > 0 ? s.rating_sum / s.rating_count : null;
+if (s.rating_counts == null) { s.rating_counts = new HashMap(); }
+for (def entry : params.rating_counts.entrySet()) {
+  def current = s.rating_counts.get(entry.getKey());
+  s.rating_counts.put(entry.getKey(), (current == null ? 0 : current) + entry.getValue());
+}
+if (params.newest_review_at != null
+    && (s.newest_review_at == null || params.newest_review_at.compareTo(s.newest_review_at) > 0)) {
+  s.newest_review_at = params.newest_review_at;
+}
+s.updated_at = params.updated_at;
+"""
+
+# Marks a product whose summary missed a batch; the next ingest naming it recounts it
+REBUILD_KEY = "summary_rebuild"
+SUMMARY_REBUILD_TTL = int(sttgs.get("SUMMARY_REBUILD_TTL", 7 * 24 * 60 * 60))
+
+# Replaces the stored summary fields; a partial doc update would merge the old
+# and new rating_counts instead
+REPLACE_SCRIPT = "ctx._source.putAll(params.summary);"
+
+
+def add_to_summary(summary: dict, params: dict) -> None:
+    """Python version of ``SUMMARY_SCRIPT``, for stores that cannot run painless."""
+    summary.update({k: params[k] for k in ("product_id", "site_name", "updated_at")})
+    if params["product_name"] is not None:
+        summary["product_name"] = params["product_name"]
+    for field in ("review_count", "rating_count", "rating_sum"):
+        summary[field] = (summary.get(field) or 0) + params[field]
+    summary["average_rating"] = summary["rating_sum"] / summary["rating_count"] if summary["rating_count"] else None
+    counts = summary.setdefault("rating_counts", {})
+    for stars, count in params["rating_counts"].items():
+        counts[stars] = counts.get(stars, 0) + count
+    if params["newest_review_at"] and (summary.get("newest_review_at") or "") < params["newest_review_at"]:
+        summary["newest_review_at"] = params["newest_review_at"]
+
+
+def replace_summary(summary: dict, params: dict) -> None:
+    summary.update(params["summary"])
+
+
+script_functions[SUMMARY_SCRIPT] = add_to_summary
+script_functions[REPLACE_SCRIPT] = replace_summary
+
+
+def product_doc_id(site_name: str, product_id: str) -> str:
+    return f"{site_name}:{product_id}"
+
+
+def rating_bucket(rating) -> Optional[str]:
+    """Whole-star bucket for the rating distribution; same as a histogram with interval 1."""
+    try:
+        rating = float(rating)
+    except (TypeError, ValueError):
+        return None
+    return str(int(rating))
+
+
+def as_utc_string(value) -> Optional[str]:
+    """ISO 8601 in UTC, so stored dates compare correctly as strings in the script."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def empty_summary(site_name: str, product_id: str, timestamp: str) -> dict:
+    return {
+        "product_id": product_id,
+        "product_name": None,
+        "site_name": site_name,
+        "review_count": 0,
+        "rating_count": 0,
+        "rating_sum": 0.0,
+        "average_rating": None,
+        "rating_counts": {},
+        "newest_review_at": None,
+        "updated_at": timestamp,
+    }
+
+
+def summarise_batch(reviews: Iterable[dict], timestamp: str) -> Dict[str, dict]:
+    """Summaries of one batch of new reviews, by product document id, in a single pass."""
+    summaries = {}
+    for review in reviews:
+        product_id, site_name = review.get("product_id"), review.get("site_name")
+        if not product_id or not site_name:
+            continue
+        doc_id = product_doc_id(site_name, product_id)
+        summary = summaries.get(doc_id)
+        if summary is None:
+            summary = summaries[doc_id] = empty_summary(site_name, product_id, timestamp)
+        summary["review_count"] += 1
+        if review.get("product_name"):
+            summary["product_name"] = review["product_name"]
+        bucket = rating_bucket(review.get("rating"))
+        if bucket is not None:
+            summary["rating_count"] += 1
+            summary["rating_sum"] += float(review["rating"])
+            summary["rating_counts"][bucket] = summary["rating_counts"].get(bucket, 0) + 1
+        posted_at = as_utc_string(review.get("posted_at"))
+        if posted_at and (summary["newest_review_at"] is None or posted_at > summary["newest_review_at"]):
+            summary["newest_review_at"] = posted_at
+
+    for summary in summaries.values():
+        if summary["rating_count"]:
+            summary["average_rating"] = summary["rating_sum"] / summary["rating_count"]
+    return summaries
+
+
+def summary_update(summary: dict) -> dict:
+    """Bulk update body: add the batch to a stored summary, or store it as the first one."""
+    upsert = summary if summary["product_name"] else {k: v for k, v in summary.items() if k != "product_name"}
+    return {
+        "script": {"source": SUMMARY_SCRIPT, "lang": "painless", "params": summary},
+        "upsert": upsert,
+    }
+
+
+def summary_response(document: dict) -> dict:
+    """Public view of a stored summary; products only seen in suggestions read as empty."""
+    response = {field: document.get(field) for field in SUMMARY_FIELDS}
+    response["review_count"] = response["review_count"] or 0
+    response["rating_count"] = response["rating_count"] or 0
+    response["rating_counts"] = {
+        str(stars): (response["rating_counts"] or {}).get(str(stars), 0) for stars in range(0, 6)
+    }
+    return response
+
+
+def summary_aggregations() -> dict:
+    return {
+        "rating_count": {"value_count": {"field": "rating"}},
+        "rating_sum": {"sum": {"field": "rating"}},
+        "ratings": {"histogram": {"field": "rating", "interval": 1, "min_doc_count": 1}},
+        "newest": {"max": {"field": "posted_at"}},
+        "latest": {
+            "top_hits": {"size": 1, "_source": ["product_name"], "sort": [{"indexed_at": "desc"}]}
+        },
+    }
+
+
+def summary_from_bucket(bucket: dict, timestamp: str) -> Tuple[str, dict]:
+    """Full summary for one composite aggregation bucket of (site_name, product_id)."""
+    site_name, product_id = bucket["key"]["site_name"], bucket["key"]["product_id"]
+    summary = empty_summary(site_name, product_id, timestamp)
+    hits = bucket["latest"]["hits"]["hits"]
+    summary["product_name"] = hits[0]["_source"].get("product_name") if hits else None
+    summary["review_count"] = bucket["doc_count"]
+    summary["rating_count"] = int(bucket["rating_count"]["value"])
+    summary["rating_sum"] = bucket["rating_sum"]["value"]
+    if summary["rating_count"]:
+        summary["average_rating"] = summary["rating_sum"] / summary["rating_count"]
+    summary["rating_counts"] = {
+        str(int(histogram["key"])): histogram["doc_count"] for histogram in bucket["ratings"]["buckets"]
+    }
+    summary["newest_review_at"] = as_utc_string(bucket["newest"].get("value_as_string"))
+    return product_doc_id(site_name, product_id), summary
+
+
+async def rebuild_summaries(
+    site_name: Optional[str] = None, product_id: Optional[str] = None, page_size: int = 500
+) -> Tuple[int, int]:
+    """Recompute summaries from every stored review; returns ``(rebuilt, failed)``.
+
+    Elasticsearch does the counting, a page of products at a time, and the
+    results overwrite the stored summaries. Reviews ingested while a product
+    is being rebuilt can be counted twice or not at all, so run it when
+    ingest is quiet or rebuild that product again afterwards.
+    """
+    es_client = get_client()
+    filters = []
+    if site_name:
+        filters.append({"term": {"site_name": site_name}})
+    if product_id:
+        filters.append({"term": {"product_id": product_id}})
+    composite = {
+        "size": page_size,
+        "sources": [
+            {"site_name": {"terms": {"field": "site_name"}}},
+            {"product_id": {"terms": {"field": "product_id"}}},
+        ],
+    }
+    body = {
+        "size": 0,
+        "query": {"bool": {"filter": filters}},
+        "aggs": {"products": {"composite": composite, "aggs": summary_aggregations()}},
+    }
+
+    rebuilt = failed = 0
+    while True:
+        with track_call("elasticsearch", "search"):
+            response = await run_in_threadpool(es_client.search, index=index_manager.READ_ALIAS, body=body)
+        if response.get("_shards", {}).get("failed"):
+            logger.warning(f"Summary rebuild skipped {response['_shards']['failed']} failed shards")
+        aggregation = response["aggregations"]["products"]
+        timestamp = datetime.now().isoformat()
+        updates: List[Tuple[str, dict]] = []
+        for bucket in aggregation["buckets"]:
+            doc_id, summary = summary_from_bucket(bucket, timestamp)
+            updates.append(
+                (
+                    doc_id,
+                    {
+                        "script": {"source": REPLACE_SCRIPT, "lang": "painless", "params": {"summary": summary}},
+                        "upsert": summary,
+                    },
+                )
+            )
+        failed += len(await bulk_update_documents(PRODUCTS_INDEX, updates))
+        rebuilt += len(updates)
+        logger.info(f"Rebuilt {rebuilt} product summaries")
+        if "after_key" not in aggregation or len(aggregation["buckets"]) < page_size:
+            return rebuilt - failed, failed
+        composite["after"] = aggregation["after_key"]
+
+
+async def repair_summaries(products: Dict[str, Tuple[str, str]], failed: Iterable[str]) -> int:
+    """Recount the summaries of an ingest batch's products that missed a batch.
+
+    ``products`` maps the batch's product documents to ``(site_name,
+    product_id)`` and ``failed`` holds those whose update just failed. A
+    redelivered batch finds its reviews already stored and adds nothing, so
+    failed products are marked in the shared cache and recounted from their
+    stored reviews, now or when a later batch names them. Returns how many
+    are still wrong.
+    """
+    pending = {doc_id for doc_id in failed if doc_id in products}
+    keys = [f"{REBUILD_KEY}::{doc_id}" for doc_id in products]
+    try:
+        if pending:
+            await Cache.backend.set_many(
+                {f"{REBUILD_KEY}::{doc_id}": True for doc_id in pending}, SUMMARY_REBUILD_TTL
+            )
+        marked = await Cache.backend.get_many(keys)
+        pending.update(doc_id for doc_id, mark in zip(products, marked) if mark)
+    except Exception as e:
+        # Without the cache only this batch's failures can be recounted
+        logger.error(f"Error reading the products marked for a summary rebuild: {e}")
+
+    still_wrong = 0
+    for doc_id in pending:
+        site_name, product_id = products[doc_id]
+        try:
+            _, not_rebuilt = await rebuild_summaries(site_name=site_name, product_id=product_id)
+        except Exception as e:
+            logger.error(f"Error rebuilding the summary of '{doc_id}': {e}")
+            not_rebuilt = 1
+        if not_rebuilt:
+            still_wrong += 1
+            continue
+        logger.info(f"Rebuilt the summary of '{doc_id}' after a failed update")
+        try:
+            await Cache.backend.delete(f"{REBUILD_KEY}::{doc_id}")
+        except Exception as e:
+            # Only costs a needless recount with the next batch
+            logger.error(f"Error clearing the summary rebuild mark of '{doc_id}': {e}")
+    return still_wrong
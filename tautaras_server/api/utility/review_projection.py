@@ -0,0 +1,80 @@
+"""Maps review documents from Elasticsearch to API responses.
+
+Search asks Elasticsearch for only the ``_source`` fields a response needs,
+and hits are turned into plain dicts with one precomputed getter per field.
+The result is serialised once with orjson; no Pydantic models are built.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def as_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Public field -> (source fields to fetch, getter on the source document)
+REVIEW_FIELDS: Dict[str, Tuple[Tuple[str, ...], Callable[[dict], Any]]] = {
+    "review_id": (("review_id",), lambda source: source.get("review_id")),
+    "product_id": (("product_id",), lambda source: source.get("product_id")),
+    "product_name": (("product_name",), lambda source: source.get("product_name")),
+    "site_name": (("site_name",), lambda source: source.get("site_name")),
+    # Older documents hold the rating as text
+    "rating": (("rating",), lambda source: as_float(source.get("rating"))),
+    "title": (("title",), lambda source: source.get("title")),
+    "description": (("description",), lambda source: source.get("description")),
+    "reviewer": (("reviewer",), lambda source: source.get("reviewer")),
+    "reviewer_location": (
+        ("reviewer_details.location",),
+        lambda source: (source.get("reviewer_details") or {}).get("location"),
+    ),
+    "posted_at": (("posted_at",), lambda source: source.get("posted_at")),
+    "indexed_at": (("indexed_at",), lambda source: source.get("indexed_at")),
+    "updated_at": (("updated_at",), lambda source: source.get("updated_at")),
+}
+
+# Fields returned when the client does not ask for specific ones
+DEFAULT_REVIEW_FIELDS = (
+    "review_id",
+    "product_name",
+    "site_name",
+    "rating",
+    "title",
+    "description",
+    "reviewer",
+    "reviewer_location",
+    "indexed_at",
+    "updated_at",
+)
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Validate a comma separated ``fields`` parameter; empty means the defaults."""
+    if not fields:
+        return DEFAULT_REVIEW_FIELDS
+    requested = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in requested if field not in REVIEW_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(REVIEW_FIELDS)}"
+        )
+    return requested or DEFAULT_REVIEW_FIELDS
+
+
+def source_includes(fields: Tuple[str, ...]) -> List[str]:
+    return [path for field in fields for path in REVIEW_FIELDS[field][0]]
+
+
+def project_hits(hits: List[dict], fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    getters = [(field, REVIEW_FIELDS[field][1]) for field in fields]
+    return [{field: getter(hit["_source"]) for field, getter in getters} for hit in hits]
+
+
+def project_search_hits(hits: List[dict], fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """Like ``project_hits`` plus the relevance score and highlighted fragments."""
+    reviews = project_hits(hits, fields)
+    for review, hit in zip(reviews, hits):
+        review["score"] = hit.get("_score")
+        review["highlight"] = hit.get("highlight", {})
+    return reviews
@@ -1,15 +1,74 @@
 import logging
-from urllib.parse import urlparse, quote
-import requests
+import re
+from typing import Optional
+from urllib.parse import parse_qs, parse_qsl, quote, urlencode, urlparse, urlunparse
+
+from core.utility.crypto import get_hash
+from core.utility.validation import validate_product_id
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Hostname patterns per platform, kept in step with the worker's platform registry
+PLATFORM_HOSTS = {
+    "flipkart": re.compile(r"^(?:[\w-]+\.)*flipkart\.com$"),
+    "amazon": re.compile(
+        r"^(?:[\w-]+\.)*amazon\."
+        r"(?:com|in|ca|de|fr|it|es|nl|se|pl|sg|ae|sa|eg|co\.uk|co\.jp|com\.au|com\.br|com\.mx|com\.tr|com\.be)$"
+    ),
+}
+
+
+AMAZON_ASIN_PATTERN = re.compile(r"/(?:dp|gp/product|gp/aw/d|product-reviews)/([A-Z0-9]{10})")
+
+
+def flipkart_product_id(url: str) -> Optional[str]:
+    pid = parse_qs(urlparse(url).query).get("pid")
+    return pid[0] if pid else None
+
+
+def amazon_product_id(url: str) -> Optional[str]:
+    match = AMAZON_ASIN_PATTERN.search(urlparse(url).path)
+    return match.group(1) if match else None
+
+
+# Same rules as extract_product_id on the worker's platform classes
+PRODUCT_ID_EXTRACTORS = {
+    "flipkart": flipkart_product_id,
+    "amazon": amazon_product_id,
+}
+
+
+# Query parameters that only say where a click came from
+TRACKING_PARAMS = re.compile(
+    r"^(?:utm_\w+|fbclid|gclid|ref_?|tag|otracker\d*|srno|ssid|qH|iid|affid|affExtParam\d*)$"
+)
+
 
 def sanitize_url(url: str) -> str:
     return quote(url, safe=":/")
 
 
+def canonical_url(url: str) -> str:
+    """One spelling per product page, used to spot repeat submissions."""
+    parsed = urlparse(url.strip())
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(key)
+    )
+    return urlunparse(
+        (
+            parsed.scheme.lower(),
+            parsed.netloc.lower(),
+            parsed.path.rstrip("/") or "/",
+            "",
+            urlencode(query),
+            "",
+        )
+    )
+
+
 def is_safe_scheme(url: str) -> bool:
     # Limit URLs to HTTPS to avoid vulnerabilities associated with other schemes:
     return urlparse(url).scheme in ["https"]
@@ -40,6 +99,8 @@ def check_google_safe_browsing(api_key: str, url: str) -> bool:
         },
     }
     params = {"key": api_key}
+    import requests
+
     response = requests.post(endpoint, json=payload, params=params)
     result = response.json()
     return "matches" not in result
@@ -56,10 +117,43 @@ def is_safe_url(url: str, api_key: str = None) -> bool:
 
 
 def identify_platform(url: str) -> str:
-    if "flipkart.com" in url:
-        return "flipkart"
-    elif "amazon.com" in url:
-        return "amazon"
-    else:
-        logger.error(f"Unsupported platform URL: {url}")
-        raise ValueError("Unsupported platform URL")
+    host = (urlparse(url).hostname or "").lower()
+    for platform, pattern in PLATFORM_HOSTS.items():
+        if pattern.match(host):
+            return platform
+    logger.error(f"Unsupported platform URL: {url}")
+    raise ValueError("Unsupported platform URL")
+
+
+def normalise_product_id(product_id: Optional[str]) -> Optional[str]:
+    """Canonical form stored at ingest and used in lookups."""
+    if not product_id or not product_id.strip():
+        return None
+    return product_id.strip().upper()
+
+
+def extract_product_id(url: str) -> Optional[str]:
+    return normalise_product_id(PRODUCT_ID_EXTRACTORS[identify_platform(url)](url))
+
+
+def validate_site_name(site_name: str) -> str:
+    site_name = site_name.lower()
+    if site_name not in PLATFORM_HOSTS:
+        raise ValueError(f"Unsupported site_name: {site_name}")
+    return site_name
+
+
+def resolve_product_id(product_id: Optional[str], product_url: Optional[str]) -> Optional[str]:
+    """Product filter from an explicit id or, failing that, a product URL."""
+    if product_url:
+        product_id = extract_product_id(product_url)
+        if not product_id:
+            raise ValueError("No product id found in product_url")
+    product_id = normalise_product_id(product_id)
+    if product_id:
+        validate_product_id(product_id)
+    return product_id
+
+
+def job_cache_key(url: str) -> str:
+    return f"task_status::{get_hash(canonical_url(url))}"
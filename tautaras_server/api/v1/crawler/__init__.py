@@ -1,9 +1,15 @@
 from fastapi import APIRouter
+from .batch import batch_router
+from .products import products_router
 from .review import reviews_router
+from .search import search_router
 
 crawler_routers = APIRouter()
 
 crawler_routers.include_router(reviews_router, prefix="/reviews", tags=["reviews"])
+crawler_routers.include_router(search_router, prefix="/reviews", tags=["search"])
+crawler_routers.include_router(batch_router, prefix="/reviews", tags=["reviews"])
+crawler_routers.include_router(products_router, prefix="/reviews", tags=["products"])
 
 
 __all__ = ["crawler_routers"]
@@ -0,0 +1,159 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from collections import Counter
+from datetime import datetime, timezone
+import logging
+import uuid
+
+from core.config.env_config import sttgs
+from core.infra.cache.cache_manager import Cache
+from core.infra.celery.jobs import ACTIVE_STATES, JOB_CACHE_TTL, dispatch_jobs, job_payload, job_states
+from core.models.dto.crawler.reviews import ExtractBatchRequest
+from core.utility.tracing import current_traceparent, start_span
+from api.utility.admission import admit_jobs, check_rate_limit, count_admitted, too_busy
+from api.utility.review_utility import extract_product_id, identify_platform, is_safe_url, job_cache_key
+
+batch_router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+# How long a batch can be looked up by its id
+BATCH_TTL = int(sttgs.get("BATCH_TTL", 24 * 60 * 60))
+
+READY_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+
+@batch_router.post("/extract/batch")
+async def extract_reviews_batch(request: ExtractBatchRequest, http_request: Request):
+    """Submit many product URLs at once; each distinct page gets one job.
+
+    Pages that do not fit in the queue yet come back as ``deferred``, with a
+    ``Retry-After`` for submitting them again.
+    """
+    try:
+        # Canonical URL key -> (URL to crawl, platform), in submission order
+        pages = {}
+        url_keys = {}
+        rejected = {}
+        with start_span("batch.validate", urls=len(request.urls)):
+            for url in request.urls:
+                if url in url_keys or url in rejected:
+                    continue
+                if not is_safe_url(url):
+                    rejected[url] = "URL is not safe"
+                    continue
+                try:
+                    platform = identify_platform(url)
+                except ValueError as e:
+                    rejected[url] = str(e)
+                    continue
+                key = job_cache_key(url)
+                url_keys[url] = key
+                pages.setdefault(key, (url, platform))
+
+        keys = list(pages)
+        # One MGET for the cached job ids, one result backend MGET for their states
+        cached = dict(zip(keys, await Cache.backend.get_many(keys)))
+        known = [(key, task_id) for key, task_id in cached.items() if task_id]
+        states = await run_in_threadpool(job_states, [task_id for _, task_id in known])
+        job_ids = {
+            key: task_id for (key, task_id), state in zip(known, states) if state in ACTIVE_STATES
+        }
+
+        new_keys = [key for key in keys if key not in job_ids]
+        admission = await admit_jobs(len(new_keys))
+        if new_keys and not admission["admitted"] and not job_ids:
+            raise too_busy(
+                429, "Too many jobs queued", admission["retry_after"], admission["estimated_start"]
+            )
+        # Each admitted page costs what one extract request does; deferred ones
+        # are charged when they are submitted again
+        await check_rate_limit(http_request, max(1, admission["admitted"]))
+        deferred = set(new_keys[admission["admitted"] :])
+        new_keys = new_keys[: admission["admitted"]]
+        payloads = [job_payload(*pages[key]) for key in new_keys]
+        with start_span("batch.dispatch", jobs=len(payloads)):
+            new_ids = await run_in_threadpool(dispatch_jobs, payloads, current_traceparent())
+        count_admitted(len(new_ids))
+        submitted = dict(zip(new_keys, new_ids))
+        await Cache.backend.set_many(submitted, JOB_CACHE_TTL)
+        job_ids.update(submitted)
+
+        jobs = {
+            url: {
+                "job_id": job_ids.get(key),
+                "status": "deferred" if key in deferred else "submitted" if key in submitted else "existing",
+                "product_id": extract_product_id(url),
+            }
+            for url, key in url_keys.items()
+        }
+        batch_id = str(uuid.uuid4())
+        await Cache.backend.set(
+            f"batch::{batch_id}",
+            {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "jobs": {url: job["job_id"] for url, job in jobs.items() if job["job_id"]},
+            },
+            BATCH_TTL,
+        )
+        logger.info(
+            f"Batch {batch_id}: {len(submitted)} jobs submitted, "
+            f"{len(job_ids) - len(submitted)} already running, {len(deferred)} deferred, "
+            f"{len(rejected)} URLs rejected"
+        )
+
+        return ORJSONResponse(
+            {
+                "success": True,
+                "batch_id": batch_id,
+                "submitted": len(submitted),
+                "existing": len(job_ids) - len(submitted),
+                "deferred": len(deferred),
+                "rejected": len(rejected),
+                "estimated_start": admission["estimated_start"],
+                "retry_after": admission["retry_after"] or None,
+                "jobs": jobs,
+                "errors": rejected,
+            },
+            headers={"Retry-After": str(admission["retry_after"])} if deferred else None,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error submitting batch: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@batch_router.get("/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    try:
+        batch = await Cache.backend.get(f"batch::{batch_id}")
+    except Exception as e:
+        logger.error(f"Error reading batch {batch_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found or expired")
+
+    urls = list(batch["jobs"])
+    job_ids = [batch["jobs"][url] for url in urls]
+    try:
+        # Duplicate URLs of one page share a job; look each job up once
+        unique_ids = list(dict.fromkeys(job_ids))
+        states = dict(zip(unique_ids, await run_in_threadpool(job_states, unique_ids)))
+    except Exception as e:
+        logger.error(f"Error getting job states for batch {batch_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    counts = Counter(states.values())
+    return ORJSONResponse(
+        {
+            "batch_id": batch_id,
+            "created_at": batch["created_at"],
+            "total_jobs": len(states),
+            "done": all(state in READY_STATES for state in states.values()),
+            "states": dict(counts),
+            "jobs": {url: {"job_id": job_id, "status": states[job_id]} for url, job_id in zip(urls, job_ids)},
+        }
+    )
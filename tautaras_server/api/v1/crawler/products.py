@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+import logging
+
+from core.infra.elasticstack.elastic import read_documents
+from api.utility import hot_products
+from api.utility.product_summary import PRODUCTS_INDEX, product_doc_id, summary_response
+from api.utility.review_utility import PLATFORM_HOSTS, normalise_product_id, validate_site_name
+from core.utility.validation import validate_product_id
+
+products_router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+
+@products_router.get("/products/{product_id}/summary")
+async def get_product_summary(
+    product_id: str,
+    site_name: Optional[str] = Query(None, description="Only this site; all sites when omitted"),
+):
+    try:
+        product_id = normalise_product_id(product_id)
+        validate_product_id(product_id or "")
+        hot_products.record_request(product_id)
+        sites = [validate_site_name(site_name)] if site_name else list(PLATFORM_HOSTS)
+
+        # The summary is kept up to date at ingest, so this is one read whatever the review count
+        documents = await read_documents(PRODUCTS_INDEX, [product_doc_id(site, product_id) for site in sites])
+        if documents is None:
+            raise HTTPException(status_code=500, detail="Error retrieving product summary")
+        summaries = [summary_response(document) for document in documents if document]
+        if not summaries:
+            raise HTTPException(status_code=404, detail="Product not found")
+
+        return ORJSONResponse({"status": "Success", "product_id": product_id, "summaries": summaries})
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid product summary parameters: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error retrieving product summary: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
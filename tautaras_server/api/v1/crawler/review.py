@@ -1,37 +1,69 @@
-from fastapi import APIRouter, HTTPException, Request, Query
+from fastapi import APIRouter, Header, HTTPException, Request, Query
+from fastapi.responses import ORJSONResponse
 from typing import Any, Dict
 import json
-from celery.result import AsyncResult
-from celery.exceptions import CeleryError
 from datetime import datetime
-import hashlib
 import logging
-import dateparser
+import uuid
 from typing import Optional
 
-from core.models.dto.crawler.reviews import ReviewDTO, PaginatedResponse
-from core.infra.celery.celery_app import celery_app
+from fastapi.concurrency import run_in_threadpool
+from tautaras_common.review_identity import compute_review_id, is_valid_review_id
+
+from core.infra.celery.jobs import ACTIVE_STATES, JOB_CACHE_TTL, job_info, job_payload, job_states, send_job
 from core.models.dto.crawler.reviews import ExtractReviewRequest, JobStatusResponse
-from core.utility.crypto import get_hash
+from core.utility import profiling
+from core.utility.tracing import current_traceparent, start_span
 from core.utility.validation import validate_str_params, validate_token_id
+from core.config.env_config import sttgs
 from core.infra.cache.cache_manager import Cache
-from api.utility.review_utility import identify_platform, is_safe_url
+from core.infra.cache.memory_backend import MemoryBackend
+from core.infra.metrics.metrics import INGEST_BATCH_SIZE, INGESTED_REVIEWS
+from api.utility import hot_products
+from api.utility.admission import admit_jobs, check_rate_limit, count_admitted, too_busy
+from api.utility.product_summary import (
+    PRODUCTS_INDEX,
+    product_doc_id,
+    repair_summaries,
+    summarise_batch,
+    summary_update,
+)
+from api.utility.review_projection import parse_fields, project_hits, source_includes
+from api.utility.review_utility import (
+    extract_product_id,
+    identify_platform,
+    is_safe_url,
+    job_cache_key,
+    normalise_product_id,
+    resolve_product_id,
+    validate_site_name,
+)
 from core.infra.elasticstack.elastic import (
-    create_document,
-    document_exists,
+    bulk_create_documents,
+    bulk_update_documents,
+    existing_ids,
     search_documents,
 )
+from core.infra.elasticstack import index_manager
+from core.infra.elasticstack.query_builder import build_review_query
 
 reviews_router = APIRouter()
 
 logger = logging.getLogger(__name__)
 
+# Every page of a crawl names the same product; write it to the suggest index once in a while
+known_products = MemoryBackend(max_entries=10000)
+PRODUCT_REFRESH_TTL = int(sttgs.get("PRODUCT_REFRESH_TTL", 60 * 60))
+
 
 @reviews_router.post("/extract")
-async def extract_reviews(request: ExtractReviewRequest) -> Dict[str, Any]:
+async def extract_reviews(
+    request: ExtractReviewRequest, http_request: Request, x_profile: Optional[str] = Header(None)
+) -> Dict[str, Any]:
     response: Dict[str, Any] = {}
 
     try:
+        await check_rate_limit(http_request)
         url = request.url
         logger.info(f"Received request to extract reviews from URL: {url}")
         is_safe = is_safe_url(url)
@@ -44,19 +76,41 @@ async def extract_reviews(request: ExtractReviewRequest) -> Dict[str, Any]:
         platform = identify_platform(url)
         logger.info(f"Platform identified as '{platform}' for URL: {url}")
 
-        encoded_url = get_hash(url)
-        logger.debug(f"Encoded URL hash generated: {encoded_url}")
+        product_id = extract_product_id(url)
+        # Lets the client list this product's reviews with GET /reviews?product_id=
+        response["product_id"] = product_id
+
+        # Stored reviews are served at once: a recent crawl is reused, an older
+        # one is refreshed in the background while the client reads what is there
+        crawl = refreshing = None
+        if product_id:
+            hot_products.record_request(product_id)
+            crawl, refreshing = await hot_products.crawl_state(product_id)
+        if crawl:
+            response["refreshed_at"] = crawl["refreshed_at"]
+            if hot_products.crawl_age(crawl) < hot_products.PRODUCT_FRESH_TTL:
+                response["success"] = True
+                response["message"] = "Reviews are up to date."
+                response["job_id"] = crawl["job_id"]
+                return response
+            response["stale"] = True
+            if refreshing and (await run_in_threadpool(job_states, [refreshing["job_id"]]))[0] in ACTIVE_STATES:
+                response["success"] = True
+                response["message"] = "Reviews are being refreshed."
+                response["job_id"] = refreshing["job_id"]
+                return response
+
+        cache_key = job_cache_key(url)
 
         # Check if the job is already present
-        task_id = await Cache.backend.get(f"task_status::{encoded_url}")
+        task_id = await Cache.backend.get(cache_key)
         if task_id:
-            job_status = await get_job_status(task_id)
-            logger.info(
-                f"Found existing task ID: {task_id} with status: {job_status.get('status')}"
-            )
+            state = (await run_in_threadpool(job_states, [task_id]))[0]
+            logger.info(f"Found existing task ID: {task_id} with status: {state}")
 
-            if job_status.get("status") in ("PROGRESS", "STARTED"):
+            if state in ACTIVE_STATES:
                 response["message"] = "Job is already present."
+                response["job_id"] = task_id
                 return response
             else:
                 logger.info(
@@ -64,30 +118,55 @@ async def extract_reviews(request: ExtractReviewRequest) -> Dict[str, Any]:
                 )
 
         # data for message queue
-        data = {
-            "url": url,
-            "callback_url": "http://0.0.0.0:80/api/v1/reviews/ingest",
-            "platform": platform,
-        }
-
+        data = job_payload(
+            url,
+            platform,
+            profile=bool(profiling.PROFILE_TOKEN) and x_profile == profiling.PROFILE_TOKEN,
+        )
+        if crawl:
+            # Only the reviews added since the last crawl
+            data["incremental"] = True
         logger.debug(f"Data prepared for task: {data}")
 
+        admission = await admit_jobs(1)
+        if not admission["admitted"] and crawl:
+            # The stored reviews are still there to read; refresh them later
+            response["success"] = True
+            response["message"] = "Reviews are stale; the queue is too long to refresh them now."
+            response["job_id"] = crawl["job_id"]
+            response["retry_after"] = admission["retry_after"]
+            return response
+        if not admission["admitted"]:
+            raise too_busy(
+                429, "Too many jobs queued", admission["retry_after"], admission["estimated_start"]
+            )
+
+        task_id = str(uuid.uuid4())
+        if crawl and not await hot_products.take_refresh_lock(product_id, task_id):
+            # A beat run or another request took the product first and crawls it
+            _, refreshing = await hot_products.crawl_state(product_id)
+            response["success"] = True
+            response["message"] = "Reviews are being refreshed."
+            response["job_id"] = (refreshing or crawl)["job_id"]
+            return response
+
         # Submit a new extraction job
-        res = celery_app.send_task(
-            "tasks.extract_reviews_from_page",
-            kwargs={"data": data},  # Pass the data as a dictionary
-        )
-        task_id = res.task_id
+        await run_in_threadpool(send_job, data, current_traceparent(), task_id)
+        count_admitted(1)
         logger.info(f"Task submitted to Celery with ID: {task_id}")
 
         # Cache the task ID
-        await Cache.backend.set(f"task_status::{encoded_url}", task_id, 60 * 60)
-        logger.info(f"Task ID cached with key 'task_status::{encoded_url}' for 1 hour")
+        await Cache.backend.set(cache_key, task_id, JOB_CACHE_TTL)
+        logger.info(f"Task ID cached with key '{cache_key}' for {JOB_CACHE_TTL} seconds")
 
         # Success response
         response["success"] = True
         response["message"] = "Job has been submitted successfully."
         response["job_id"] = task_id
+        response["estimated_start"] = admission["estimated_start"]
+
+    except HTTPException:
+        raise
 
     except ValueError as e:
         logger.error(f"ValueError encountered: {e}")
@@ -112,66 +191,165 @@ async def get_job_status(job_id: str) -> JobStatusResponse:
 
     try:
         # Get the job status
-        result = AsyncResult(job_id)
-        print(f"Job ID: {job_id}, Status: {result.state}")
+        state, info = job_info(job_id)
+        logger.debug(f"Job ID: {job_id}, Status: {state}")
 
-        response.status = result.state
-        response.progress = result.info.get("progress") if result.info else "unknown"
+        response.status = state
+        response.progress = info.get("progress") if info else "unknown"
 
-    except (CeleryError, Exception) as e:
-        print(f"Error getting job status for ID: {job_id} - {e}")
+    except Exception as e:
+        logger.error(f"Error getting job status for ID: {job_id} - {e}")
         response.status = "error"
         response.error_message = str(e)
 
     return response
 
 
+def prepare_reviews(reviews_data, timestamp: str):
+    # dateparser takes ~200ms to import; it is loaded on first ingest or by preload
+    import dateparser
+
+    documents = []
+    for review in reviews_data:
+        # The worker sends a canonical review_id; only compute it for older payloads
+        review_id = review.get("review_id")
+        if not is_valid_review_id(review_id):
+            review_id = compute_review_id(review)
+
+        review["review_id"] = review_id
+        review["product_id"] = normalise_product_id(review.get("product_id"))
+        review["indexed_at"] = timestamp
+        review["updated_at"] = timestamp
+        # Platforms without a date send None; it is stored as undated
+        posted_at = review.get("posted_at")
+        if isinstance(posted_at, str):
+            posted_at = dateparser.parse(
+                posted_at, settings={"TIMEZONE": "UTC", "RETURN_AS_TIMEZONE_AWARE": True}
+            )
+        else:
+            posted_at = None
+        review["posted_at"] = posted_at
+        documents.append((review_id, review))
+    return documents
+
+
+def batch_products(documents) -> dict:
+    """Product document id -> (site_name, product_id) for the products a batch names."""
+    products = {}
+    for _, review in documents:
+        product_id, site_name = review.get("product_id"), review.get("site_name")
+        if product_id and site_name:
+            products[product_doc_id(site_name, product_id)] = (site_name, product_id)
+    return products
+
+
+async def product_updates(documents, created_ids, timestamp: str):
+    """One update per product: new reviews are added to its summary, and products
+    with nothing new are refreshed in the suggest index once in a while."""
+    created_ids = set(created_ids)
+    summaries = summarise_batch(
+        (review for doc_id, review in documents if doc_id in created_ids), timestamp
+    )
+    updates = {doc_id: summary_update(summary) for doc_id, summary in summaries.items()}
+    for _, review in documents:
+        product_id, site_name = review.get("product_id"), review.get("site_name")
+        if not product_id or not site_name or not review.get("product_name"):
+            continue
+        doc_id = product_doc_id(site_name, product_id)
+        if doc_id in updates or await known_products.get(doc_id):
+            continue
+        updates[doc_id] = {
+            "doc": {
+                "product_id": product_id,
+                "product_name": review["product_name"],
+                "site_name": site_name,
+                "updated_at": timestamp,
+            },
+            "doc_as_upsert": True,
+        }
+    return list(updates.items())
+
+
+async def store_reviews(reviews_data: list) -> dict:
+    """Store a page of crawled reviews and fold the new ones into the product summaries."""
+    timestamp = datetime.now().isoformat()
+    with start_span("ingest.prepare", reviews=len(reviews_data)):
+        documents = prepare_reviews(reviews_data, timestamp)
+
+    # Reviews stored in older partitions are skipped here; ones in the
+    # current partition are rejected by Elasticsearch as conflicts
+    seen = set()
+    # Only partitions whose posted_at range can hold the batch; an undated
+    # review could be in any of them. A refresh of the cached ranges reads
+    # the mappings from Elasticsearch
+    dates = [review["posted_at"] for _, review in documents]
+    bounds = (min(dates), max(dates)) if dates and None not in dates else ()
+    older = await run_in_threadpool(index_manager.older_partitions, *bounds)
+    if older:
+        try:
+            seen = await existing_ids(",".join(older), [doc_id for doc_id, _ in documents])
+        except Exception:
+            # Counted as errors, as a failed bulk write is, so the page is delivered again
+            INGESTED_REVIEWS.labels("error").inc(len(documents))
+            return {"created": 0, "duplicates": 0, "errors": len(documents), "summary_errors": 0}
+    new_documents = [document for document in documents if document[0] not in seen]
+    created_ids, duplicates, errors = await bulk_create_documents(
+        index_manager.WRITE_ALIAS, new_documents, require_alias=True
+    )
+    created = len(created_ids)
+    duplicates += len(documents) - len(new_documents)
+    # Only reviews stored by this call count towards the summaries
+    products = await product_updates(documents, created_ids, timestamp)
+    failed_products = set(await bulk_update_documents(PRODUCTS_INDEX, products))
+    for doc_id, _ in products:
+        if doc_id not in failed_products:
+            await known_products.set(doc_id, True, PRODUCT_REFRESH_TTL)
+    # A summary that missed these reviews is recounted; until then ingest fails
+    summary_errors = await repair_summaries(batch_products(documents), failed_products)
+    INGEST_BATCH_SIZE.observe(len(documents))
+    INGESTED_REVIEWS.labels("created").inc(created)
+    INGESTED_REVIEWS.labels("duplicate").inc(duplicates)
+    INGESTED_REVIEWS.labels("error").inc(errors)
+    logger.info(
+        f"Ingested {created} reviews, skipped {duplicates} existing, {errors} errors, "
+        f"{summary_errors} product summaries not updated"
+    )
+    return {
+        "created": created,
+        "duplicates": duplicates,
+        "errors": errors,
+        "summary_errors": summary_errors,
+    }
+
+
 @reviews_router.post("/ingest")
 async def ingest_reviews(request: Request):
     try:
         reviews_data = await request.json()
-
-        for review in reviews_data:
-            review_hash_input = (
-                str(review.get("title", ""))
-                + str(review.get("description", ""))
-                + str(review.get("rating", ""))
-                + str(review.get("reviewer", ""))
-                + str(review.get("reviewer_details", {}).get("location", ""))
-                + str(review.get("product_name", ""))
-                + str(review.get("site_name", ""))
+        stored = await store_reviews(reviews_data)
+        if stored["errors"]:
+            # The worker posts the page again; reviews stored this time come back as duplicates
+            raise HTTPException(
+                status_code=503,
+                detail=f"Could not store {stored['errors']} of {len(reviews_data)} reviews",
             )
-
-            # review_id is a hash of the review data to ensure uniqueness and avoid duplicates
-            review_id = hashlib.sha256(review_hash_input.encode()).hexdigest()
-
-            timestamp = datetime.now().isoformat()
-            review["review_id"] = review_id
-            review["indexed_at"] = timestamp
-            review["updated_at"] = timestamp
-            posted_at = dateparser.parse(
-                review.get("posted_at"),
-                settings={"TIMEZONE": "UTC", "RETURN_AS_TIMEZONE_AWARE": True},
+        if stored["summary_errors"]:
+            # The redelivery recounts them
+            raise HTTPException(
+                status_code=503,
+                detail=f"Could not update {stored['summary_errors']} product summaries",
             )
-            review["posted_at"] = posted_at
-
-            # Check if the review already exists
-            exists = await document_exists("reviews", review_id)
-            if exists:
-                logger.info(
-                    f"Review with ID '{review_id}' already exists. Skipping insertion."
-                )
-                continue
-
-            # Insert the review into Elasticsearch if it doesn't exist
-            _, error = await create_document("reviews", review_id, review)
-            if error:
-                logger.error(f"Error inserting review with ID '{review_id}': {error}")
-                continue
-            logger.info(f"Review with ID '{review_id}' successfully ingested.")
 
-        return {"status": "Success", "message": "Reviews ingested successfully"}
+        # The worker stops an incremental crawl at the first page with nothing new
+        return {
+            "status": "Success",
+            "message": "Reviews ingested successfully",
+            "created": stored["created"],
+            "duplicates": stored["duplicates"],
+        }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error ingesting reviews: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -181,76 +359,80 @@ async def ingest_reviews(request: Request):
 async def get_reviews(
     product_name: Optional[str] = Query(None),
     site_name: Optional[str] = Query(None),
-    rating: Optional[str] = Query(None),
+    rating: Optional[float] = Query(None, ge=0, le=5, description="Exact rating"),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    max_rating: Optional[float] = Query(None, ge=0, le=5),
+    posted_after: Optional[datetime] = Query(None, description="ISO 8601 date or datetime"),
+    posted_before: Optional[datetime] = Query(None, description="ISO 8601 date or datetime"),
     reviewer: Optional[str] = Query(None),
     token_id: Optional[str] = Query(None),
-    page: int = Query(1, description="Page number"),
-    size: int = Query(10, description="Number of results per page"),
+    product_id: Optional[str] = Query(None, description="Site product id, e.g. Flipkart pid or Amazon ASIN"),
+    product_url: Optional[str] = Query(None, description="Product URL to take the product id from"),
+    fuzzy: bool = Query(False, description="Typo tolerant, scored matching of product_name and reviewer"),
+    page: int = Query(1, ge=1, description="Page number"),
+    size: int = Query(10, ge=1, le=100, description="Number of results per page"),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated review fields to return, e.g. review_id,rating,title",
+    ),
 ):
     try:
         from_ = (page - 1) * size
-
-        query = {"query": {"bool": {"must": []}}}
+        review_fields = parse_fields(fields)
 
         if token_id:
             validate_token_id(token_id)
-            query["query"]["bool"]["must"].append({"match": {"token_id": token_id}})
         if site_name:
-            validate_str_params(product_name)
-            query["query"]["bool"]["must"].append({"match": {"site_name": site_name}})
-        if rating:
-            if not isinstance(rating, (int, float)):
-                raise ValueError("Invalid rating format")
-            query["query"]["bool"]["must"].append({"match": {"rating": rating}})
+            site_name = validate_site_name(site_name)
+        product_id = resolve_product_id(product_id, product_url)
+        hot_products.record_request(product_id)
         if reviewer:
-            validate_str_params(reviewer)
-            query["query"]["bool"]["must"].append({"match": {"reviewer": reviewer}})
+            validate_str_params(reviewer, "reviewer")
         if product_name:
             validate_str_params(product_name)
-            query["query"]["bool"]["must"].append(
-                {
-                    "match": {
-                        "product_name": {"query": product_name, "fuzziness": "AUTO"}
-                    }
-                }
-            )
 
-        results, total_hits = await search_documents(
-            "reviews", query, from_=from_, size=size
+        query = build_review_query(
+            token_id=token_id,
+            product_id=product_id,
+            site_name=site_name,
+            product_name=product_name,
+            reviewer=reviewer,
+            rating=rating,
+            min_rating=min_rating,
+            max_rating=max_rating,
+            posted_after=posted_after,
+            posted_before=posted_before,
+            fuzzy=fuzzy,
         )
+        # Only fetch the stored fields the response is built from
+        query["_source"] = source_includes(review_fields)
+
+        indices = index_manager.READ_ALIAS
+        if posted_after or posted_before:
+            # May reload the partition ranges from Elasticsearch
+            indices = await run_in_threadpool(index_manager.read_indices, posted_after, posted_before)
+        results, total_hits = await search_documents(indices, query, from_=from_, size=size)
 
         if results is None:
             raise HTTPException(status_code=500, detail="Error retrieving reviews")
 
-        formatted_results = [
-            ReviewDTO(
-                review_id=result["_source"]["review_id"],
-                product_name=result["_source"]["product_name"],
-                site_name=result["_source"]["site_name"],
-                rating=result["_source"]["rating"],
-                title=result["_source"]["title"],
-                description=result["_source"]["description"],
-                reviewer=result["_source"]["reviewer"],
-                reviewer_location=result["_source"]
-                .get("reviewer_details", {})
-                .get("location"),
-                indexed_at=result["_source"]["indexed_at"],
-                updated_at=result["_source"]["updated_at"],
-            )
-            for result in results
-        ]
-
-        response = PaginatedResponse(
-            status="Success",
-            page=page,
-            page_size=size,
-            total_results=total_hits,
-            total_pages=(total_hits + size - 1) // size,
-            reviews=formatted_results,
+        # Same shape as PaginatedResponse, serialised once by orjson
+        return ORJSONResponse(
+            {
+                "status": "Success",
+                "page": page,
+                "page_size": size,
+                "total_results": total_hits,
+                "total_pages": (total_hits + size - 1) // size,
+                "reviews": project_hits(results, review_fields),
+            }
         )
 
-        return response.dict()
-
+    except HTTPException:
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid review search parameters: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error retrieving reviews: {e}")
         raise HTTPException(status_code=500, detail=str(e))
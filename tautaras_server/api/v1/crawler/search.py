@@ -0,0 +1,119 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+import logging
+
+from core.config.env_config import sttgs
+from core.infra.cache.memory_backend import MemoryBackend
+from core.infra.elasticstack import index_manager
+from core.infra.elasticstack.elastic import search_documents
+from core.infra.elasticstack.query_builder import build_product_suggest, build_review_search
+from api.utility import hot_products
+from api.utility.review_projection import parse_fields, project_search_hits, source_includes
+from api.utility.review_utility import resolve_product_id, validate_site_name
+
+search_router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+# Elasticsearch's index.max_result_window; deeper pages need search_after
+MAX_RESULT_WINDOW = 10000
+
+# Popular prefixes are answered from this process without calling Elasticsearch
+suggest_cache = MemoryBackend(max_entries=int(sttgs.get("SUGGEST_CACHE_SIZE", 10000)))
+SUGGEST_CACHE_TTL = int(sttgs.get("SUGGEST_CACHE_TTL", 300))
+
+
+@search_router.get("/search")
+async def search_reviews(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in review titles and descriptions"),
+    site_name: Optional[str] = Query(None),
+    product_id: Optional[str] = Query(None),
+    product_url: Optional[str] = Query(None),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    max_rating: Optional[float] = Query(None, ge=0, le=5),
+    page: int = Query(1, ge=1, description="Page number"),
+    size: int = Query(10, ge=1, le=100, description="Number of results per page"),
+    fields: Optional[str] = Query(None, description="Comma separated review fields to return"),
+):
+    try:
+        from_ = (page - 1) * size
+        if from_ + size > MAX_RESULT_WINDOW:
+            raise ValueError(f"Only the first {MAX_RESULT_WINDOW} results can be paged through")
+        review_fields = parse_fields(fields)
+        if site_name:
+            site_name = validate_site_name(site_name)
+        product_id = resolve_product_id(product_id, product_url)
+        hot_products.record_request(product_id)
+
+        query = build_review_search(
+            q.strip(),
+            product_id=product_id,
+            site_name=site_name,
+            min_rating=min_rating,
+            max_rating=max_rating,
+        )
+        query["_source"] = source_includes(review_fields)
+
+        results, total_hits = await search_documents(index_manager.READ_ALIAS, query, from_=from_, size=size)
+        if results is None:
+            raise HTTPException(status_code=500, detail="Error searching reviews")
+
+        # Elasticsearch counts at most 10000 matches unless asked otherwise
+        return ORJSONResponse(
+            {
+                "status": "Success",
+                "query": q,
+                "page": page,
+                "page_size": size,
+                "total_results": total_hits,
+                "total_pages": (total_hits + size - 1) // size,
+                "reviews": project_search_hits(results, review_fields),
+            }
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid review search parameters: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching reviews: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@search_router.get("/suggest")
+async def suggest_products(
+    prefix: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    site_name: Optional[str] = Query(None),
+    size: int = Query(5, ge=1, le=10, description="Number of suggestions"),
+):
+    try:
+        if site_name:
+            site_name = validate_site_name(site_name)
+        # "Iphone  1" and "iphone 1" share one cache entry
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            raise ValueError("prefix must not be blank")
+
+        cache_key = f"suggest::{site_name or '*'}:{size}:{prefix}"
+        suggestions = await suggest_cache.get(cache_key)
+        if suggestions is None:
+            results, _ = await search_documents(
+                "products", build_product_suggest(prefix, site_name), size=size
+            )
+            if results is None:
+                raise HTTPException(status_code=500, detail="Error retrieving suggestions")
+            suggestions = [hit["_source"] for hit in results]
+            await suggest_cache.set(cache_key, suggestions, SUGGEST_CACHE_TTL)
+
+        return ORJSONResponse({"status": "Success", "prefix": prefix, "suggestions": suggestions})
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid suggest parameters: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error retrieving suggestions: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,8 +1,11 @@
 from fastapi import APIRouter
 from .health_check import health_router
+from .metrics import metrics_router
+from .profiling import profiling_router
 
 monitoring_routers = APIRouter()
 
 monitoring_routers.include_router(health_router, prefix="/health", tags=["monitoring"])
+monitoring_routers.include_router(profiling_router, prefix="/profiling", tags=["monitoring"])
 
-__all__ = ["monitoring_routers"]
+__all__ = ["monitoring_routers", "metrics_router"]
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+
+from core.infra.metrics.metrics import render_metrics
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
@@ -0,0 +1,45 @@
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Header
+
+from core.exceptions.base import ForbiddenException, NotFoundException
+from core.models.dto.monitoring.profiling import ProfilingStatus, ProfilingToggle
+from core.utility import profiling
+
+profiling_router = APIRouter()
+
+
+def check_access(token: Optional[str]) -> None:
+    if not profiling.PROFILE_DIR:
+        raise NotFoundException("Profiling is not configured")
+    if not profiling.PROFILE_TOKEN or token != profiling.PROFILE_TOKEN:
+        raise ForbiddenException("Invalid profiling token")
+
+
+async def current_status() -> ProfilingStatus:
+    # Straight from the cache; another process may have changed it
+    remaining = await profiling.enabled_until(fresh=True) - time.time()
+    return ProfilingStatus(
+        enabled=remaining > 0,
+        remaining_seconds=max(0, int(remaining)),
+        sample_rate=profiling.PROFILE_SAMPLE_RATE,
+        profile_dir=profiling.PROFILE_DIR,
+    )
+
+
+@profiling_router.get("/")
+async def get_profiling(x_profile: Optional[str] = Header(None)) -> ProfilingStatus:
+    check_access(x_profile)
+    return await current_status()
+
+
+@profiling_router.post("/")
+async def toggle_profiling(toggle: ProfilingToggle, x_profile: Optional[str] = Header(None)) -> ProfilingStatus:
+    """Profile every request served by any server process for a while."""
+    check_access(x_profile)
+    if toggle.enabled:
+        await profiling.enable(toggle.duration_seconds)
+    else:
+        await profiling.disable()
+    return await current_status()
@@ -1,28 +1,17 @@
-# logging_config.py
-import logging
-import logging.config
+"""Server logging: the shared queued logging, configured from ``.env`` (see "Logging" in the readme).
+
+Also routes uvicorn's loggers through the queue.
+"""
+from tautaras_common import log_config
+
+from core.config.env_config import sttgs
 
 
 def setup_logging():
-    logging.config.dictConfig(
-        {
-            "version": 1,
-            "disable_existing_loggers": False,
-            "formatters": {
-                "standard": {
-                    "format": "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-                },
-            },
-            "handlers": {
-                "console": {
-                    "level": "INFO",
-                    "class": "logging.StreamHandler",
-                    "formatter": "standard",
-                },
-            },
-            "root": {
-                "handlers": ["console"],
-                "level": "INFO",
-            },
-        }
+    log_config.setup_logging(
+        level=sttgs.get("LOG_LEVEL", "INFO"),
+        log_format=sttgs.get("LOG_FORMAT", "json"),
+        rate_limit=int(sttgs.get("LOG_RATE_LIMIT", 20)),
+        rate_interval=float(sttgs.get("LOG_RATE_INTERVAL", 1)),
+        routed_loggers=("uvicorn", "uvicorn.error", "uvicorn.access"),
     )
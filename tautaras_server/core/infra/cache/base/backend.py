@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Dict, List
+import math
+import time
 
 class BaseBackend(ABC):
     @abstractmethod
@@ -12,7 +14,68 @@ class BaseBackend(ABC):
         """Store a value with the given key and time-to-live (TTL)."""
         pass
 
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete a single key, if present."""
+        pass
+
     @abstractmethod
     async def delete_startswith(self, prefix: str) -> None:
         """Delete all keys that start with the given prefix."""
         pass
+
+    async def add(self, key: str, response: Any, ttl: int = 60) -> bool:
+        """Store the value only if the key is absent; returns whether it was stored.
+
+        This default reads and writes separately; backends shared by several
+        processes should do it atomically.
+        """
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, response, ttl)
+        return True
+
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        """Values for several keys, None where missing; backends may batch the lookups."""
+        return [await self.get(key) for key in keys]
+
+    async def set_many(self, items: Dict[str, Any], ttl: int = 60) -> None:
+        """Store several values with the same TTL; backends may batch the writes."""
+        for key, value in items.items():
+            await self.set(key, value, ttl)
+
+    async def increment_scores(self, key: str, scores: Dict[str, float], ttl: int = 60) -> None:
+        """Add to the members' scores in a ranking, creating it with the given TTL."""
+        ranking = await self.get(key) or {}
+        for member, amount in scores.items():
+            ranking[member] = ranking.get(member, 0) + amount
+        await self.set(key, ranking, ttl)
+
+    async def take_tokens(self, key: str, rate: float, burst: int, cost: int = 1) -> float:
+        """Token bucket refilled at ``rate`` per second up to ``burst``.
+
+        Takes ``cost`` tokens and returns 0, or returns the seconds until that
+        many will be available and takes nothing. A cost above ``burst`` needs
+        a full bucket and leaves it in debt. This default reads and writes
+        the bucket separately; backends shared by several processes should
+        update it atomically.
+        """
+        now = time.time()
+        state = await self.get(key) or {"tokens": burst, "at": now}
+        tokens = min(burst, state["tokens"] + max(0.0, now - state["at"]) * rate)
+        needed = min(cost, burst)
+        wait = 0.0
+        if tokens >= needed:
+            tokens -= cost
+        else:
+            wait = (needed - tokens) / rate
+        await self.set(key, {"tokens": tokens, "at": now}, math.ceil((burst - tokens) / rate) + 1)
+        return wait
+
+    async def connect(self, connections: int = 1) -> None:
+        """Open connections ahead of the first request."""
+        pass
+
+    async def close(self) -> None:
+        """Release connections on shutdown."""
+        pass
@@ -0,0 +1,37 @@
+from collections import OrderedDict
+from typing import Any
+import time
+
+from core.infra.cache.base.backend import BaseBackend
+
+
+class MemoryBackend(BaseBackend):
+    """Per-process LRU cache with expiry, for hot keys that need no network round trip."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        # key -> (expires at, value), least recently used first
+        self.entries = OrderedDict()
+
+    async def get(self, key: str) -> Any:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, response: Any, ttl: int = 60) -> None:
+        self.entries[key] = (time.monotonic() + ttl, response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    async def delete_startswith(self, prefix: str) -> None:
+        for key in [key for key in self.entries if key.startswith(f"{prefix}::")]:
+            del self.entries[key]
@@ -1,15 +1,60 @@
 from core.infra.cache.base.backend import BaseBackend
-from typing import Any
+from typing import Any, Dict, List, Optional
+import asyncio
+import time
 import redis.asyncio as aioredis
 import ujson
 import pickle
 
 from core.config.env_config import sttgs
+from core.infra.metrics.metrics import track_call
+
+
+# Refill and take in one step, so concurrent requests from every server process
+# share the bucket without races. A cost above the burst takes a full bucket and
+# leaves it in debt. Returns the wait as a string; Redis would truncate a Lua
+# number to an integer.
+TOKEN_BUCKET_SCRIPT = """
+local rate, burst, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(state[1]) or burst
+local at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - at) * rate)
+local wait = 0
+local needed = math.min(cost, burst)
+if tokens >= needed then tokens = tokens - cost else wait = (needed - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return tostring(wait)
+"""
+
 
-redis = aioredis.from_url(url=sttgs.get("REDIS_HOST"))
 class RedisBackend(BaseBackend):
-    async def get(self, key: str) -> Any:
-        result = await redis.get(key)
+    def __init__(self, url: Optional[str] = None):
+        # No sockets are opened here; the pool fills on connect() or first use
+        self.redis = aioredis.from_url(
+            url=url or sttgs.get("REDIS_HOST"),
+            max_connections=int(sttgs.get("REDIS_MAX_CONNECTIONS", 50)),
+        )
+        # Sent by EVALSHA, loaded on first use
+        self.token_bucket = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def connect(self, connections: int = 1) -> None:
+        # Concurrent pings each check out their own pooled connection
+        with track_call("redis", "connect"):
+            await asyncio.gather(*(self.redis.ping() for _ in range(connections)))
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+    @staticmethod
+    def encode(response: Any):
+        if isinstance(response, dict):
+            return ujson.dumps(response)
+        return pickle.dumps(response)
+
+    @staticmethod
+    def decode(result: Any) -> Any:
         if not result:
             return None
         try:
@@ -17,13 +62,58 @@ class RedisBackend(BaseBackend):
         except UnicodeDecodeError:
             return pickle.loads(result)
 
+    async def get(self, key: str) -> Any:
+        with track_call("redis", "get"):
+            result = await self.redis.get(key)
+        return self.decode(result)
+
     async def set(self, key: str, response: Any, ttl: int = 60) -> None:
-        if isinstance(response, dict):
-            response = ujson.dumps(response)
-        elif isinstance(response, object):
-            response = pickle.dumps(response)
-        await redis.set(name=key, value=response, ex=ttl)
+        with track_call("redis", "set"):
+            await self.redis.set(name=key, value=self.encode(response), ex=ttl)
+
+    async def add(self, key: str, response: Any, ttl: int = 60) -> bool:
+        with track_call("redis", "set_nx"):
+            return bool(await self.redis.set(name=key, value=self.encode(response), ex=ttl, nx=True))
+
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        if not keys:
+            return []
+        # One MGET round trip however many keys there are
+        with track_call("redis", "mget"):
+            results = await self.redis.mget(keys)
+        return [self.decode(result) for result in results]
+
+    async def set_many(self, items: Dict[str, Any], ttl: int = 60) -> None:
+        if not items:
+            return
+        # MSET cannot set expiries; a non-transactional pipeline sends every SET in one write
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, response in items.items():
+                pipe.set(name=key, value=self.encode(response), ex=ttl)
+            with track_call("redis", "pipeline_set"):
+                await pipe.execute()
+
+    async def increment_scores(self, key: str, scores: Dict[str, float], ttl: int = 60) -> None:
+        if not scores:
+            return
+        # A sorted set, so readers can rank members without loading them all
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for member, amount in scores.items():
+                pipe.zincrby(key, amount, member)
+            pipe.expire(key, ttl)
+            with track_call("redis", "pipeline_zincrby"):
+                await pipe.execute()
+
+    async def take_tokens(self, key: str, rate: float, burst: int, cost: int = 1) -> float:
+        with track_call("redis", "token_bucket"):
+            wait = await self.token_bucket(keys=[key], args=[rate, burst, cost, time.time()])
+        return float(wait)
+
+    async def delete(self, key: str) -> None:
+        with track_call("redis", "delete"):
+            await self.redis.delete(key)
 
     async def delete_startswith(self, prefix: str) -> None:
-        async for key in redis.scan_iter(f"{prefix}::*"):
-            await redis.delete(key)
+        with track_call("redis", "delete_startswith"):
+            async for key in self.redis.scan_iter(f"{prefix}::*"):
+                await self.redis.delete(key)
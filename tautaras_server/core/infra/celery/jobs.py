@@ -0,0 +1,126 @@
+from typing import Any, List, Optional, Tuple
+
+from core.config.env_config import sttgs
+from core.infra.celery.celery_app import celery_app
+
+EXTRACT_TASK = "tasks.extract_reviews_from_page"
+CALLBACK_URL = "http://0.0.0.0:80/api/v1/reviews/ingest"
+
+# Queue the workers consume; CELERY_QUEUE on the worker names the same one
+CELERY_QUEUE = sttgs.get("CELERY_QUEUE", "celery")
+
+# A job in one of these states is queued or running; submitting its URL again reuses it
+ACTIVE_STATES = {"PENDING", "RECEIVED", "STARTED", "PROGRESS", "RETRY"}
+
+# How long a submitted URL maps to its job
+JOB_CACHE_TTL = int(sttgs.get("JOB_CACHE_TTL", 60 * 60))
+
+# celery | inprocess; inprocess runs extractions on threads of the server process (embedded mode)
+TASK_EXECUTOR = sttgs.get("TASK_EXECUTOR", "celery").lower()
+
+executor = None
+
+
+def get_executor():
+    global executor
+    if executor is None:
+        from core.infra.embedded.executor import InProcessExecutor
+
+        executor = InProcessExecutor()
+    return executor
+
+
+def job_payload(url: str, platform: str, profile: bool = False) -> dict:
+    data = {"url": url, "callback_url": CALLBACK_URL, "platform": platform}
+    if profile:
+        # Profile the crawl as well as this request
+        data["profile"] = True
+    return data
+
+
+def send_job(data: dict, traceparent: Optional[str] = None, job_id: Optional[str] = None) -> str:
+    """Publish one extraction task, under ``job_id`` if given; returns its id."""
+    if TASK_EXECUTOR == "inprocess":
+        return get_executor().submit(data, job_id)
+    # Carries the trace into the worker and back through the callback
+    return celery_app.send_task(
+        EXTRACT_TASK, kwargs={"data": data}, task_id=job_id, headers={"traceparent": traceparent}
+    ).id
+
+
+def dispatch_jobs(payloads: List[dict], traceparent: Optional[str] = None) -> List[str]:
+    """Queue many extraction tasks over one pooled producer; returns their ids.
+
+    Every job is its own message on ``CELERY_QUEUE``, queued by the time this
+    returns, so workers and the queue depth see each one straight away.
+    """
+    if TASK_EXECUTOR == "inprocess":
+        return [get_executor().submit(data) for data in payloads]
+    with celery_app.producer_or_acquire() as producer:
+        return [
+            celery_app.send_task(
+                EXTRACT_TASK,
+                kwargs={"data": data},
+                headers={"traceparent": traceparent},
+                producer=producer,
+                # Celery would otherwise saferepr every payload for the message headers
+                argsrepr="()",
+                kwargsrepr=f"{{'url': {data['url']!r}}}",
+            ).id
+            for data in payloads
+        ]
+
+
+def job_states(task_ids: List[str]) -> List[str]:
+    """Celery states for many tasks, read from the result backend in one batch when it can."""
+    if not task_ids:
+        return []
+    if TASK_EXECUTOR == "inprocess":
+        return [get_executor().state(task_id)[0] for task_id in task_ids]
+    backend = celery_app.backend
+    if hasattr(backend, "mget"):
+        # Key-value backends (Redis among them) answer every task in one MGET
+        keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+        values = backend.mget(keys)
+        if hasattr(values, "items"):
+            # Some backends answer with a mapping of the keys they found
+            values = [values.get(key) for key in keys]
+        return [backend.decode_result(value)["status"] if value else "PENDING" for value in values]
+
+    from celery.result import AsyncResult
+
+    return [AsyncResult(task_id, app=celery_app).state for task_id in task_ids]
+
+
+def job_info(task_id: str) -> Tuple[str, Any]:
+    """State of one task and the meta it reported, e.g. ``{"progress": ...}``."""
+    if TASK_EXECUTOR == "inprocess":
+        return get_executor().state(task_id)
+
+    from celery.result import AsyncResult
+
+    result = AsyncResult(task_id, app=celery_app)
+    return result.state, result.info
+
+
+def queue_depth() -> Tuple[int, int]:
+    """Messages waiting in the task queue and consumers attached, from a passive declare."""
+    if TASK_EXECUTOR == "inprocess":
+        # The pool is the only consumer
+        return get_executor().waiting, 1
+    with celery_app.connection_for_read() as connection:
+        _, depth, consumers = connection.default_channel.queue_declare(queue=CELERY_QUEUE, passive=True)
+    return depth, consumers
+
+
+def worker_concurrency(workers: int, timeout: float = 1.0) -> Optional[int]:
+    """Pool processes across the workers, by remote inspection; None if none answer.
+
+    ``workers`` lets the call return as soon as that many have replied.
+    """
+    if TASK_EXECUTOR == "inprocess":
+        return get_executor().workers
+    stats = celery_app.control.inspect(timeout=timeout, limit=workers or None).stats()
+    if not stats:
+        return None
+    return sum(node.get("pool", {}).get("max-concurrency", 0) for node in stats.values())
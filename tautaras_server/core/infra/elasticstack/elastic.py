@@ -1,26 +1,49 @@
-from elasticsearch import Elasticsearch, NotFoundError
-from typing import Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 import logging
 
+from fastapi.concurrency import run_in_threadpool
+
 from core.config.env_config import sttgs
+from core.infra.metrics.metrics import track_call
+
+if TYPE_CHECKING:
+    from elasticsearch import Elasticsearch
 
 client = None
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+
+# elasticsearch | sqlite; sqlite keeps everything in one local file (see core/infra/embedded)
+STORAGE_BACKEND = sttgs.get("STORAGE_BACKEND", "elasticsearch").lower()
+SQLITE_PATH = sttgs.get("SQLITE_PATH", "tautaras.db")
+
+# Python equivalents of the painless scripts the server sends, by script source,
+# called with (ctx._source, params) by stores that cannot run painless
+script_functions: Dict[str, Callable[[dict, dict], None]] = {}
 
 
-def get_client() -> Elasticsearch:
+def get_client() -> "Elasticsearch":
     global client
+    if not client and STORAGE_BACKEND == "sqlite":
+        from core.infra.embedded.sqlite_store import SqliteStore
+
+        client = SqliteStore(SQLITE_PATH)
+        logger.info(f"Using the embedded SQLite store at '{SQLITE_PATH}'.")
     if not client:
         logger.info("Attempting to connect to Elasticsearch...")
         try:
+            # The client package is heavy; import it with the first connection
+            from elasticsearch import Elasticsearch
+
             client = Elasticsearch(
                 hosts=sttgs.get("ES_HOST"),
                 basic_auth=(sttgs.get("ES_USER"), sttgs.get("ES_PASS")),
                 ca_certs=False,
                 verify_certs=False,
                 ssl_show_warn=False,
+                connections_per_node=int(sttgs.get("ES_CONNECTIONS_PER_NODE", 10)),
             )
 
             if not client.ping():
@@ -36,10 +59,51 @@ def get_client() -> Elasticsearch:
     return client
 
 
+def warm_up(connections: int = 1) -> bool:
+    """Connect and open pooled connections so the first request does not pay for it."""
+    es_client = get_client()
+    if not es_client:
+        return False
+    # Parallel pings each hold their own connection, filling the pool
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        list(pool.map(lambda _: es_client.ping(), range(connections)))
+    return True
+
+
+def ensure_index(index_name: str, mappings: dict) -> bool:
+    """Create the index with explicit mappings, or add fields missing from an existing one."""
+    es_client = get_client()
+    if not es_client:
+        return False
+    try:
+        with track_call("elasticsearch", "ensure_index"):
+            if not es_client.indices.exists(index=index_name):
+                es_client.indices.create(index=index_name, mappings=mappings)
+                logger.info(f"Created index '{index_name}' with explicit mappings.")
+            else:
+                # New fields can be added to a live index; changed ones are rejected
+                es_client.indices.put_mapping(index=index_name, properties=mappings["properties"])
+        return True
+    except Exception as e:
+        # Another server process may have created it first
+        if "resource_already_exists_exception" in str(e):
+            return True
+        logger.error(f"Error creating index '{index_name}': {e}")
+        return False
+
+
+def close_client() -> None:
+    global client
+    if client:
+        client.close()
+        client = None
+
+
 async def create_document(index_name: str, doc_id: str, document: dict):
     try:
         es_client = get_client()
-        response = es_client.index(index=index_name, id=doc_id, body=document)
+        with track_call("elasticsearch", "index"):
+            response = await run_in_threadpool(es_client.index, index=index_name, id=doc_id, body=document)
         logger.info(f"Document created in index '{index_name}' with ID '{doc_id}'.")
         return response, None
     except Exception as e:
@@ -49,10 +113,115 @@ async def create_document(index_name: str, doc_id: str, document: dict):
         return None, e
 
 
+async def bulk_create_documents(
+    index_name: str, documents: List[Tuple[str, dict]], require_alias: bool = False
+):
+    """Create documents in one bulk call, skipping ids that already exist.
+
+    Returns ``(created_ids, duplicates, errors)``. Existing ids come back from
+    Elasticsearch as 409 conflicts, so no separate existence check is needed
+    within the target index. ``require_alias`` stops a missing alias from
+    being auto-created as an index.
+    """
+    if not documents:
+        return [], 0, 0
+    operations = []
+    for doc_id, document in documents:
+        operations.append({"create": {"_index": index_name, "_id": doc_id}})
+        operations.append(document)
+
+    try:
+        es_client = get_client()
+        with track_call("elasticsearch", "bulk"):
+            response = await run_in_threadpool(
+                es_client.bulk, operations=operations, require_alias=require_alias
+            )
+    except Exception as e:
+        logger.error(f"Error in bulk create on index '{index_name}': {e}")
+        return [], 0, len(documents)
+
+    created_ids = []
+    duplicates = errors = 0
+    error_types = Counter()
+    failed_ids = []
+    for item in response["items"]:
+        status = item["create"]["status"]
+        if status in (200, 201):
+            created_ids.append(item["create"]["_id"])
+        elif status == 409:
+            duplicates += 1
+        else:
+            errors += 1
+            error_types[(item["create"].get("error") or {}).get("type", str(status))] += 1
+            failed_ids.append(item["create"].get("_id"))
+
+    if errors:
+        # One line per batch; a bad mapping would otherwise log every document
+        logger.error(
+            f"Failed to create {errors} documents in index '{index_name}': "
+            f"{dict(error_types)}, first ids: {failed_ids[:5]}"
+        )
+    return created_ids, duplicates, errors
+
+
+async def bulk_update_documents(index_name: str, updates: List[Tuple[str, dict]]) -> List[str]:
+    """Apply update bodies (partial docs or scripts, with upserts) in one bulk call.
+
+    Returns the ids of the failed updates. Concurrent updates of one document
+    are retried by Elasticsearch instead of failing with a version conflict.
+    """
+    if not updates:
+        return []
+    operations = []
+    for doc_id, body in updates:
+        operations.append({"update": {"_index": index_name, "_id": doc_id, "retry_on_conflict": 3}})
+        operations.append(body)
+
+    try:
+        es_client = get_client()
+        with track_call("elasticsearch", "bulk_update"):
+            response = await run_in_threadpool(es_client.bulk, operations=operations)
+    except Exception as e:
+        logger.error(f"Error in bulk update on index '{index_name}': {e}")
+        return [doc_id for doc_id, _ in updates]
+
+    failed = [item["update"] for item in response["items"] if item["update"]["status"] >= 300]
+    if failed:
+        error_types = Counter((item.get("error") or {}).get("type", str(item["status"])) for item in failed)
+        logger.error(
+            f"Failed to update {len(failed)} documents in index '{index_name}': {dict(error_types)}"
+        )
+    return [item["_id"] for item in failed]
+
+
+async def existing_ids(index_name: str, ids: List[str]) -> set:
+    """The subset of ``ids`` already stored in ``index_name``, in one search.
+
+    Raises when the search fails; treating every id as new would store
+    duplicates of the ones in other indices without any sign of it.
+    """
+    if not ids:
+        return set()
+    try:
+        es_client = get_client()
+        with track_call("elasticsearch", "existing_ids"):
+            response = await run_in_threadpool(
+                es_client.search,
+                index=index_name,
+                body={"query": {"ids": {"values": ids}}, "_source": False},
+                size=len(ids),
+            )
+    except Exception as e:
+        logger.error(f"Error checking existing ids in '{index_name}': {e}")
+        raise
+    return {hit["_id"] for hit in response["hits"]["hits"]}
+
+
 async def read_document(index_name: str, doc_id: str):
     try:
         es_client = get_client()
-        response = es_client.get(index=index_name, id=doc_id)
+        with track_call("elasticsearch", "get"):
+            response = await run_in_threadpool(es_client.get, index=index_name, id=doc_id)
         logger.info(f"Document read from index '{index_name}' with ID '{doc_id}'.")
         return response["_source"]
     except Exception as e:
@@ -65,7 +234,8 @@ async def read_document(index_name: str, doc_id: str):
 def update_document(index_name: str, doc_id: str, new_data: dict):
     try:
         es_client = get_client()
-        response = es_client.update(index=index_name, id=doc_id, body={"doc": new_data})
+        with track_call("elasticsearch", "update"):
+            response = es_client.update(index=index_name, id=doc_id, body={"doc": new_data})
         logger.info(f"Document updated in index '{index_name}' with ID '{doc_id}'.")
         return response
     except Exception as e:
@@ -78,7 +248,8 @@ def update_document(index_name: str, doc_id: str, new_data: dict):
 def delete_document(index_name: str, doc_id: str):
     try:
         es_client = get_client()
-        response = es_client.delete(index=index_name, id=doc_id)
+        with track_call("elasticsearch", "delete"):
+            response = es_client.delete(index=index_name, id=doc_id)
         logger.info(f"Document deleted from index '{index_name}' with ID '{doc_id}'.")
         return response
     except Exception as e:
@@ -88,10 +259,25 @@ def delete_document(index_name: str, doc_id: str):
         return None
 
 
+async def read_documents(index_name: str, doc_ids: List[str]) -> Optional[List[Optional[dict]]]:
+    """Sources for several ids in one call, None where a document is missing."""
+    try:
+        es_client = get_client()
+        with track_call("elasticsearch", "mget"):
+            response = await run_in_threadpool(es_client.mget, index=index_name, ids=doc_ids)
+        return [doc["_source"] if doc.get("found") else None for doc in response["docs"]]
+    except Exception as e:
+        logger.error(f"Error reading documents from index '{index_name}': {e}")
+        return None
+
+
 async def document_exists(index_name: str, doc_id: str):
+    from elasticsearch import NotFoundError
+
     es_client = get_client()
     try:
-        es_client.get(index=index_name, id=doc_id)
+        with track_call("elasticsearch", "exists"):
+            await run_in_threadpool(es_client.get, index=index_name, id=doc_id)
         return True
     except NotFoundError:
         return False
@@ -105,13 +291,16 @@ async def search_documents(
 ):
     try:
         es_client = get_client()
-        response = es_client.search(
-            index=index_name, body=query, from_=from_, size=size
-        )
-        logger.info(
+        with track_call("elasticsearch", "search"):
+            response = await run_in_threadpool(
+                es_client.search, index=index_name, body=query, from_=from_, size=size
+            )
+        logger.debug(
             f"Enhanced search executed on index '{index_name}' with query '{query}'."
         )
-        return response["hits"]["hits"], response["hits"]["total"]["value"]
+        # No total comes back when the query sets track_total_hits to false
+        total = response["hits"].get("total") or {"value": 0}
+        return response["hits"]["hits"], total["value"]
     except Exception as e:
         logger.error(f"Error in enhanced search on index '{index_name}': {e}")
         return None, 0
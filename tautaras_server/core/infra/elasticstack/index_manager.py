@@ -0,0 +1,276 @@
+"""Time-partitioned review indices.
+
+Reviews are written through the ``reviews-write`` alias to the newest
+partition (``reviews-<date>-<n>``) and read through ``reviews-read``, which
+every partition joins via the index template. Maintenance rolls the write
+alias over to a fresh partition once the current one is old or large enough,
+then seals the partitions left behind: writes are blocked, the ``posted_at``
+range they hold is stored in the index ``_meta`` and they are force-merged to
+one segment. Each partition is sealed once, so maintenance only ever works on
+the newest data. Date-range reads use the stored ranges to search only the
+partitions that can match.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import logging
+import time
+
+from core.config.env_config import sttgs
+from core.infra.elasticstack.elastic import get_client
+from core.infra.elasticstack.mappings import REVIEW_MAPPINGS
+from core.infra.metrics.metrics import track_call
+
+WRITE_ALIAS = "reviews-write"
+READ_ALIAS = "reviews-read"
+TEMPLATE_NAME = "reviews"
+PARTITION_PATTERN = "reviews-*"
+# Date math, so each rollover names the new partition after the day it starts
+FIRST_PARTITION = "<reviews-{now/d}-000001>"
+# The single index used before partitioning; it is read along with the partitions
+LEGACY_INDEX = "reviews"
+
+PARTITION_CACHE_TTL = int(sttgs.get("REVIEWS_PARTITION_CACHE_TTL", 60))
+# Relative dates ("3 months ago") are parsed against the crawl day, so the same
+# review's posted_at can move this far between crawls
+DEDUP_DATE_SLACK = timedelta(days=int(sttgs.get("REVIEWS_DEDUP_DATE_SLACK_DAYS", 31)))
+
+logger = logging.getLogger(__name__)
+
+partitions_cache = None
+partitions_loaded_at = 0.0
+
+
+def rollover_conditions() -> dict:
+    conditions = {
+        "max_age": sttgs.get("REVIEWS_ROLLOVER_MAX_AGE", "30d"),
+        "max_primary_shard_size": sttgs.get("REVIEWS_ROLLOVER_MAX_SIZE", "25gb"),
+    }
+    max_docs = int(sttgs.get("REVIEWS_ROLLOVER_MAX_DOCS", 0))
+    if max_docs:
+        conditions["max_docs"] = max_docs
+    return conditions
+
+
+def already_exists(error: Exception) -> bool:
+    return "resource_already_exists_exception" in str(error)
+
+
+def bootstrap() -> bool:
+    """Install the template and the first partition; safe to run from every process."""
+    es_client = get_client()
+    if not es_client:
+        return False
+    try:
+        with track_call("elasticsearch", "put_index_template"):
+            es_client.indices.put_index_template(
+                name=TEMPLATE_NAME,
+                index_patterns=[PARTITION_PATTERN],
+                priority=100,
+                template={
+                    "settings": {"number_of_shards": int(sttgs.get("REVIEWS_SHARDS", 1))},
+                    "mappings": REVIEW_MAPPINGS,
+                    "aliases": {READ_ALIAS: {}},
+                },
+            )
+        if not es_client.indices.exists_alias(name=WRITE_ALIAS):
+            try:
+                with track_call("elasticsearch", "create_index"):
+                    es_client.indices.create(
+                        index=FIRST_PARTITION,
+                        aliases={WRITE_ALIAS: {"is_write_index": True}},
+                    )
+                logger.info(f"Created the first review partition behind '{WRITE_ALIAS}'")
+            except Exception as e:
+                # Another server process got there first
+                if not already_exists(e):
+                    raise
+        if es_client.indices.exists(index=LEGACY_INDEX) and not es_client.indices.exists_alias(
+            name=READ_ALIAS, index=LEGACY_INDEX
+        ):
+            es_client.indices.put_alias(index=LEGACY_INDEX, name=READ_ALIAS)
+            logger.info(f"Added the legacy '{LEGACY_INDEX}' index to '{READ_ALIAS}'")
+        return True
+    except Exception as e:
+        logger.error(f"Error bootstrapping review partitions: {e}")
+        return False
+
+
+def write_index() -> Optional[str]:
+    es_client = get_client()
+    aliases = es_client.indices.get_alias(name=WRITE_ALIAS)
+    for index, body in aliases.items():
+        if body["aliases"][WRITE_ALIAS].get("is_write_index", len(aliases) == 1):
+            return index
+    return None
+
+
+def rollover(dry_run: bool = False) -> Optional[str]:
+    """Start a new partition if the current one meets a condition; returns the old one."""
+    es_client = get_client()
+    with track_call("elasticsearch", "rollover"):
+        response = es_client.indices.rollover(
+            alias=WRITE_ALIAS, conditions=rollover_conditions(), dry_run=dry_run
+        )
+    met = [condition for condition, hit in response.get("conditions", {}).items() if hit]
+    if not response.get("rolled_over"):
+        if met and dry_run:
+            logger.info(f"Would roll '{response['old_index']}' over: {', '.join(met)}")
+        return None
+    logger.info(
+        f"Rolled '{WRITE_ALIAS}' over from '{response['old_index']}' to "
+        f"'{response['new_index']}': {', '.join(met)}"
+    )
+    return response["old_index"]
+
+
+def posted_at_bounds(index: str):
+    es_client = get_client()
+    response = es_client.search(
+        index=index,
+        body={
+            "size": 0,
+            "aggs": {
+                "oldest": {"min": {"field": "posted_at"}},
+                "newest": {"max": {"field": "posted_at"}},
+            },
+        },
+    )
+    aggregations = response["aggregations"]
+    return (
+        aggregations["oldest"].get("value_as_string"),
+        aggregations["newest"].get("value_as_string"),
+    )
+
+
+def seal(index: str) -> None:
+    """Make a partition that no longer takes writes read-only, record its range and merge it."""
+    es_client = get_client()
+    with track_call("elasticsearch", "add_block"):
+        es_client.indices.add_block(index=index, block="write")
+    if es_client.indices.exists_alias(name=WRITE_ALIAS, index=index):
+        es_client.indices.delete_alias(index=index, name=WRITE_ALIAS)
+
+    oldest, newest = posted_at_bounds(index)
+    with track_call("elasticsearch", "put_mapping"):
+        es_client.indices.put_mapping(
+            index=index,
+            meta={"sealed": True, "posted_at_min": oldest, "posted_at_max": newest},
+        )
+    # One segment per shard: smaller, faster to search, and never merged again
+    with track_call("elasticsearch", "forcemerge"):
+        es_client.options(request_timeout=6 * 60 * 60).indices.forcemerge(
+            index=index, max_num_segments=1
+        )
+    logger.info(f"Sealed partition '{index}' (posted_at {oldest} to {newest})")
+
+
+def unsealed_partitions() -> List[str]:
+    """Partitions behind the read alias that are no longer written to and not sealed yet."""
+    return [
+        partition["index"]
+        for partition in load_partitions()
+        if not partition["sealed"] and not partition["current"]
+    ]
+
+
+def maintain(dry_run: bool = False) -> dict:
+    """Roll over if due, then seal every partition left behind."""
+    if not get_client().indices.exists_alias(name=WRITE_ALIAS):
+        logger.info(f"'{WRITE_ALIAS}' does not exist yet; nothing to maintain")
+        return {"rolled_over": None, "sealed": [], "dry_run": dry_run}
+    old_index = rollover(dry_run=dry_run)
+    to_seal = unsealed_partitions()
+    if not dry_run:
+        for index in to_seal:
+            seal(index)
+        invalidate_partitions()
+    return {"rolled_over": old_index, "sealed": to_seal, "dry_run": dry_run}
+
+
+def as_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def load_partitions() -> List[dict]:
+    es_client = get_client()
+    with track_call("elasticsearch", "get_mapping"):
+        mappings = es_client.indices.get_mapping(index=READ_ALIAS)
+    current = write_index()
+    partitions = []
+    for index, body in sorted(mappings.items()):
+        meta = body["mappings"].get("_meta") or {}
+        partitions.append(
+            {
+                "index": index,
+                "current": index == current,
+                "sealed": bool(meta.get("sealed")),
+                "oldest": as_datetime(meta.get("posted_at_min")),
+                "newest": as_datetime(meta.get("posted_at_max")),
+            }
+        )
+    return partitions
+
+
+def cached_partitions() -> Optional[List[dict]]:
+    global partitions_cache, partitions_loaded_at
+    if partitions_cache is None or time.monotonic() - partitions_loaded_at > PARTITION_CACHE_TTL:
+        try:
+            partitions_cache = load_partitions()
+            partitions_loaded_at = time.monotonic()
+        except Exception as e:
+            logger.error(f"Error loading review partitions: {e}")
+            return partitions_cache
+    return partitions_cache
+
+
+def invalidate_partitions() -> None:
+    global partitions_cache
+    partitions_cache = None
+
+
+def older_partitions(oldest: Optional[datetime] = None, newest: Optional[datetime] = None) -> List[str]:
+    """Partitions other than the one taking writes that can hold reviews posted in a range.
+
+    Sealed partitions whose stored range, widened by ``DEDUP_DATE_SLACK``,
+    misses ``oldest`` to ``newest`` are left out; without a range every
+    older partition is returned.
+    """
+    after = before = None
+    if oldest and newest:
+        after, before = oldest - DEDUP_DATE_SLACK, newest + DEDUP_DATE_SLACK
+    return [
+        partition["index"]
+        for partition in cached_partitions() or []
+        if not partition["current"] and (after is None or overlaps(partition, after, before))
+    ]
+
+
+def overlaps(partition: dict, after: Optional[datetime], before: Optional[datetime]) -> bool:
+    if not partition["sealed"]:
+        # Still taking writes, or not sealed yet, so its range is unknown
+        return True
+    if partition["oldest"] is None:
+        # Sealed without any dated review
+        return False
+    if after and partition["newest"] < after:
+        return False
+    if before and partition["oldest"] > before:
+        return False
+    return True
+
+
+def read_indices(posted_after: Optional[datetime] = None, posted_before: Optional[datetime] = None) -> str:
+    """Index list for a search; a ``posted_at`` range skips sealed partitions outside it."""
+    if posted_after is None and posted_before is None:
+        return READ_ALIAS
+    partitions = cached_partitions()
+    if not partitions:
+        return READ_ALIAS
+    after, before = (
+        value.replace(tzinfo=timezone.utc) if value and value.tzinfo is None else value
+        for value in (posted_after, posted_before)
+    )
+    return ",".join(p["index"] for p in partitions if overlaps(p, after, before)) or READ_ALIAS
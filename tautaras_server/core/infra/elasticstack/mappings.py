@@ -0,0 +1,49 @@
+# Explicit mappings so exact filters hit keyword fields and ranges hit numbers and dates
+REVIEW_MAPPINGS = {
+    "dynamic": True,
+    "properties": {
+        "review_id": {"type": "keyword"},
+        "token_id": {"type": "keyword"},
+        "product_id": {"type": "keyword"},
+        "product_name": {
+            "type": "text",
+            "fields": {"keyword": {"type": "keyword", "ignore_above": 512}},
+        },
+        "site_name": {"type": "keyword"},
+        "rating": {"type": "float"},
+        # Stored offsets let the highlighter skip re-analysing long texts
+        "title": {"type": "text", "index_options": "offsets"},
+        "description": {"type": "text", "index_options": "offsets"},
+        "reviewer": {
+            "type": "text",
+            "fields": {"keyword": {"type": "keyword", "ignore_above": 256}},
+        },
+        "reviewer_details": {
+            "properties": {"location": {"type": "keyword", "ignore_above": 256}},
+        },
+        "posted_at": {"type": "date"},
+        "indexed_at": {"type": "date"},
+        "updated_at": {"type": "date"},
+    },
+}
+
+# One document per (site, product), upserted at ingest; backs as-you-type suggestions
+# and holds the product's review summary
+PRODUCT_MAPPINGS = {
+    "dynamic": False,
+    "properties": {
+        "product_id": {"type": "keyword"},
+        "site_name": {"type": "keyword"},
+        # Indexes edge n-gram subfields so prefixes are matched from the index, not expanded per query
+        "product_name": {"type": "search_as_you_type", "max_shingle_size": 3},
+        "updated_at": {"type": "date"},
+        # Review summary, kept up to date at ingest
+        "review_count": {"type": "long"},
+        "rating_count": {"type": "long"},
+        "rating_sum": {"type": "double"},
+        "average_rating": {"type": "float"},
+        # Reviews per whole star, {"1": n, ..., "5": n}; only read back, never searched
+        "rating_counts": {"type": "object", "enabled": False},
+        "newest_review_at": {"type": "date"},
+    },
+}
@@ -0,0 +1,147 @@
+"""Builds review and product search bodies.
+
+Exact predicates (ids, site, rating and date ranges, non-fuzzy text) go in the
+``bool.filter`` context: they are not scored and Elasticsearch caches them per
+segment, so repeated listing queries stay cheap. Only fuzzy matching, full-text
+search and product prefixes add scored ``must`` clauses.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+class QueryBuilder:
+    def __init__(self):
+        self.filters: List[dict] = []
+        self.must: List[dict] = []
+
+    def term(self, field: str, value: Any) -> "QueryBuilder":
+        if value is not None:
+            self.filters.append({"term": {field: value}})
+        return self
+
+    def range(self, field: str, gte: Any = None, lte: Any = None) -> "QueryBuilder":
+        bounds = {}
+        if gte is not None:
+            bounds["gte"] = gte.isoformat() if isinstance(gte, datetime) else gte
+        if lte is not None:
+            bounds["lte"] = lte.isoformat() if isinstance(lte, datetime) else lte
+        if bounds:
+            self.filters.append({"range": {field: bounds}})
+        return self
+
+    def text(self, field: str, value: Optional[str], fuzzy: bool = False) -> "QueryBuilder":
+        if not value:
+            return self
+        if fuzzy:
+            # Scored and typo tolerant, so it stays out of the filter cache
+            self.must.append({"match": {field: {"query": value, "fuzziness": "AUTO"}}})
+        else:
+            self.filters.append({"match": {field: {"query": value, "operator": "and"}}})
+        return self
+
+    def search(self, fields: List[str], value: Optional[str]) -> "QueryBuilder":
+        if value:
+            # Ranked by relevance; most, not all, of a longer query's words must match
+            self.must.append(
+                {
+                    "multi_match": {
+                        "query": value,
+                        "fields": fields,
+                        "type": "best_fields",
+                        "minimum_should_match": "2<75%",
+                    }
+                }
+            )
+        return self
+
+    def prefix(self, field: str, value: Optional[str]) -> "QueryBuilder":
+        """As-you-type match on a ``search_as_you_type`` field and its shingle subfields."""
+        if value:
+            self.must.append(
+                {
+                    "multi_match": {
+                        "query": value,
+                        "type": "bool_prefix",
+                        "fields": [field, f"{field}._2gram", f"{field}._3gram"],
+                    }
+                }
+            )
+        return self
+
+    def build(self) -> Dict[str, Any]:
+        if not self.filters and not self.must:
+            return {"query": {"match_all": {}}}
+        query: Dict[str, Any] = {"filter": self.filters}
+        if self.must:
+            query["must"] = self.must
+        return {"query": {"bool": query}}
+
+
+def build_review_query(
+    token_id: Optional[str] = None,
+    product_id: Optional[str] = None,
+    site_name: Optional[str] = None,
+    product_name: Optional[str] = None,
+    reviewer: Optional[str] = None,
+    rating: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    max_rating: Optional[float] = None,
+    posted_after: Optional[datetime] = None,
+    posted_before: Optional[datetime] = None,
+    fuzzy: bool = False,
+) -> Dict[str, Any]:
+    builder = (
+        QueryBuilder()
+        .term("token_id", token_id)
+        .term("product_id", product_id)
+        .term("site_name", site_name)
+        .term("rating", rating)
+        .range("rating", gte=min_rating, lte=max_rating)
+        .range("posted_at", gte=posted_after, lte=posted_before)
+        .text("product_name", product_name, fuzzy=fuzzy)
+        .text("reviewer", reviewer, fuzzy=fuzzy)
+    )
+    return builder.build()
+
+
+# Whole title, up to three description fragments around the matched words
+REVIEW_HIGHLIGHT = {
+    "pre_tags": ["<em>"],
+    "post_tags": ["</em>"],
+    "fields": {
+        "title": {"number_of_fragments": 0},
+        "description": {"fragment_size": 150, "number_of_fragments": 3},
+    },
+}
+
+
+def build_review_search(
+    text: str,
+    product_id: Optional[str] = None,
+    site_name: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    max_rating: Optional[float] = None,
+) -> Dict[str, Any]:
+    query = (
+        QueryBuilder()
+        .term("product_id", product_id)
+        .term("site_name", site_name)
+        .range("rating", gte=min_rating, lte=max_rating)
+        .search(["title^2", "description"], text)
+        .build()
+    )
+    query["highlight"] = REVIEW_HIGHLIGHT
+    return query
+
+
+def build_product_suggest(prefix: str, site_name: Optional[str] = None) -> Dict[str, Any]:
+    query = (
+        QueryBuilder()
+        .term("site_name", site_name)
+        .prefix("product_name", prefix)
+        .build()
+    )
+    query["_source"] = ["product_id", "product_name", "site_name"]
+    # Counting every match is wasted work for a dropdown
+    query["track_total_hits"] = False
+    return query
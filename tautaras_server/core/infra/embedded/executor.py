@@ -0,0 +1,132 @@
+"""In-process task pool that stands in for Celery in embedded installs.
+
+Extraction jobs run on threads of the server process: the worker's extractor
+is imported from ``WORKER_PATH``, and each page of reviews is handed to the
+server's ingest code on its event loop, with no broker message or HTTP
+callback in between. Queued jobs and their states live in memory and are
+lost when the process stops.
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional, Tuple
+import asyncio
+import logging
+import sys
+import threading
+import uuid
+
+from core.config.env_config import sttgs
+from core.infra.cache.cache_manager import Cache
+
+logger = logging.getLogger(__name__)
+
+# The worker package, next to the server's in this repository
+WORKER_PATH = sttgs.get("WORKER_PATH", str(Path(__file__).resolve().parents[4] / "tautaras_worker"))
+EMBEDDED_WORKERS = int(sttgs.get("EMBEDDED_WORKERS", 2))
+# States of this many recent jobs are kept for status lookups
+EMBEDDED_JOB_HISTORY = int(sttgs.get("EMBEDDED_JOB_HISTORY", 10000))
+
+SUCCESS_STATUS = "Reviews extracted successfully"
+
+
+def import_worker() -> None:
+    # Appended, so the server's own packages always win
+    if WORKER_PATH not in sys.path:
+        sys.path.append(WORKER_PATH)
+
+
+class InProcessExecutor:
+    def __init__(self, workers: int = EMBEDDED_WORKERS):
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract")
+        self.lock = threading.Lock()
+        # job id -> (state, info), least recently changed first
+        self.jobs = OrderedDict()
+        self.waiting = 0
+        # Set on shutdown; running jobs fail at their next delivery
+        self.stopping = threading.Event()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.store: Optional[Callable[[list], Awaitable[dict]]] = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop, store: Callable[[list], Awaitable[dict]]) -> None:
+        """Deliver crawled reviews to ``store``, run on ``loop`` (the server's event loop)."""
+        self.loop, self.store = loop, store
+
+    def set_state(self, job_id: str, state: str, info: Any = None) -> None:
+        with self.lock:
+            self.jobs[job_id] = (state, info)
+            self.jobs.move_to_end(job_id)
+            while len(self.jobs) > EMBEDDED_JOB_HISTORY:
+                self.jobs.popitem(last=False)
+
+    def state(self, job_id: str) -> Tuple[str, Any]:
+        # Unknown ids read as PENDING, as they do from Celery
+        return self.jobs.get(job_id, ("PENDING", None))
+
+    def submit(self, data: dict, job_id: Optional[str] = None) -> str:
+        job_id = job_id or str(uuid.uuid4())
+        self.set_state(job_id, "PENDING")
+        with self.lock:
+            self.waiting += 1
+        self.pool.submit(self.run, job_id, data)
+        return job_id
+
+    def call(self, coroutine: Awaitable) -> Any:
+        """Run a coroutine on the server's loop from a pool thread and wait for it."""
+        if self.loop is None or self.loop.is_closed():
+            # Its store and cache may be closed with it
+            coroutine.close()
+            raise RuntimeError("The server's event loop is not running")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def deliver(self, reviews: list) -> dict:
+        if self.stopping.is_set():
+            raise RuntimeError("The server is shutting down")
+        if self.store is None:
+            raise RuntimeError("No ingest attached to the in-process executor")
+        stored = self.call(self.store(reviews))
+        if stored["errors"]:
+            # As the ingest endpoint's 503 does, so the page is not counted as stored
+            raise RuntimeError(f"Could not store {stored['errors']} of {len(reviews)} reviews")
+        if stored["summary_errors"]:
+            raise RuntimeError(f"Could not update {stored['summary_errors']} product summaries")
+        return stored
+
+    def run(self, job_id: str, data: dict) -> None:
+        with self.lock:
+            self.waiting -= 1
+        self.set_state(job_id, "STARTED")
+        try:
+            import_worker()
+            from logic.review_extractor import review_extractor
+
+            logger.info(f"Extracting reviews for URL: {data['url']} on platform: {data['platform']}")
+            result = review_extractor({**data, "task_id": job_id, "deliver": self.deliver})
+            if result.get("status") != SUCCESS_STATUS:
+                self.set_state(job_id, "FAILURE", {"error": result.get("error_message") or result.get("status")})
+                return
+            self.call(self.record_crawl(data, result, job_id))
+            self.set_state(job_id, "SUCCESS", {"result": SUCCESS_STATUS})
+        except Exception as e:
+            logger.error(f"Error running extraction job {job_id}: {e}", exc_info=True)
+            self.set_state(job_id, "FAILURE", {"error": str(e)})
+
+    async def record_crawl(self, data: dict, result: dict, job_id: str) -> None:
+        """The worker's crawl record, kept in the server's cache instead of Redis."""
+        from logic.hot_products import CRAWL_RECORD_TTL, crawl_key, crawl_record
+
+        product_id = (result.get("product_id") or "").strip().upper()
+        if not product_id:
+            return
+        try:
+            previous = await Cache.backend.get(crawl_key(product_id)) or {}
+            record = crawl_record(data, result, job_id, previous)
+            await Cache.backend.set(crawl_key(product_id), record, CRAWL_RECORD_TTL)
+        except Exception as e:
+            logger.error(f"Error recording crawl of {product_id}: {e}")
+
+    def shutdown(self) -> None:
+        # Queued jobs are dropped; running ones stop at their next delivery
+        self.stopping.set()
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,905 @@
+"""SQLite stand-in for the Elasticsearch client, for embedded single-process installs.
+
+It answers the client calls the server makes (documents, bulk, search and
+the index, alias and template calls of the partition manager) from one
+SQLite file in WAL mode. Documents are stored as JSON in one table, and
+their text fields are indexed with FTS5 for matching, bm25 ranking and
+highlights. Filters become ``json_extract`` comparisons; the fields filtered
+on most have expression indexes.
+
+Where it differs from Elasticsearch: fuzzy matches are prefix matches,
+scripts run as the Python functions registered in ``elastic.script_functions``,
+rollover checks ``max_docs`` and ``max_age`` only, and aggregations are
+computed in Python over the matching documents.
+"""
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import copy
+import fnmatch
+import json
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Indexed with FTS5, in column order
+TEXT_FIELDS = ("title", "description", "product_name", "reviewer")
+NUMERIC_TYPES = {"float", "double", "half_float", "scaled_float", "long", "integer", "short", "byte"}
+# Filtered on by nearly every listing query
+INDEXED_FIELDS = ("product_id", "site_name", "token_id")
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS indices (
+        name TEXT PRIMARY KEY,
+        mappings TEXT NOT NULL,
+        meta TEXT NOT NULL,
+        blocks TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS aliases (
+        alias TEXT NOT NULL,
+        index_name TEXT NOT NULL,
+        is_write_index INTEGER,
+        PRIMARY KEY (alias, index_name)
+    )""",
+    "CREATE TABLE IF NOT EXISTS templates (name TEXT PRIMARY KEY, body TEXT NOT NULL)",
+    """CREATE TABLE IF NOT EXISTS documents (
+        doc INTEGER PRIMARY KEY,
+        index_name TEXT NOT NULL,
+        id TEXT NOT NULL,
+        source TEXT NOT NULL,
+        UNIQUE (index_name, id)
+    )""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS documents_text USING fts5(
+        {", ".join(TEXT_FIELDS)}, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+] + [
+    f"CREATE INDEX IF NOT EXISTS documents_{field} ON documents(json_extract(source, '$.{field}'))"
+    for field in INDEXED_FIELDS
+]
+
+
+class StoreError(Exception):
+    """Failure answered with Elasticsearch's error type, which callers match on."""
+
+    def __init__(self, status: int, error_type: str, reason: str):
+        super().__init__(f"{error_type}: {reason}")
+        self.status_code = status
+        self.error_type = error_type
+
+
+def not_found(index: str, doc_id: str) -> Exception:
+    # The same exception the real client raises, so callers catch it the same way
+    from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+    from elasticsearch import NotFoundError
+
+    meta = ApiResponseMeta(404, "1.1", HttpHeaders(), 0.0, NodeConfig("http", "localhost", 0))
+    return NotFoundError(f"{index}/{doc_id} not found", meta, {"found": False})
+
+
+def encode(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(source: dict) -> str:
+    return json.dumps(source, default=encode, ensure_ascii=False)
+
+
+def get_field(document: dict, field: str) -> Any:
+    value = document
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def words(text: Any) -> List[str]:
+    """Lower-cased words as the unicode61 tokenizer splits them."""
+    return re.findall(r"[^\W_]+", str(text or "").lower())
+
+
+def phrase(word: str, prefix: bool = False) -> str:
+    return '"' + word.replace('"', '""') + '"' + ("*" if prefix else "")
+
+
+def required_matches(spec: Any, count: int) -> int:
+    """Words that must match out of ``count``, for ``minimum_should_match`` like ``"2<75%"``."""
+    if spec is None:
+        return 1
+    spec = str(spec)
+    if "<" in spec:
+        below, spec = spec.split("<", 1)
+        if count <= int(below):
+            return count
+    if spec.endswith("%"):
+        percent = int(spec[:-1])
+        required = math.floor(count * abs(percent) / 100)
+        required = count - required if percent < 0 else required
+    else:
+        required = int(spec)
+        required = count + required if required < 0 else required
+    return max(1, min(count, required))
+
+
+def as_datetime(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def parse_age(age: str) -> float:
+    """``"30d"`` -> seconds."""
+    units = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+    number, unit = re.fullmatch(r"(\d+)([smhd])", age.strip()).groups()
+    return int(number) * units[unit]
+
+
+def resolve_date_math(name: str) -> str:
+    """``<reviews-{now/d}-000001>`` -> ``reviews-2024.01.31-000001``; day rounding only."""
+    if not (name.startswith("<") and name.endswith(">")):
+        return name
+    return name[1:-1].replace("{now/d}", datetime.now(timezone.utc).strftime("%Y.%m.%d"))
+
+
+def project(hit: dict, source_filter: Any) -> dict:
+    if source_filter is None or source_filter is True:
+        return hit
+    if source_filter is False:
+        return {k: v for k, v in hit.items() if k != "_source"}
+    includes = source_filter if isinstance(source_filter, list) else source_filter.get("includes", [])
+    source = {}
+    for field in includes:
+        value = get_field(hit["_source"], field)
+        if value is not None:
+            target = source
+            parts = field.split(".")
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return {**hit, "_source": source}
+
+
+class SearchQuery:
+    """Translates the query DSL the server builds into SQL over ``documents d``.
+
+    Every clause becomes a condition; text clauses are FTS5 matches. Scored
+    (``must``) text clauses also make up the expression results are ranked
+    by with bm25.
+    """
+
+    def __init__(self, field_types: Dict[str, str]):
+        self.field_types = field_types
+        self.params: List[Any] = []
+        self.rank: List[str] = []
+        self.weights = {field: 1.0 for field in TEXT_FIELDS}
+
+    def field(self, name: str) -> str:
+        name = name.removesuffix(".keyword")
+        if not re.fullmatch(r"[\w.]+", name):
+            raise ValueError(f"Unsupported field name: {name}")
+        expression = f"json_extract(d.source, '$.{name}')"
+        kind = self.field_types.get(name)
+        if kind in NUMERIC_TYPES:
+            return f"CAST({expression} AS REAL)"
+        if kind == "date":
+            return f"julianday({expression})"
+        return expression
+
+    def value(self, name: str, value: Any) -> Tuple[str, Any]:
+        kind = self.field_types.get(name.removesuffix(".keyword"))
+        if kind in NUMERIC_TYPES:
+            return "?", float(value)
+        if kind == "date":
+            return "julianday(?)", value.isoformat() if isinstance(value, datetime) else value
+        if isinstance(value, bool):
+            return "?", int(value)
+        return "?", value
+
+    def compare(self, field: str, operator: str, value: Any) -> str:
+        placeholder, value = self.value(field, value)
+        self.params.append(value)
+        return f"{self.field(field)} {operator} {placeholder}"
+
+    def condition(self, query: dict, scored: bool = False) -> str:
+        kind, spec = next(iter(query.items()))
+        if kind == "match_all":
+            return "1"
+        if kind == "bool":
+            clauses = lambda key: spec.get(key) if isinstance(spec.get(key), list) else [spec[key]] if spec.get(key) else []  # noqa: E731
+            parts = [self.condition(q) for q in clauses("filter")]
+            parts += [self.condition(q, scored=True) for q in clauses("must")]
+            parts += [f"NOT ({self.condition(q)})" for q in clauses("must_not")]
+            should = clauses("should")
+            if should:
+                parts.append(" OR ".join(f"({self.condition(q, scored=True)})" for q in should))
+            return " AND ".join(f"({part})" for part in parts) or "1"
+        if kind == "ids":
+            values = list(spec.get("values", []))
+            if not values:
+                return "0"
+            self.params.extend(values)
+            return f"d.id IN ({', '.join('?' * len(values))})"
+        if kind == "term":
+            field, value = next(iter(spec.items()))
+            value = value.get("value") if isinstance(value, dict) else value
+            return self.compare(field, "=", value)
+        if kind == "terms":
+            field, values = next(iter(spec.items()))
+            return " OR ".join(f"({self.compare(field, '=', value)})" for value in values) or "0"
+        if kind == "range":
+            field, bounds = next(iter(spec.items()))
+            operators = {"gte": ">=", "gt": ">", "lte": "<=", "lt": "<"}
+            parts = [self.compare(field, operators[op], bound) for op, bound in bounds.items() if op in operators]
+            return " AND ".join(parts) or "1"
+        if kind == "exists":
+            return f"{self.field(spec['field'])} IS NOT NULL"
+        if kind == "match":
+            field, options = next(iter(spec.items()))
+            options = options if isinstance(options, dict) else {"query": options}
+            query_words = words(options["query"])
+            fuzzy = "fuzziness" in options
+            required = len(query_words) if options.get("operator") == "and" or fuzzy else 1
+            return self.text([field], query_words, required, scored, prefix=fuzzy)
+        if kind == "multi_match":
+            query_words = words(spec["query"])
+            if spec.get("type") == "bool_prefix":
+                # The shingle subfields only speed up Elasticsearch; the base field has the words
+                fields = list(dict.fromkeys(re.sub(r"\._\dgram$", "", field) for field in spec["fields"]))
+                return self.text(fields, query_words, 1, scored, prefix_last=True)
+            required = required_matches(spec.get("minimum_should_match"), len(query_words))
+            return self.text(spec["fields"], query_words, required, scored)
+        raise ValueError(f"Query not supported by the SQLite store: {kind}")
+
+    def text(
+        self,
+        fields: List[str],
+        query_words: List[str],
+        required: int,
+        scored: bool,
+        prefix: bool = False,
+        prefix_last: bool = False,
+    ) -> str:
+        columns = []
+        for field in fields:
+            name, _, boost = field.partition("^")
+            if name not in TEXT_FIELDS:
+                raise ValueError(f"Field is not full-text indexed in the SQLite store: {name}")
+            columns.append(name)
+            if boost:
+                self.weights[name] = float(boost)
+        if not query_words:
+            return "0"
+        terms = [
+            phrase(word, prefix or (prefix_last and i == len(query_words) - 1))
+            for i, word in enumerate(query_words)
+        ]
+        column_filter = "{" + " ".join(columns) + "}"
+        any_word = f"{column_filter} : ({' OR '.join(terms)})"
+        if scored:
+            self.rank.append(any_word)
+
+        if required <= 1:
+            self.params.append(any_word)
+            return "d.doc IN (SELECT rowid FROM documents_text WHERE documents_text MATCH ?)"
+        if required >= len(terms):
+            self.params.append(f"{column_filter} : ({' AND '.join(terms)})")
+            return "d.doc IN (SELECT rowid FROM documents_text WHERE documents_text MATCH ?)"
+        # Some but not all of the words: count the words each document matches
+        self.params.extend(f"{column_filter} : {term}" for term in terms)
+        self.params.append(required)
+        matches = " UNION ALL ".join(
+            "SELECT rowid FROM documents_text WHERE documents_text MATCH ?" for _ in terms
+        )
+        return f"d.doc IN (SELECT rowid FROM ({matches}) GROUP BY rowid HAVING COUNT(*) >= ?)"
+
+
+class SqliteIndices:
+    """Index, alias, template and rollover calls, kept in tables next to the documents."""
+
+    def __init__(self, store: "SqliteStore"):
+        self.store = store
+
+    def exists(self, index: str, **kwargs) -> bool:
+        return bool(self.store.resolve(index))
+
+    def create(
+        self, index: str, mappings: dict = None, aliases: dict = None, settings: dict = None, **kwargs
+    ) -> dict:
+        with self.store.transaction() as db:
+            index = self.store.create_index(db, resolve_date_math(index), mappings, aliases)
+        return {"acknowledged": True, "index": index}
+
+    def put_index_template(
+        self, name: str, index_patterns: List[str], template: dict = None, priority: int = 0, **kwargs
+    ) -> dict:
+        body = {"index_patterns": index_patterns, "template": template or {}, "priority": priority}
+        with self.store.transaction() as db:
+            db.execute("INSERT OR REPLACE INTO templates (name, body) VALUES (?, ?)", (name, dumps(body)))
+        return {"acknowledged": True}
+
+    def exists_alias(self, name: str, index: Optional[str] = None, **kwargs) -> bool:
+        members = self.store.alias_members(name)
+        return bool(members) if index is None else index in members
+
+    def put_alias(self, index: str, name: str, is_write_index: Optional[bool] = None, **kwargs) -> dict:
+        with self.store.transaction() as db:
+            self.store.add_alias(db, index, name, is_write_index)
+        return {"acknowledged": True}
+
+    def delete_alias(self, index: str, name: str, **kwargs) -> dict:
+        with self.store.transaction() as db:
+            db.execute("DELETE FROM aliases WHERE alias = ? AND index_name = ?", (name, index))
+        return {"acknowledged": True}
+
+    def get_alias(self, name: str, **kwargs) -> dict:
+        rows = self.store.query("SELECT index_name, is_write_index FROM aliases WHERE alias = ?", (name,))
+        if not rows:
+            raise StoreError(404, "aliases_not_found_exception", f"alias [{name}] missing")
+        return {
+            index: {"aliases": {name: {} if is_write is None else {"is_write_index": bool(is_write)}}}
+            for index, is_write in rows
+        }
+
+    def get_mapping(self, index: str, **kwargs) -> dict:
+        result = {}
+        for name in self.store.resolve(index):
+            mappings, meta = self.store.index_settings(name)[:2]
+            result[name] = {"mappings": {**mappings, "_meta": meta}}
+        return result
+
+    def put_mapping(self, index: str, properties: dict = None, meta: dict = None, **kwargs) -> dict:
+        with self.store.transaction() as db:
+            for name in self.store.resolve(index):
+                mappings, current_meta, _, _ = self.store.index_settings(name)
+                mappings.setdefault("properties", {}).update(properties or {})
+                db.execute(
+                    "UPDATE indices SET mappings = ?, meta = ? WHERE name = ?",
+                    (dumps(mappings), dumps(current_meta if meta is None else meta), name),
+                )
+        self.store.field_types_cache.clear()
+        return {"acknowledged": True}
+
+    def rollover(self, alias: str, conditions: dict = None, dry_run: bool = False, **kwargs) -> dict:
+        store = self.store
+        with store.transaction() as db:
+            old_index = store.write_target(alias)
+            conditions = conditions or {}
+            met = {}
+            if conditions.get("max_docs"):
+                count = db.execute("SELECT COUNT(*) FROM documents WHERE index_name = ?", (old_index,)).fetchone()[0]
+                met[f"[max_docs: {conditions['max_docs']}]"] = count >= int(conditions["max_docs"])
+            if conditions.get("max_age"):
+                created_at = store.index_settings(old_index)[3]
+                met[f"[max_age: {conditions['max_age']}]"] = time.time() - created_at >= parse_age(conditions["max_age"])
+
+            prefix, _, number = old_index.rpartition("-")
+            # A partition named after its first day keeps that form
+            prefix = re.sub(r"\d{4}\.\d{2}\.\d{2}$", datetime.now(timezone.utc).strftime("%Y.%m.%d"), prefix)
+            new_index = f"{prefix}-{int(number) + 1:06d}" if number.isdigit() else f"{old_index}-000002"
+            rolled_over = any(met.values()) and not dry_run
+            if rolled_over:
+                db.execute("UPDATE aliases SET is_write_index = 0 WHERE alias = ? AND index_name = ?", (alias, old_index))
+                store.create_index(db, new_index, None, {alias: {"is_write_index": True}})
+        return {
+            "old_index": old_index,
+            "new_index": new_index,
+            "rolled_over": rolled_over,
+            "dry_run": dry_run,
+            "conditions": met,
+        }
+
+    def add_block(self, index: str, block: str, **kwargs) -> dict:
+        with self.store.transaction() as db:
+            for name in self.store.resolve(index):
+                blocks = set(self.store.index_settings(name)[2]) | {block}
+                db.execute("UPDATE indices SET blocks = ? WHERE name = ?", (dumps(sorted(blocks)), name))
+        return {"acknowledged": True}
+
+    def forcemerge(self, index: str = None, **kwargs) -> dict:
+        # One full-text index serves every index; merging it helps them all
+        with self.store.transaction() as db:
+            db.execute("INSERT INTO documents_text (documents_text) VALUES ('optimize')")
+        return {"_shards": {"failed": 0}}
+
+    def refresh(self, index: str = None, **kwargs) -> dict:
+        return {"_shards": {"failed": 0}}
+
+
+class SqliteStore:
+    """The Elasticsearch client calls the server makes, answered from one SQLite file.
+
+    One connection is shared by every thread and calls are serialised, which
+    suits a single embedded process; WAL lets other processes (backups, the
+    maintenance scripts) read while it writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        # Durable at each checkpoint rather than each commit; a crash loses at most the last writes
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.execute("PRAGMA busy_timeout = 5000")
+        for statement in SCHEMA:
+            self.db.execute(statement)
+        self.indices = SqliteIndices(self)
+        self.field_types_cache: Dict[Tuple[str, ...], Dict[str, str]] = {}
+
+    def transaction(self):
+        store = self
+
+        class Transaction:
+            def __enter__(self):
+                store.lock.acquire()
+                store.db.execute("BEGIN IMMEDIATE")
+                return store.db
+
+            def __exit__(self, exc_type, exc, tb):
+                try:
+                    store.db.execute("ROLLBACK" if exc_type else "COMMIT")
+                finally:
+                    store.lock.release()
+
+        return Transaction()
+
+    def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def options(self, **kwargs) -> "SqliteStore":
+        return self
+
+    def ping(self, **kwargs) -> bool:
+        return True
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+    # Indices and aliases
+
+    def alias_members(self, alias: str) -> List[str]:
+        return [row[0] for row in self.query("SELECT index_name FROM aliases WHERE alias = ?", (alias,))]
+
+    def index_names(self) -> List[str]:
+        return [row[0] for row in self.query("SELECT name FROM indices")]
+
+    def resolve(self, index: Optional[str]) -> List[str]:
+        names = []
+        for part in (index or "*").split(","):
+            members = self.alias_members(part)
+            if members:
+                names.extend(members)
+            elif any(ch in part for ch in "*?"):
+                names.extend(fnmatch.filter(self.index_names(), part))
+            elif self.query("SELECT 1 FROM indices WHERE name = ?", (part,)):
+                names.append(part)
+        return list(dict.fromkeys(names))
+
+    def index_settings(self, name: str) -> Tuple[dict, dict, List[str], float]:
+        row = self.query("SELECT mappings, meta, blocks, created_at FROM indices WHERE name = ?", (name,))
+        if not row:
+            raise StoreError(404, "index_not_found_exception", f"no such index [{name}]")
+        mappings, meta, blocks, created_at = row[0]
+        return json.loads(mappings), json.loads(meta), json.loads(blocks), created_at
+
+    def field_types(self, names: List[str]) -> Dict[str, str]:
+        key = tuple(sorted(names))
+        if key not in self.field_types_cache:
+            types = {}
+            for name in names:
+                self.collect_types(self.index_settings(name)[0].get("properties", {}), "", types)
+            self.field_types_cache[key] = types
+        return self.field_types_cache[key]
+
+    def collect_types(self, properties: dict, prefix: str, types: Dict[str, str]) -> None:
+        for field, mapping in properties.items():
+            if "properties" in mapping:
+                self.collect_types(mapping["properties"], f"{prefix}{field}.", types)
+            else:
+                types[f"{prefix}{field}"] = mapping.get("type", "object")
+
+    def create_index(self, db, name: str, mappings: Optional[dict], aliases: Optional[dict]) -> str:
+        if db.execute("SELECT 1 FROM indices WHERE name = ?", (name,)).fetchone():
+            raise StoreError(400, "resource_already_exists_exception", f"index [{name}] already exists")
+        templates = [json.loads(row[0]) for row in db.execute("SELECT body FROM templates")]
+        matching = sorted(
+            (t for t in templates if any(fnmatch.fnmatch(name, p) for p in t["index_patterns"])),
+            key=lambda t: t.get("priority", 0),
+        )
+        # The highest priority template applies, as in Elasticsearch
+        template = matching[-1]["template"] if matching else {}
+        mappings = copy.deepcopy(mappings or template.get("mappings") or {})
+        db.execute(
+            "INSERT INTO indices (name, mappings, meta, blocks, created_at) VALUES (?, ?, ?, ?, ?)",
+            (name, dumps(mappings), dumps(mappings.pop("_meta", {})), "[]", time.time()),
+        )
+        for alias, options in {**template.get("aliases", {}), **(aliases or {})}.items():
+            self.add_alias(db, name, alias, (options or {}).get("is_write_index"))
+        self.field_types_cache.clear()
+        return name
+
+    def add_alias(self, db, index: str, alias: str, is_write_index: Optional[bool]) -> None:
+        if is_write_index:
+            db.execute("UPDATE aliases SET is_write_index = 0 WHERE alias = ?", (alias,))
+        db.execute(
+            "INSERT OR REPLACE INTO aliases (alias, index_name, is_write_index) VALUES (?, ?, ?)",
+            (alias, index, None if is_write_index is None else int(is_write_index)),
+        )
+
+    def write_target(self, index: str) -> str:
+        rows = self.query("SELECT index_name, is_write_index FROM aliases WHERE alias = ?", (index,))
+        if not rows:
+            return index
+        for name, is_write in rows:
+            if is_write or (is_write is None and len(rows) == 1):
+                return name
+        raise StoreError(400, "illegal_argument_exception", f"no write index is defined for alias [{index}]")
+
+    # Documents
+
+    def write(self, db, index: str, doc_id: str, source: dict, create: bool = False) -> int:
+        """Store one document; returns the HTTP status Elasticsearch would answer with."""
+        if not db.execute("SELECT 1 FROM indices WHERE name = ?", (index,)).fetchone():
+            # Indexing into a missing index creates it, templates applied
+            self.create_index(db, index, None, None)
+        elif "write" in self.index_settings(index)[2]:
+            return 403
+        encoded = dumps(source)
+        if create:
+            row = db.execute(
+                "INSERT OR IGNORE INTO documents (index_name, id, source) VALUES (?, ?, ?) RETURNING doc",
+                (index, doc_id, encoded),
+            ).fetchone()
+            if row is None:
+                return 409
+            status = 201
+        else:
+            existed = db.execute(
+                "SELECT doc FROM documents WHERE index_name = ? AND id = ?", (index, doc_id)
+            ).fetchone()
+            row = db.execute(
+                "INSERT INTO documents (index_name, id, source) VALUES (?, ?, ?) "
+                "ON CONFLICT (index_name, id) DO UPDATE SET source = excluded.source RETURNING doc",
+                (index, doc_id, encoded),
+            ).fetchone()
+            status = 200 if existed else 201
+            db.execute("DELETE FROM documents_text WHERE rowid = ?", row)
+        texts = [source.get(field) for field in TEXT_FIELDS]
+        if any(texts):
+            db.execute(
+                f"INSERT INTO documents_text (rowid, {', '.join(TEXT_FIELDS)}) VALUES (?{', ?' * len(TEXT_FIELDS)})",
+                (row[0], *(None if text is None else str(text) for text in texts)),
+            )
+        return status
+
+    def find(self, index: str, doc_id: str) -> Optional[Tuple[str, dict]]:
+        names = self.resolve(index)
+        if not names:
+            return None
+        rows = self.query(
+            f"SELECT index_name, source FROM documents WHERE id = ? AND index_name IN ({', '.join('?' * len(names))})",
+            (doc_id, *names),
+        )
+        return (rows[0][0], json.loads(rows[0][1])) if rows else None
+
+    def index(self, index: str, id: str, body: dict = None, document: dict = None, **kwargs) -> dict:
+        target = self.write_target(index)
+        with self.transaction() as db:
+            status = self.write(db, target, id, document or body)
+        if status == 403:
+            raise StoreError(403, "cluster_block_exception", f"index [{target}] blocked by: [FORBIDDEN/8/index write]")
+        return {"_index": target, "_id": id, "result": "created" if status == 201 else "updated"}
+
+    def get(self, index: str, id: str, **kwargs) -> dict:
+        found = self.find(index, id)
+        if found is None:
+            raise not_found(index, id)
+        return {"_index": found[0], "_id": id, "found": True, "_source": found[1]}
+
+    def update(self, index: str, id: str, body: dict = None, doc: dict = None, **kwargs) -> dict:
+        found = self.find(index, id)
+        if found is None:
+            raise not_found(index, id)
+        name, source = found
+        source.update((body or {}).get("doc") or doc or {})
+        with self.transaction() as db:
+            self.write(db, name, id, source)
+        return {"_index": name, "_id": id, "result": "updated"}
+
+    def delete(self, index: str, id: str, **kwargs) -> dict:
+        found = self.find(index, id)
+        if found is None:
+            raise not_found(index, id)
+        with self.transaction() as db:
+            self.remove(db, found[0], id)
+        return {"_index": found[0], "_id": id, "result": "deleted"}
+
+    def remove(self, db, index: str, doc_id: str) -> bool:
+        row = db.execute(
+            "DELETE FROM documents WHERE index_name = ? AND id = ? RETURNING doc", (index, doc_id)
+        ).fetchone()
+        if row:
+            db.execute("DELETE FROM documents_text WHERE rowid = ?", row)
+        return row is not None
+
+    def mget(self, index: str, body: dict = None, ids: List[str] = None, **kwargs) -> dict:
+        ids = ids or (body or {}).get("ids", [])
+        names = self.resolve(index)
+        found = {}
+        if names and ids:
+            rows = self.query(
+                f"SELECT index_name, id, source FROM documents WHERE id IN ({', '.join('?' * len(ids))}) "
+                f"AND index_name IN ({', '.join('?' * len(names))})",
+                (*ids, *names),
+            )
+            found = {doc_id: (name, source) for name, doc_id, source in rows}
+        docs = []
+        for doc_id in ids:
+            if doc_id in found:
+                name, source = found[doc_id]
+                docs.append({"_index": name, "_id": doc_id, "found": True, "_source": json.loads(source)})
+            else:
+                docs.append({"_index": index, "_id": doc_id, "found": False})
+        return {"docs": docs}
+
+    def bulk(self, operations: List[dict] = None, body: List[dict] = None, **kwargs) -> dict:
+        """Every action in one transaction; each gets its own status, as in Elasticsearch."""
+        from core.infra.elasticstack.elastic import script_functions
+
+        operations = operations or body
+        items = []
+        with self.transaction() as db:
+            i = 0
+            while i < len(operations):
+                action, meta = next(iter(operations[i].items()))
+                source = operations[i + 1] if action != "delete" else None
+                i += 1 if action == "delete" else 2
+                index, doc_id = meta.get("_index") or kwargs.get("index"), meta.get("_id")
+                item = {"_index": index, "_id": doc_id}
+                items.append({action: item})
+                try:
+                    if kwargs.get("require_alias") and not self.alias_members(index):
+                        raise StoreError(404, "index_not_found_exception", f"no such alias [{index}]")
+                    index = item["_index"] = self.write_target(index)
+                    if action == "delete":
+                        item["status"] = 200 if self.remove(db, index, doc_id) else 404
+                    elif action in ("create", "index"):
+                        item["status"] = self.write(db, index, doc_id, source, create=action == "create")
+                    elif action == "update":
+                        row = db.execute(
+                            "SELECT source FROM documents WHERE index_name = ? AND id = ?", (index, doc_id)
+                        ).fetchone()
+                        if row is None:
+                            if not (source.get("doc_as_upsert") or "upsert" in source):
+                                raise StoreError(404, "document_missing_exception", f"[{doc_id}]: document missing")
+                            document = copy.deepcopy(source.get("upsert") or source.get("doc"))
+                        else:
+                            document = json.loads(row[0])
+                            if "script" in source:
+                                script = source["script"]
+                                script_functions[script["source"]](document, copy.deepcopy(script.get("params", {})))
+                            else:
+                                document.update(source.get("doc", {}))
+                        status = self.write(db, index, doc_id, document)
+                        item["status"] = status if status == 403 else 200 if row else 201
+                    else:
+                        raise StoreError(400, "illegal_argument_exception", f"unknown action [{action}]")
+                except StoreError as e:
+                    item["status"] = e.status_code
+                    item["error"] = {"type": e.error_type, "reason": str(e)}
+                    continue
+                if item["status"] == 409:
+                    item["error"] = {"type": "version_conflict_engine_exception", "reason": "document already exists"}
+                elif item["status"] == 403:
+                    item["error"] = {"type": "cluster_block_exception", "reason": f"index [{index}] blocked"}
+                elif item["status"] == 404:
+                    item["error"] = {"type": "not_found", "reason": f"[{doc_id}] not found"}
+        return {"errors": any(item[next(iter(item))]["status"] >= 300 for item in items), "items": items}
+
+    # Search
+
+    def search(self, index: str = None, body: dict = None, from_: int = 0, size: int = 10, **kwargs) -> dict:
+        started = time.perf_counter()
+        body = dict(body or {})
+        body.update({k: v for k, v in kwargs.items() if k in ("query", "sort", "_source", "aggs", "highlight")})
+        from_ = body.get("from", from_)
+        size = body.get("size", size)
+        names = self.resolve(index)
+        response = {"took": 0, "timed_out": False, "_shards": {"total": len(names), "failed": 0}}
+        if not names:
+            response["hits"] = {"total": {"value": 0, "relation": "eq"}, "max_score": None, "hits": []}
+            return response
+
+        search = SearchQuery(self.field_types(names))
+        condition = search.condition(body.get("query", {"match_all": {}}))
+        where = f"d.index_name IN ({', '.join('?' * len(names))}) AND ({condition})"
+        params = [*names, *search.params]
+
+        hits = []
+        if size:
+            rows, highlight_fields = self.ranked_rows(body, search, where, params, size, from_)
+            highlight = body.get("highlight") or {}
+            pre, post = (highlight.get("pre_tags") or ["<em>"])[0], (highlight.get("post_tags") or ["</em>"])[0]
+            for row in rows:
+                hit = {"_index": row[0], "_id": row[1], "_score": row[3], "_source": json.loads(row[2])}
+                fragments = {
+                    field: [fragment.replace("\x01", pre).replace("\x02", post)]
+                    for field, fragment in zip(highlight_fields, row[4:])
+                    if fragment and "\x01" in fragment
+                }
+                if fragments:
+                    hit["highlight"] = fragments
+                hits.append(project(hit, body.get("_source")))
+
+        response["hits"] = {"max_score": hits[0]["_score"] if hits else None, "hits": hits}
+        if body.get("track_total_hits") is not False:
+            total = self.query(f"SELECT COUNT(*) FROM documents d WHERE {where}", tuple(params))[0][0]
+            response["hits"]["total"] = {"value": total, "relation": "eq"}
+        if body.get("aggs"):
+            rows = self.query(f"SELECT d.id, d.source FROM documents d WHERE {where}", tuple(params))
+            documents = [(doc_id, json.loads(source)) for doc_id, source in rows]
+            response["aggregations"] = self.aggregate(body["aggs"], documents, search)
+        response["took"] = int((time.perf_counter() - started) * 1000)
+        return response
+
+    def ranked_rows(
+        self, body: dict, search: SearchQuery, where: str, params: list, size: int, from_: int
+    ) -> Tuple[List[tuple], List[str]]:
+        """One page of ``(index, id, source, score, *highlights)`` rows, best first."""
+        order = self.order_by(body.get("sort"), search, bool(search.rank))
+        if not search.rank:
+            rows = self.query(
+                f"SELECT d.index_name, d.id, d.source, 1.0 FROM documents d WHERE {where} "
+                f"ORDER BY {order} LIMIT ? OFFSET ?",
+                (*params, size, from_),
+            )
+            return rows, []
+        weights = ", ".join(str(search.weights[field]) for field in TEXT_FIELDS)
+        highlight = body.get("highlight") or {}
+        fields = list(highlight.get("fields", {}).items())
+        highlights = "".join(self.highlight_column(field, options, highlight) for field, options in fields)
+        rows = self.query(
+            f"SELECT d.index_name, d.id, d.source, -bm25(documents_text, {weights}) AS score{highlights} "
+            f"FROM documents d JOIN documents_text ON documents_text.rowid = d.doc "
+            f"WHERE documents_text MATCH ? AND {where} ORDER BY {order} LIMIT ? OFFSET ?",
+            (" OR ".join(f"({expression})" for expression in search.rank), *params, size, from_),
+        )
+        return rows, [field for field, _ in fields]
+
+    @staticmethod
+    def highlight_column(field: str, options: dict, highlight: dict) -> str:
+        # Marked with control characters and tagged afterwards, so the tags need no quoting
+        column = TEXT_FIELDS.index(field)
+        if options.get("number_of_fragments", 5) == 0:
+            return f", highlight(documents_text, {column}, char(1), char(2))"
+        # About six characters per word
+        tokens = max(8, min(64, options.get("fragment_size", highlight.get("fragment_size", 100)) // 6))
+        return f", snippet(documents_text, {column}, char(1), char(2), '…', {tokens})"
+
+    @staticmethod
+    def order_by(sort: Any, search: SearchQuery, ranked: bool) -> str:
+        clauses = []
+        for spec in sort or []:
+            field, order = next(iter(spec.items())) if isinstance(spec, dict) else (spec, "asc")
+            order = order.get("order", "asc") if isinstance(order, dict) else order
+            if field == "_score":
+                clauses.append("score DESC")
+                continue
+            expression = search.field(field)
+            # Documents without the field come last either way, as in Elasticsearch
+            clauses.append(f"{expression} IS NULL, {expression} {'DESC' if order == 'desc' else 'ASC'}")
+        if not sort and ranked:
+            clauses.append("score DESC")
+        clauses.append("d.doc")
+        return ", ".join(clauses)
+
+    # Aggregations
+
+    def aggregate(self, aggs: dict, documents: List[Tuple[str, dict]], search: SearchQuery) -> dict:
+        return {name: self.aggregation(spec, documents, search) for name, spec in aggs.items()}
+
+    def aggregation(self, spec: dict, documents: List[Tuple[str, dict]], search: SearchQuery) -> dict:
+        kind = next(key for key in spec if key not in ("aggs", "aggregations"))
+        options = spec[kind]
+        if kind == "composite":
+            return self.composite(options, spec.get("aggs") or spec.get("aggregations") or {}, documents, search)
+        if kind == "top_hits":
+            hits = [{"_id": doc_id, "_score": 1.0, "_source": source} for doc_id, source in documents]
+            for sort in reversed(options.get("sort", [])):
+                field, order = next(iter(sort.items())) if isinstance(sort, dict) else (sort, "asc")
+                order = order.get("order", "asc") if isinstance(order, dict) else order
+                present = [hit for hit in hits if get_field(hit["_source"], field) is not None]
+                missing = [hit for hit in hits if get_field(hit["_source"], field) is None]
+                present.sort(key=lambda hit: self.sort_key(search, field, get_field(hit["_source"], field)), reverse=order == "desc")
+                hits = present + missing
+            hits = [project(hit, options.get("_source")) for hit in hits[: options.get("size", 3)]]
+            return {"hits": {"total": {"value": len(documents), "relation": "eq"}, "hits": hits}}
+
+        field = options["field"]
+        values = [value for _, source in documents if (value := get_field(source, field)) is not None]
+        if kind == "value_count":
+            return {"value": len(values)}
+        numbers = [number for number in (self.number(value) for value in values) if number is not None]
+        if kind == "sum":
+            return {"value": float(sum(numbers))}
+        if kind in ("min", "max"):
+            if search.field_types.get(field) == "date":
+                dates = [parsed for parsed in map(as_datetime, values) if parsed]
+                if not dates:
+                    return {"value": None}
+                value = (min if kind == "min" else max)(dates)
+                return {"value": value.timestamp() * 1000, "value_as_string": value.isoformat()}
+            if not numbers:
+                return {"value": None}
+            return {"value": (min if kind == "min" else max)(numbers)}
+        if kind == "histogram":
+            interval = options["interval"]
+            counts = Counter(math.floor(number / interval) * interval for number in numbers)
+            return {
+                "buckets": [
+                    {"key": float(key), "doc_count": count}
+                    for key, count in sorted(counts.items())
+                    if count >= options.get("min_doc_count", 0)
+                ]
+            }
+        raise ValueError(f"Aggregation not supported by the SQLite store: {kind}")
+
+    def composite(
+        self, options: dict, sub_aggs: dict, documents: List[Tuple[str, dict]], search: SearchQuery
+    ) -> dict:
+        sources = [next(iter(source.items())) for source in options["sources"]]
+        groups: Dict[tuple, List[Tuple[str, dict]]] = {}
+        for doc_id, source in documents:
+            key = tuple(get_field(source, spec["terms"]["field"]) for _, spec in sources)
+            # Documents missing a source field are left out, as without missing_bucket
+            if None not in key:
+                groups.setdefault(key, []).append((doc_id, source))
+        keys = sorted(groups)
+        after = options.get("after")
+        if after:
+            after_key = tuple(after[name] for name, _ in sources)
+            keys = [key for key in keys if key > after_key]
+        keys = keys[: options.get("size", 10)]
+        buckets = []
+        for key in keys:
+            bucket = {"key": dict(zip((name for name, _ in sources), key)), "doc_count": len(groups[key])}
+            bucket.update(self.aggregate(sub_aggs, groups[key], search))
+            buckets.append(bucket)
+        result = {"buckets": buckets}
+        if buckets:
+            result["after_key"] = buckets[-1]["key"]
+        return result
+
+    @staticmethod
+    def number(value: Any) -> Optional[float]:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def sort_key(self, search: SearchQuery, field: str, value: Any) -> Any:
+        kind = search.field_types.get(field)
+        if kind == "date":
+            return as_datetime(value) or datetime.min.replace(tzinfo=timezone.utc)
+        if kind in NUMERIC_TYPES:
+            return self.number(value) or 0.0
+        return str(value)
+
+    def count(self, index: str = None, body: dict = None, query: dict = None, **kwargs) -> dict:
+        result = self.search(index, body={"query": query or (body or {}).get("query", {"match_all": {}})}, size=0)
+        return {"count": result["hits"]["total"]["value"]}
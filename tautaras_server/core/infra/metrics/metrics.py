@@ -0,0 +1,143 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+from core.config.env_config import sttgs
+from core.utility.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    "tautaras_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+EXTERNAL_CALL_LATENCY = Histogram(
+    "tautaras_external_call_duration_seconds",
+    "Latency of Elasticsearch and Redis calls",
+    ["backend", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+EXTERNAL_CALL_ERRORS = Counter(
+    "tautaras_external_call_errors_total",
+    "Failed Elasticsearch and Redis calls",
+    ["backend", "operation"],
+)
+
+INGEST_BATCH_SIZE = Histogram(
+    "tautaras_ingest_batch_size",
+    "Reviews per ingest callback",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+
+INGESTED_REVIEWS = Counter(
+    "tautaras_ingested_reviews_total",
+    "Reviews handled by ingest, by outcome",
+    ["result"],
+)
+
+
+@contextmanager
+def track_call(backend: str, operation: str):
+    """Time and trace an Elasticsearch/Redis call; count it as an error if it raises."""
+    started = time.perf_counter()
+    try:
+        with start_span(f"{backend}.{operation}"):
+            yield
+    except Exception:
+        EXTERNAL_CALL_ERRORS.labels(backend, operation).inc()
+        raise
+    finally:
+        EXTERNAL_CALL_LATENCY.labels(backend, operation).observe(
+            time.perf_counter() - started
+        )
+
+
+def render_metrics():
+    """Return ``(payload, content_type)`` for the metrics endpoint.
+
+    With several server processes, ``PROMETHEUS_MULTIPROC_DIR`` must be set so
+    every process writes its samples there and the scrape aggregates them.
+    """
+    if sttgs.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop an exited server process's live samples from the multiprocess directory."""
+    if sttgs.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+def mark_exited_processes_dead() -> None:
+    """Mark processes that left samples behind without shutting down, e.g. crashed workers."""
+    directory = sttgs.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        return
+    pids = set()
+    for name in os.listdir(directory):
+        # Sample files are named <type>_<pid>.db
+        pid = name.rsplit("_", 1)[-1].removesuffix(".db")
+        if pid.isdigit():
+            pids.add(int(pid))
+    for pid in pids - {os.getpid()}:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            logger.info(f"Marking exited server process {pid} dead in the metrics directory")
+            multiprocess.mark_process_dead(pid)
+        except PermissionError:
+            pass
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency labelled by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The matched route is only known after routing; fall back to a
+            # fixed label so unknown paths cannot blow up label cardinality
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            if route_path != "/metrics":
+                REQUEST_LATENCY.labels(
+                    scope["method"], route_path, str(status_code)
+                ).observe(time.perf_counter() - started)
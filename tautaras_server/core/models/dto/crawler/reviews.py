@@ -1,13 +1,24 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Any
+
+from core.config.env_config import sttgs
+
+BATCH_MAX_URLS = int(sttgs.get("BATCH_MAX_URLS", 10000))
+
 class ExtractReviewRequest(BaseModel):
     url: str = Field(...)
 
+class ExtractBatchRequest(BaseModel):
+    urls: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_URLS)
+
 class ReviewerDetails(BaseModel):
     location: Optional[str] = None
 
 class ReviewDTO(BaseModel):
+    """Documents the review shape; ``GET /reviews`` builds these as plain dicts."""
+
     review_id: str
+    product_id: Optional[str] = None
     product_name: str
     site_name: str
     rating: float
@@ -15,6 +26,7 @@ class ReviewDTO(BaseModel):
     description: str
     reviewer: str
     reviewer_location: Optional[str] = None
+    posted_at: Optional[str] = None
     indexed_at: str
     updated_at: str
 
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+
+
+class ProfilingToggle(BaseModel):
+    enabled: bool = Field(...)
+    # Switches itself off so a forgotten toggle does not profile forever
+    duration_seconds: int = Field(300, gt=0, le=3600)
+
+
+class ProfilingStatus(BaseModel):
+    enabled: bool
+    remaining_seconds: int
+    sample_rate: float
+    profile_dir: str
@@ -1,14 +1,36 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from api import router
+from api.utility import hot_products
+from api.v1.crawler.review import store_reviews
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware import Middleware
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+
+from core.config.env_config import sttgs
 
 from core.config.log_config import setup_logging
 from core.exceptions.base import CustomException
 from core.infra.cache.cache_manager import Cache
+from core.infra.cache.memory_backend import MemoryBackend
 from core.infra.cache.redis_backend import RedisBackend
+from core.infra.celery import jobs
+from core.infra.elasticstack import elastic
+from core.infra.elasticstack import index_manager
+from core.infra.elasticstack.mappings import PRODUCT_MAPPINGS
+from core.infra.metrics import metrics
+from core.infra.metrics.metrics import MetricsMiddleware
+from core.utility.preload import start_preload
+from core.utility.profiling import PROFILE_DIR, ProfilingMiddleware
+from core.utility.tracing import TracingMiddleware
+
+logger = logging.getLogger(__name__)
 
 def init_routers(app_ : FastAPI) -> None:
     app_.include_router(router)
@@ -17,7 +39,7 @@ def init_routers(app_ : FastAPI) -> None:
 def init_listeners(app_: FastAPI) -> None:
     @app_.exception_handler(CustomException)
     async def custom_exception_handler(request: Request, exc: CustomException):
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=exc.code,
             content={"error_code": exc.error_code, "message": exc.message},
         )
@@ -25,6 +47,8 @@ def init_listeners(app_: FastAPI) -> None:
 
 def make_middleware() -> List[Middleware]:
     middleware = [
+        Middleware(MetricsMiddleware),
+        Middleware(TracingMiddleware),
         Middleware(
             CORSMiddleware,
             allow_origins=["*"],
@@ -33,11 +57,61 @@ def make_middleware() -> List[Middleware]:
             allow_headers=["*"],
         ),
     ]
+    if PROFILE_DIR:
+        # Innermost, so the profile covers the handler and not the other middleware
+        middleware.append(Middleware(ProfilingMiddleware))
     return middleware
 
 
 def init_cache() -> None:
-    Cache.init(backend=RedisBackend())
+    # redis | memory; memory keeps the cache in this process (embedded mode)
+    if sttgs.get("CACHE_BACKEND", "redis").lower() == "memory":
+        Cache.init(backend=MemoryBackend(max_entries=int(sttgs.get("CACHE_MAX_ENTRIES", 100000))))
+    else:
+        Cache.init(backend=RedisBackend())
+
+
+async def warm_up() -> None:
+    # Runs in every worker process before it accepts requests
+    connections = int(sttgs.get("WARM_CONNECTIONS", 4))
+    try:
+        await Cache.backend.connect(connections)
+    except Exception as e:
+        logger.error(f"Cache warm-up failed: {e}")
+    if not await run_in_threadpool(elastic.warm_up, connections):
+        logger.error("Elasticsearch warm-up failed")
+        return
+    await run_in_threadpool(index_manager.bootstrap)
+    await run_in_threadpool(elastic.ensure_index, "products", PRODUCT_MAPPINGS)
+
+
+async def shut_down() -> None:
+    # In-flight requests have drained by now
+    try:
+        await Cache.backend.close()
+    except Exception as e:
+        logger.error(f"Error closing cache connections: {e}")
+    await run_in_threadpool(elastic.close_client)
+
+
+@asynccontextmanager
+async def lifespan(app_: FastAPI):
+    # Processes restarted by the supervisor take over from ones that crashed
+    metrics.mark_exited_processes_dead()
+    await warm_up()
+    logger.info("Startup warm-up finished, ready to serve")
+    start_preload()
+    if jobs.TASK_EXECUTOR == "inprocess":
+        # Crawled pages go straight to ingest on this loop instead of the HTTP callback
+        jobs.get_executor().attach(asyncio.get_running_loop(), store_reviews)
+    popularity_flusher = asyncio.create_task(hot_products.flush_popularity_periodically())
+    yield
+    popularity_flusher.cancel()
+    await hot_products.flush_popularity()
+    if jobs.TASK_EXECUTOR == "inprocess":
+        jobs.get_executor().shutdown()
+    await shut_down()
+    metrics.mark_process_dead(os.getpid())
 
 
 def create_app() -> None:
@@ -46,6 +120,9 @@ def create_app() -> None:
         description="This crawler is specifically build to extract review from amazon and flipkart",
         version="0.0.1",
         middleware=make_middleware(),
+        # orjson serialises responses several times faster than the stdlib encoder
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
     )
     init_routers(app_=app_)
     init_listeners(app_=app_)
@@ -0,0 +1,44 @@
+"""Background loading of dependencies kept out of the import path.
+
+dateparser and Celery's result/transport machinery are imported on first use
+so a new process starts serving sooner. Once it is serving, a daemon thread
+imports them and runs one throwaway parse, so the first ingest or status
+request after a deploy does not pay for it either.
+"""
+import importlib
+import logging
+import threading
+import time
+
+from core.config.env_config import sttgs
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODULES = (
+    "dateparser",
+    "celery.result",
+    "kombu.transport.pyamqp",
+)
+
+
+def preload() -> None:
+    started = time.perf_counter()
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"Could not preload {name}: {e}")
+    try:
+        import dateparser
+
+        # Loads the language and timezone data the first real parse would
+        dateparser.parse("2 months ago", settings={"TIMEZONE": "UTC", "RETURN_AS_TIMEZONE_AWARE": True})
+    except Exception as e:
+        logger.warning(f"dateparser warm-up failed: {e}")
+    logger.info(f"Preloaded heavy modules in {time.perf_counter() - started:.2f}s")
+
+
+def start_preload() -> None:
+    if sttgs.get("PRELOAD_HEAVY_IMPORTS", "true").lower() != "true":
+        return
+    threading.Thread(target=preload, name="preload", daemon=True).start()
@@ -0,0 +1,110 @@
+"""Request profiling with the shared sampler (see "Profiling" in the readme).
+
+A request is profiled when it carries ``X-Profile: <PROFILE_TOKEN>``, while
+the admin toggle is on, or by ``PROFILE_SAMPLE_RATE``; every thread is
+sampled while it runs. Without ``PROFILE_DIR`` the middleware is not added.
+
+The toggle is a deadline in the shared cache, so it holds for every server
+process. Each process re-reads it at most every
+``PROFILE_TOGGLE_CHECK_INTERVAL`` seconds.
+"""
+import logging
+import math
+import random
+import time
+from typing import Optional
+
+from tautaras_common.profiling import SamplingProfiler
+
+from core.config.env_config import sttgs
+from core.infra.cache.cache_manager import Cache
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = sttgs.get("PROFILE_DIR")
+PROFILE_TOKEN = sttgs.get("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(sttgs.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_INTERVAL = float(sttgs.get("PROFILE_INTERVAL_MS", 5)) / 1000
+PROFILE_MAX_FILES = int(sttgs.get("PROFILE_MAX_FILES", 50))
+TOGGLE_CHECK_INTERVAL = float(sttgs.get("PROFILE_TOGGLE_CHECK_INTERVAL", 1))
+
+# Wall-clock time until which every request is profiled
+TOGGLE_KEY = "profiling::enabled_until"
+
+# This process's last reading of the toggle
+toggle_state = {"until": 0.0, "checked_at": -math.inf}
+
+
+def remember(until: float) -> None:
+    toggle_state["until"] = until
+    toggle_state["checked_at"] = time.monotonic()
+
+
+async def enable(duration: float) -> None:
+    until = time.time() + duration
+    await Cache.backend.set(TOGGLE_KEY, until, max(1, math.ceil(duration)))
+    remember(until)
+
+
+async def disable() -> None:
+    await Cache.backend.delete(TOGGLE_KEY)
+    remember(0.0)
+
+
+async def enabled_until(fresh: bool = False) -> float:
+    """The toggle's deadline, from this process's last reading unless it is old or ``fresh``."""
+    if fresh or time.monotonic() - toggle_state["checked_at"] >= TOGGLE_CHECK_INTERVAL:
+        try:
+            remember(await Cache.backend.get(TOGGLE_KEY) or 0.0)
+        except Exception as e:
+            logger.warning(f"Could not read the profiling toggle: {e}")
+            # Keep the last reading until the next check
+            toggle_state["checked_at"] = time.monotonic()
+    return toggle_state["until"]
+
+
+async def should_profile(header: Optional[str]) -> bool:
+    if header is not None and PROFILE_TOKEN and header == PROFILE_TOKEN:
+        return True
+    if time.time() < await enabled_until():
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    """ASGI middleware sampling the process while a selected request runs.
+
+    The sampler sees every thread, so a profile taken while other requests
+    are in flight includes their stacks too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = None
+        for key, value in scope.get("headers", []):
+            if key == b"x-profile":
+                header = value.decode("latin-1")
+                break
+
+        if not await should_profile(header):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler(PROFILE_INTERVAL).start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            label = f"{scope['method']}-{scope['path'].strip('/')}"
+            try:
+                path = profiler.write(PROFILE_DIR, label, PROFILE_MAX_FILES)
+                if path:
+                    logger.info(f"Wrote profile of {profiler.samples} samples to {path}")
+            except OSError as e:
+                logger.error(f"Error writing profile for {label} - {e}")
@@ -0,0 +1,44 @@
+"""Request tracing: the shared span code, configured from ``.env``, and its ASGI middleware."""
+from tautaras_common import tracing
+from tautaras_common.tracing import current_span, current_traceparent, start_span
+
+from core.config.env_config import sttgs
+
+__all__ = ["TracingMiddleware", "current_span", "current_traceparent", "start_span"]
+
+tracing.configure(sttgs.get("TRACE_SERVICE_NAME", "tautaras-server"), sttgs.get("TRACE_EXPORT_PATH"))
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a span per request, continuing an incoming trace."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope.get("headers", []):
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        with start_span(f"{scope['method']} {scope['path']}", traceparent) as span:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    # Let clients correlate their request with the trace
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (b"traceparent", span.traceparent.encode("latin-1"))
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+            route = scope.get("route")
+            if route is not None:
+                span.name = f"{scope['method']} {route.path}"
@@ -1,13 +1,24 @@
 import re
 
+# Job ids are Celery task UUIDs; older jobs used 64 character hex digests
+TOKEN_ID_PATTERN = re.compile(
+    r"^(?:[a-fA-F0-9]{64}|[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12})$"
+)
+PRODUCT_ID_PATTERN = re.compile(r"^[A-Z0-9]{1,64}$")
+
 
 def validate_token_id(token_id: str):
-    if len(token_id) != 64 or not re.match(r"^[a-fA-F0-9]{64}$", token_id):
+    if not TOKEN_ID_PATTERN.match(token_id):
         raise ValueError("Invalid token_id format")
 
 
-def validate_str_params(product_name: str):
-    if len(product_name) > 100:
-        raise ValueError("Product name too long")
-    if not re.match(r"^[\w\s\-\_\d]+$", product_name):
-        raise ValueError("Invalid product_name format")
+def validate_product_id(product_id: str):
+    if not PRODUCT_ID_PATTERN.match(product_id):
+        raise ValueError("Invalid product_id format")
+
+
+def validate_str_params(value: str, name: str = "product_name"):
+    if len(value) > 100:
+        raise ValueError(f"{name} too long")
+    if not re.match(r"^[\w\s\-\_\d]+$", value):
+        raise ValueError(f"Invalid {name} format")
@@ -1,3 +1,7 @@
+import os
+import shutil
+import tempfile
+
 import uvicorn
 from typer import Typer, Option
 from typing import Optional
@@ -8,25 +12,82 @@ cli_app = Typer()
 
 port_help = "The port on which to run the Uvicorn server (default is 80)."
 auto_relode_help = "Enable auto-reload for the server (useful in development)."
+workers_help = "Number of server processes; 0 uses every CPU core (default is SERVER_WORKERS)."
+embedded_help = (
+    "Run without Elasticsearch, Redis or RabbitMQ: SQLite storage, an in-memory cache and "
+    "in-process extraction jobs, in one process (default is EMBEDDED)."
+)
+
+# Defaults for --embedded; any of them set in the environment wins
+EMBEDDED_SETTINGS = {
+    "STORAGE_BACKEND": "sqlite",
+    "CACHE_BACKEND": "memory",
+    "TASK_EXECUTOR": "inprocess",
+    # Read by the imported worker code, which would otherwise try Redis for every job
+    "SEEN_FILTER": "memory",
+}
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    if workers is None:
+        workers = int(sttgs.get("SERVER_WORKERS", 0))
+    return workers if workers > 0 else os.cpu_count() or 1
+
+
+def single_process() -> bool:
+    """The in-memory cache and the in-process queue are not shared between processes."""
+    return (
+        sttgs.get("CACHE_BACKEND", "redis").lower() == "memory"
+        or sttgs.get("TASK_EXECUTOR", "celery").lower() == "inprocess"
+    )
 
 
 @cli_app.command()
 def run_uvicorn_server(
     port: Optional[int] = Option(None, help=port_help),
     auto_reload_server: bool = Option(False, help=auto_relode_help),
+    workers: Optional[int] = Option(None, help=workers_help),
+    embedded: Optional[bool] = Option(None, help=embedded_help),
     host=sttgs.get("BACKEND_HOST"),
 ):
 
+    if embedded is None:
+        embedded = sttgs.get("EMBEDDED", "false").lower() == "true"
+    if embedded:
+        for key, value in EMBEDDED_SETTINGS.items():
+            os.environ.setdefault(key, value)
+
     backend_port = port if port else sttgs.get("BACKEND_PORT", 80)
+    # The reloader runs a single process
+    server_workers = 1 if auto_reload_server or single_process() else resolve_workers(workers)
 
-    uvicorn.run(
-        app="core.server:app",
-        reload=auto_reload_server,
-        port=backend_port,
-        workers=1,
-        host=host,
-    )
+    # Only a directory created here is removed on exit, never one the operator configured
+    created_metrics_dir = None
+    if server_workers > 1 and not sttgs.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Inherited by every worker process, so /metrics covers all of them
+        created_metrics_dir = tempfile.mkdtemp(prefix="tautaras_metrics_")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = created_metrics_dir
+
+    try:
+        uvicorn.run(
+            app="core.server:app",
+            reload=auto_reload_server,
+            port=int(backend_port),
+            workers=server_workers,
+            host=host,
+            # "auto" picks uvloop and httptools when they are installed
+            loop=sttgs.get("SERVER_LOOP", "auto"),
+            http=sttgs.get("SERVER_HTTP", "auto"),
+            backlog=int(sttgs.get("SERVER_BACKLOG", 2048)),
+            timeout_keep_alive=int(sttgs.get("SERVER_KEEP_ALIVE", 5)),
+            # On SIGTERM stop accepting, let in-flight requests finish, then close pools
+            timeout_graceful_shutdown=int(sttgs.get("SERVER_GRACEFUL_TIMEOUT", 30)),
+            access_log=sttgs.get("SERVER_ACCESS_LOG", "false").lower() == "true",
+        )
+    finally:
+        if created_metrics_dir:
+            shutil.rmtree(created_metrics_dir, ignore_errors=True)
 
 
 if __name__ == "__main__":
-    cli_app() 
+    cli_app()
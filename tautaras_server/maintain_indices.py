@@ -0,0 +1,36 @@
+"""Roll over and seal the time-partitioned review indices.
+
+Run it on a schedule, e.g. hourly from cron. Each run is cheap unless there
+is something to do: the write alias moves to a new partition once the
+current one reaches ``REVIEWS_ROLLOVER_MAX_AGE``, ``REVIEWS_ROLLOVER_MAX_SIZE``
+or ``REVIEWS_ROLLOVER_MAX_DOCS``, and every partition left behind is made
+read-only and force-merged once.
+
+    python maintain_indices.py
+    python maintain_indices.py --dry-run
+"""
+import json
+
+from typer import Option, Typer
+
+from core.config.log_config import setup_logging
+from core.infra.elasticstack import index_manager
+from core.infra.elasticstack.elastic import get_client
+
+cli_app = Typer()
+
+
+@cli_app.command()
+def maintain_indices(
+    dry_run: bool = Option(False, help="Report what would be rolled over and sealed without changing anything."),
+):
+    setup_logging()
+    # A dry run only needs a connection; a real one also installs the template and aliases
+    ready = get_client() is not None if dry_run else index_manager.bootstrap()
+    if not ready:
+        raise SystemExit(1)
+    print(json.dumps(index_manager.maintain(dry_run=dry_run), indent=2))
+
+
+if __name__ == "__main__":
+    cli_app()
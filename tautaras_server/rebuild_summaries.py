@@ -0,0 +1,44 @@
+"""Recompute the per-product review summaries from the stored reviews.
+
+Ingest keeps the summaries up to date on its own; run this once after
+upgrading, so products ingested earlier get one, or to repair a product
+whose numbers drifted.
+
+    python rebuild_summaries.py
+    python rebuild_summaries.py --site-name amazon --product-id B0ABC12345
+"""
+import asyncio
+import json
+from typing import Optional
+
+from typer import Option, Typer
+
+from api.utility.product_summary import rebuild_summaries
+from api.utility.review_utility import normalise_product_id, validate_site_name
+from core.config.log_config import setup_logging
+from core.infra.elasticstack.elastic import get_client
+
+cli_app = Typer()
+
+
+@cli_app.command()
+def rebuild(
+    site_name: Optional[str] = Option(None, help="Only products from this site."),
+    product_id: Optional[str] = Option(None, help="Only this product."),
+):
+    setup_logging()
+    if get_client() is None:
+        raise SystemExit(1)
+    rebuilt, failed = asyncio.run(
+        rebuild_summaries(
+            site_name=validate_site_name(site_name) if site_name else None,
+            product_id=normalise_product_id(product_id),
+        )
+    )
+    print(json.dumps({"rebuilt": rebuilt, "failed": failed}, indent=2))
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    cli_app()
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+# Settings are read when the app modules are imported, so they go first.
+# Reviews are stored in the embedded SQLite store and the cache is in memory.
+os.environ.setdefault("REDIS_HOST", "redis://127.0.0.1:6379")
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["PRELOAD_HEAVY_IMPORTS"] = "false"
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_BAKCEND_URI", "cache+memory://")
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A fresh SQLite store with the review partitions and products index in place."""
+    from core.infra.elasticstack import elastic, index_manager
+    from core.infra.elasticstack.mappings import PRODUCT_MAPPINGS
+    from core.infra.embedded.sqlite_store import SqliteStore
+
+    elastic.client = SqliteStore(str(tmp_path / "tautaras.db"))
+    index_manager.invalidate_partitions()
+    index_manager.bootstrap()
+    elastic.ensure_index("products", PRODUCT_MAPPINGS)
+    yield elastic.client
+    elastic.close_client()
+    index_manager.invalidate_partitions()
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    from api.v1.crawler import review
+    from core.infra.cache.cache_manager import Cache
+    from core.infra.cache.memory_backend import MemoryBackend
+
+    Cache.init(backend=MemoryBackend())
+    review.known_products = MemoryBackend(max_entries=10000)
@@ -0,0 +1,126 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from api.utility import admission
+from api.v1.crawler import batch
+from core.models.dto.crawler.reviews import ExtractBatchRequest
+
+
+def client_request(host="10.0.0.1"):
+    return SimpleNamespace(client=SimpleNamespace(host=host))
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    """A broker with ``depth`` waiting jobs and ``workers`` consumers of two processes each."""
+    broker = {"depth": 0, "workers": 2}
+
+    def queue_depth():
+        if broker["depth"] is None:
+            raise ConnectionError("Broker is unavailable")
+        return broker["depth"], broker["workers"]
+
+    monkeypatch.setattr(admission, "queue_depth", queue_depth)
+    monkeypatch.setattr(admission, "worker_concurrency", lambda consumers: consumers * 2)
+    # Four processes at a job a minute each: 20 jobs fit in a five minute wait
+    monkeypatch.setattr(admission, "JOB_SECONDS", 60)
+    monkeypatch.setattr(admission, "MAX_WAIT", 300)
+    monkeypatch.setattr(admission, "MAX_QUEUE_DEPTH", 0)
+    monkeypatch.setattr(admission, "queue_state", None)
+    monkeypatch.setattr(admission, "capacity_state", None)
+    return broker
+
+
+@pytest.fixture
+def rate_limit(monkeypatch):
+    monkeypatch.setattr(admission, "RATE_LIMIT_PER_MINUTE", 60)
+    monkeypatch.setattr(admission, "RATE_LIMIT_BURST", 10)
+
+
+def test_rate_limit_allows_a_burst(rate_limit):
+    async def scenario():
+        for _ in range(10):
+            await admission.check_rate_limit(client_request())
+        with pytest.raises(HTTPException) as raised:
+            await admission.check_rate_limit(client_request())
+        assert raised.value.status_code == 429
+        # Other clients have their own bucket
+        await admission.check_rate_limit(client_request("10.0.0.2"))
+
+    asyncio.run(scenario())
+
+
+def test_rate_limit_charges_at_most_a_full_bucket(rate_limit):
+    async def scenario():
+        await admission.check_rate_limit(client_request(), cost=500)
+        with pytest.raises(HTTPException) as raised:
+            await admission.check_rate_limit(client_request())
+        # One token a second refills; no debt from the 490 over the burst
+        assert raised.value.headers["Retry-After"] == "1"
+
+    asyncio.run(scenario())
+
+
+def test_admit_jobs_holds_back_what_does_not_fit(queue):
+    queue["depth"] = 10
+
+    admitted = asyncio.run(admission.admit_jobs(15))
+
+    assert admitted["admitted"] == 10
+    # 25 jobs for a limit of 20 at four a minute
+    assert admitted["retry_after"] == 75
+    assert admitted["estimated_start"]
+
+
+def test_sent_jobs_count_against_the_queue(queue):
+    assert asyncio.run(admission.admit_jobs(20))["admitted"] == 20
+    # Nothing was sent, so nothing is counted
+    assert asyncio.run(admission.admit_jobs(20))["admitted"] == 20
+
+    admission.count_admitted(15)
+
+    assert asyncio.run(admission.admit_jobs(20))["admitted"] == 5
+
+
+def test_admit_jobs_without_workers(queue):
+    queue["workers"] = 0
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(admission.admit_jobs(1))
+    assert raised.value.status_code == 503
+
+
+def test_admit_jobs_when_the_broker_cannot_be_read(queue):
+    queue["depth"] = None
+
+    assert asyncio.run(admission.admit_jobs(50))["admitted"] == 50
+
+
+def test_batch_charges_only_admitted_pages(queue, rate_limit, monkeypatch):
+    queue["depth"] = 16
+    monkeypatch.setattr(batch, "job_states", lambda ids: [])
+    monkeypatch.setattr(
+        batch, "dispatch_jobs", lambda payloads, traceparent: [f"job-{n}" for n in range(len(payloads))]
+    )
+    urls = [f"https://www.flipkart.com/phone-{n}/p/itm{n:06d}?pid=PID{n:06d}" for n in range(8)]
+    http_request = Request({"type": "http", "client": ("10.0.0.1", 0), "headers": []})
+
+    async def scenario():
+        response = await batch.extract_reviews_batch(ExtractBatchRequest(urls=urls), http_request)
+        # Four pages fit; the rest were not charged, so six more requests go through
+        for _ in range(6):
+            await admission.check_rate_limit(client_request())
+        with pytest.raises(HTTPException):
+            await admission.check_rate_limit(client_request())
+        return response
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert response.headers["Retry-After"]
+    body = json.loads(response.body)
+    assert (body["submitted"], body["deferred"]) == (4, 4)
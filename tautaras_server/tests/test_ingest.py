@@ -0,0 +1,136 @@
+import asyncio
+
+from api.v1.crawler.review import prepare_reviews, store_reviews
+from core.infra.elasticstack.elastic import read_document
+from tautaras_common.review_identity import compute_review_id
+
+
+def make_review(title, posted_at="2024-05-01"):
+    return {
+        "token_id": "job-1",
+        "product_id": "ITM123",
+        "product_name": "Test phone",
+        "site_name": "flipkart",
+        "rating": 4,
+        "title": title,
+        "description": f"{title} description",
+        "posted_at": posted_at,
+        "reviewer": "Asha",
+        "reviewer_details": {"location": "Pune"},
+    }
+
+
+def test_prepare_reviews_keeps_undated_reviews():
+    documents = prepare_reviews([make_review("No date", posted_at=None)], "2024-06-01T00:00:00")
+
+    assert len(documents) == 1
+    assert documents[0][1]["posted_at"] is None
+
+
+def test_store_reviews_stores_undated_reviews(store):
+    reviews = [make_review("Dated"), make_review("Undated", posted_at=None)]
+
+    stored = asyncio.run(store_reviews(reviews))
+
+    assert stored == {"created": 2, "duplicates": 0, "errors": 0, "summary_errors": 0}
+
+
+def test_failed_summary_update_is_recounted_on_redelivery(store):
+    reviews = [make_review("First"), make_review("Second")]
+    store.indices.add_block(index="products", block="write")
+
+    stored = asyncio.run(store_reviews([dict(review) for review in reviews]))
+    assert stored["created"] == 2
+    assert stored["summary_errors"] == 1
+
+    with store.transaction() as db:
+        db.execute("UPDATE indices SET blocks = '[]' WHERE name = 'products'")
+    # The worker posts the page again after the 503
+    stored = asyncio.run(store_reviews([dict(review) for review in reviews]))
+    assert stored["duplicates"] == 2
+    assert stored["summary_errors"] == 0
+
+    summary = asyncio.run(read_document("products", "flipkart:ITM123"))
+    assert summary["review_count"] == 2
+    assert summary["rating_counts"] == {"4": 2}
+
+
+def test_failed_dedup_check_fails_the_batch(store, monkeypatch):
+    from core.infra.elasticstack import index_manager
+
+    asyncio.run(store_reviews([make_review("First")]))
+    store.indices.rollover(alias=index_manager.WRITE_ALIAS, conditions={"max_docs": 1})
+    index_manager.invalidate_partitions()
+
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("Elasticsearch is unavailable")
+
+    monkeypatch.setattr(store, "search", unavailable)
+    stored = asyncio.run(store_reviews([make_review("First"), make_review("Second")]))
+
+    # Nothing is written unchecked; the worker delivers the page again
+    assert stored["errors"] == 2
+    assert stored["created"] == 0
+
+
+def test_redelivered_page_is_counted_as_duplicates(store):
+    reviews = [make_review("First"), make_review("Second")]
+
+    asyncio.run(store_reviews([dict(review) for review in reviews]))
+    stored = asyncio.run(store_reviews([dict(review) for review in reviews]))
+
+    assert stored == {"created": 0, "duplicates": 2, "errors": 0, "summary_errors": 0}
+    summary = asyncio.run(read_document("products", "flipkart:ITM123"))
+    assert summary["review_count"] == 2
+
+
+def test_repeated_review_in_a_page_is_stored_once(store):
+    stored = asyncio.run(store_reviews([make_review("Same"), make_review("Same")]))
+
+    assert stored["created"] == 1
+    assert stored["duplicates"] == 1
+
+
+def test_reviews_in_older_partitions_are_not_stored_again(store):
+    from core.infra.elasticstack import index_manager
+
+    asyncio.run(store_reviews([make_review("First")]))
+    store.indices.rollover(alias=index_manager.WRITE_ALIAS, conditions={"max_docs": 1})
+    index_manager.invalidate_partitions()
+
+    stored = asyncio.run(store_reviews([make_review("First"), make_review("Second")]))
+
+    assert stored["created"] == 1
+    assert stored["duplicates"] == 1
+    summary = asyncio.run(read_document("products", "flipkart:ITM123"))
+    assert summary["review_count"] == 2
+
+
+def test_review_id_is_computed_when_missing():
+    review = make_review("No id")
+    documents = prepare_reviews([dict(review, review_id="not-an-id")], "2024-06-01T00:00:00")
+
+    assert documents[0][0] == compute_review_id(review)
+
+
+def test_ingest_answers_503_until_the_page_is_stored(store, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api.v1.crawler import review
+
+    app = FastAPI()
+    app.include_router(review.reviews_router, prefix="/reviews")
+    client = TestClient(app)
+
+    async def failed_write(index, documents, **kwargs):
+        return [], 0, len(documents)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(review, "bulk_create_documents", failed_write)
+        assert client.post("/reviews/ingest", json=[make_review("First")]).status_code == 503
+
+    # The worker delivers the page again
+    response = client.post("/reviews/ingest", json=[make_review("First")])
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
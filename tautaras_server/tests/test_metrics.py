@@ -0,0 +1,17 @@
+import subprocess
+import sys
+
+from core.infra.metrics import metrics
+
+
+def test_exited_processes_are_marked_dead(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    pid = int(exited.stdout)
+    (tmp_path / f"gauge_livesum_{pid}.db").touch()
+    (tmp_path / f"histogram_{pid}.db").touch()
+
+    metrics.mark_exited_processes_dead()
+
+    # Live gauges go with the process, everything else still counts
+    assert sorted(path.name for path in tmp_path.iterdir()) == [f"histogram_{pid}.db"]
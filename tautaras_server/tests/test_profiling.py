@@ -0,0 +1,25 @@
+import asyncio
+import math
+import time
+
+from core.utility import profiling
+
+
+def forget_toggle():
+    # What a server process that did not handle the toggle request knows
+    profiling.toggle_state.update(until=0.0, checked_at=-math.inf)
+
+
+def test_toggle_is_read_from_the_shared_cache():
+    async def scenario():
+        await profiling.enable(60)
+        forget_toggle()
+        assert await profiling.enabled_until() > time.time()
+        assert await profiling.should_profile(None)
+
+        await profiling.disable()
+        forget_toggle()
+        assert await profiling.enabled_until() == 0.0
+
+    asyncio.run(scenario())
+    forget_toggle()
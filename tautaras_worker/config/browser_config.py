@@ -0,0 +1,125 @@
+from typing import List
+
+from config.env_config import sttgs
+
+# Resource types that are never needed to read review text
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.avif",
+    "*.svg",
+    "*.ico",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.mp4",
+    "*.webm",
+    "*.mp3",
+]
+
+# Ad and tracker hosts; site CDNs are left alone since they serve the page scripts
+BLOCKED_DOMAIN_PATTERNS = [
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*googleadservices.com*",
+    "*facebook.net*",
+    "*facebook.com/tr*",
+    "*amazon-adsystem.com*",
+    "*scorecardresearch.com*",
+    "*hotjar.com*",
+    "*criteo.com*",
+    "*branch.io*",
+]
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = sttgs.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_list(name: str) -> List[str]:
+    value = sttgs.get(name, "")
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class BrowserProfile:
+    """Chrome settings for the review crawl, read from the environment.
+
+    The defaults form the lean profile: headless, ``eager`` page loads (return
+    at DOMContentLoaded instead of waiting for every image and ad), no
+    extensions and no images, media, fonts or tracker requests.
+    """
+
+    def __init__(
+        self,
+        headless: bool = True,
+        page_load_strategy: str = "eager",
+        block_resources: bool = True,
+        blocked_domains: List[str] = None,
+        disable_extensions: bool = True,
+        wait_timeout: int = 10,
+        page_load_timeout: int = 30,
+        window_size: str = "1366,768",
+    ):
+        self.headless = headless
+        self.page_load_strategy = page_load_strategy
+        self.block_resources = block_resources
+        self.blocked_domains = blocked_domains or []
+        self.disable_extensions = disable_extensions
+        self.wait_timeout = wait_timeout
+        self.page_load_timeout = page_load_timeout
+        self.window_size = window_size
+
+    @classmethod
+    def from_env(cls) -> "BrowserProfile":
+        return cls(
+            headless=env_bool("BROWSER_HEADLESS", True),
+            page_load_strategy=sttgs.get("BROWSER_PAGE_LOAD_STRATEGY", "eager"),
+            block_resources=env_bool("BROWSER_BLOCK_RESOURCES", True),
+            blocked_domains=env_list("BROWSER_BLOCKED_DOMAINS"),
+            disable_extensions=env_bool("BROWSER_DISABLE_EXTENSIONS", True),
+            wait_timeout=int(sttgs.get("BROWSER_WAIT_TIMEOUT", 10)),
+            page_load_timeout=int(sttgs.get("BROWSER_PAGE_LOAD_TIMEOUT", 30)),
+            window_size=sttgs.get("BROWSER_WINDOW_SIZE", "1366,768"),
+        )
+
+    def blocked_url_patterns(self) -> List[str]:
+        if not self.block_resources:
+            return []
+        return BLOCKED_RESOURCE_PATTERNS + BLOCKED_DOMAIN_PATTERNS + self.blocked_domains
+
+    def chrome_arguments(self) -> List[str]:
+        arguments = [
+            f"--window-size={self.window_size}",
+            "--no-sandbox",
+            "--disable-dev-shm-usage",
+            "--disable-gpu",
+            "--disable-background-networking",
+            "--disable-default-apps",
+            "--disable-sync",
+            "--mute-audio",
+            "--no-first-run",
+        ]
+        if self.headless:
+            arguments.append("--headless=new")
+        if self.disable_extensions:
+            arguments.append("--disable-extensions")
+        if self.block_resources:
+            arguments.append("--blink-settings=imagesEnabled=false")
+        return arguments
+
+    def chrome_prefs(self) -> dict:
+        if not self.block_resources:
+            return {}
+        return {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        }
@@ -0,0 +1,19 @@
+"""Worker logging: the shared queued logging, configured from ``.env`` (see "Logging" in the readme).
+
+Replaces Celery's own logging setup (see ``tasks.py``) and routes its loggers
+through the queue. Each pool process starts its own listener, since threads
+do not survive the fork.
+"""
+from tautaras_common import log_config
+
+from config.env_config import sttgs
+
+
+def setup_logging(loglevel=None):
+    log_config.setup_logging(
+        level=loglevel or sttgs.get("LOG_LEVEL", "INFO"),
+        log_format=sttgs.get("LOG_FORMAT", "json"),
+        rate_limit=int(sttgs.get("LOG_RATE_LIMIT", 20)),
+        rate_interval=float(sttgs.get("LOG_RATE_INTERVAL", 1)),
+        routed_loggers=("celery", "celery.task", "celery.redirected"),
+    )
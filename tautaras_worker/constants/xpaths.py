@@ -5,9 +5,19 @@ XPATHS = {
         "title": ".//div[@class='row']/p[@class='z9E0IG']",
         "description": ".//div[@class='ZmyHeo']/div/div",
         "reviewer": ".//p[@class='_2NsDsF AwS1CA']",
-        "posted_at": '//*[@class="row gHqwa8"]//p[@class="_2NsDsF"]',
+        "posted_at": './/*[@class="row gHqwa8"]//p[@class="_2NsDsF"]',
         "reviewer_location": ".//p[@class='_2NsDsF AwS1CA']/following-sibling::p/span[2]",
-        "pagination": "//a[span[text()='Next']]",
+        "pagination": "//a[span[text()='Next']]/@href",
+    },
+    "amazon": {
+        "reviews_container": "//div[@data-hook='review']",
+        "rating": ".//*[@data-hook='review-star-rating' or @data-hook='cmps-review-star-rating']/span",
+        "title": ".//*[@data-hook='review-title']/span[not(@class)]",
+        "description": ".//span[@data-hook='review-body']",
+        "reviewer": ".//span[@class='a-profile-name']",
+        "posted_at": ".//span[@data-hook='review-date']",
+        "reviewer_location": ".//span[@data-hook='review-date']",
+        "product_name": "//a[@data-hook='product-link']",
+        "pagination": "//ul[contains(@class, 'a-pagination')]/li[contains(@class, 'a-last')]/a/@href",
     },
-    "amazon": {},
 }
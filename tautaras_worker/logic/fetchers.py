@@ -0,0 +1,224 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Optional
+
+import requests
+
+from config.browser_config import BrowserProfile
+from logic.proxy_pool import ProxyPool, get_proxy_pool
+from utility.decorators import retry_on_failure
+from utility.metrics import BROWSERS_ACTIVE
+from utility.tracing import start_span
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-GB,en-US;q=0.9,en;q=0.8",
+}
+
+# Responses that mean the site is refusing this IP rather than failing
+BAN_STATUS_CODES = (403, 429, 503)
+
+
+class BaseFetcher(ABC):
+    """Fetches a page and returns its HTML; used as a context manager per job.
+
+    With a proxy pool, requests go out through a pooled proxy and every fetch
+    reports its outcome back so the pool can score proxies. ``sticky_key``
+    pins the job to one proxy for as long as it stays healthy.
+    """
+
+    def __init__(self, proxy_pool: Optional[ProxyPool] = None, sticky_key: Optional[str] = None):
+        self.proxy_pool = proxy_pool
+        self.sticky_key = sticky_key
+        self.proxy = None
+        # Set by a fetch that got a page; reported once the page is known not to be a block page
+        self.fetch_latency = None
+
+    def acquire_proxy(self) -> Optional[str]:
+        self.proxy = self.proxy_pool.acquire(self.sticky_key) if self.proxy_pool else None
+        return self.proxy
+
+    def fetched(self, started: float) -> None:
+        self.fetch_latency = time.perf_counter() - started
+
+    def report_success(self) -> None:
+        """Called when the fetched page turned out to be a real page."""
+        if self.proxy_pool and self.fetch_latency is not None:
+            self.proxy_pool.report_success(self.proxy, self.fetch_latency)
+        self.fetch_latency = None
+
+    def report_failure(self, banned: bool = False) -> None:
+        self.fetch_latency = None
+        if self.proxy_pool:
+            self.proxy_pool.report_failure(self.proxy, banned, self.sticky_key)
+
+    def report_blocked(self) -> None:
+        """Called when the fetched page turned out to be a block or captcha page."""
+        self.report_failure(banned=True)
+
+    @abstractmethod
+    def fetch(self, url: str, wait_xpath: Optional[str] = None) -> str:
+        """Return the page's HTML, once ``wait_xpath`` is present if given."""
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class BrowserFetcher(BaseFetcher):
+    def __init__(
+        self,
+        profile: Optional[BrowserProfile] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+        sticky_key: Optional[str] = None,
+    ):
+        super().__init__(proxy_pool, sticky_key)
+        self.profile = profile or BrowserProfile.from_env()
+        self.start_driver()
+
+    def start_driver(self) -> None:
+        # Selenium is only imported by browser jobs; HTTP-only workers never load it
+        from selenium import webdriver
+
+        # Chrome takes its proxy at launch, so a browser keeps one proxy for its life
+        self.driver = webdriver.Chrome(options=self.build_options(self.acquire_proxy()))
+        BROWSERS_ACTIVE.inc()
+        self.driver.set_page_load_timeout(self.profile.page_load_timeout)
+        self.block_requests()
+
+    def build_options(self, proxy: Optional[str] = None) -> "webdriver.ChromeOptions":
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
+        options.page_load_strategy = self.profile.page_load_strategy
+        for argument in self.profile.chrome_arguments():
+            options.add_argument(argument)
+        if proxy:
+            options.add_argument(f"--proxy-server={proxy}")
+        prefs = self.profile.chrome_prefs()
+        if prefs:
+            options.add_experimental_option("prefs", prefs)
+        return options
+
+    def block_requests(self) -> None:
+        patterns = self.profile.blocked_url_patterns()
+        if not patterns:
+            return
+        # DevTools request blocking drops these before they hit the network
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+    @retry_on_failure
+    def navigate_to_url(self, url: str):
+        from selenium.common.exceptions import TimeoutException
+
+        try:
+            self.driver.get(url)
+        except TimeoutException:
+            # Page load budget spent; keep whatever DOM has arrived
+            logger.warning(f"Page load timed out for URL: {url}, stopping load")
+            self.driver.execute_script("window.stop();")
+
+    def fetch(self, url: str, wait_xpath: Optional[str] = None) -> str:
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait as wait
+
+        started = time.perf_counter()
+        with start_span("browser.navigate", url=url):
+            self.navigate_to_url(url)
+        if wait_xpath:
+            try:
+                # Wait until the reviews container is loaded
+                with start_span("browser.wait"):
+                    wait(self.driver, self.profile.wait_timeout).until(
+                        EC.presence_of_element_located((By.XPATH, wait_xpath))
+                    )
+            except TimeoutException as te:
+                # Still hand back the page, it may hold the "Next" link
+                logger.error(f"Timeout error while loading URL: {url} - {te}")
+                self.report_failure()
+                return self.driver.page_source
+        self.fetched(started)
+        return self.driver.page_source
+
+    def report_blocked(self) -> None:
+        super().report_blocked()
+        if self.proxy_pool:
+            # Relaunch through a different proxy
+            self.close()
+            self.start_driver()
+
+    def close(self) -> None:
+        # Also called after a relaunch that failed, with no browser left to quit
+        if self.driver is None:
+            return
+        self.driver.quit()
+        self.driver = None
+        BROWSERS_ACTIVE.dec()
+
+
+class HttpFetcher(BaseFetcher):
+    def __init__(
+        self,
+        timeout: int = 15,
+        proxy_pool: Optional[ProxyPool] = None,
+        sticky_key: Optional[str] = None,
+    ):
+        super().__init__(proxy_pool, sticky_key)
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.timeout = timeout
+
+    @retry_on_failure
+    def fetch(self, url: str, wait_xpath: Optional[str] = None) -> str:
+        proxy = self.acquire_proxy()
+        proxies = {"http": proxy, "https": proxy} if proxy else None
+        started = time.perf_counter()
+        try:
+            with start_span("http.get", url=url, proxy=bool(proxy)) as span:
+                response = self.session.get(url, timeout=self.timeout, proxies=proxies)
+                span.set_attribute("http.status_code", response.status_code)
+        except requests.RequestException:
+            self.report_failure()
+            raise
+
+        if response.status_code in BAN_STATUS_CODES:
+            self.report_failure(banned=True)
+        elif response.ok:
+            self.fetched(started)
+        response.raise_for_status()
+        return response.text
+
+    def close(self) -> None:
+        self.session.close()
+
+
+FETCHERS = {
+    "browser": BrowserFetcher,
+    "http": HttpFetcher,
+}
+
+
+def get_fetcher(fetch_mode: str, sticky_key: Optional[str] = None) -> BaseFetcher:
+    fetcher_cls = FETCHERS.get(fetch_mode)
+    if not fetcher_cls:
+        raise ValueError(f"Unknown fetch mode: {fetch_mode}")
+    return fetcher_cls(proxy_pool=get_proxy_pool(), sticky_key=sticky_key)
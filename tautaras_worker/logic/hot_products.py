@@ -0,0 +1,193 @@
+"""Background refresh of the products clients ask about most.
+
+The server counts requests per product in one Redis sorted set per day
+(``popularity::<date>``). Every successful crawl leaves a ``crawl::<product
+id>`` record with what is needed to crawl it again and when it should be.
+``refresh`` runs from Celery beat: inside the configured off-peak windows,
+and while the queue is short, it queues incremental crawls for the hottest
+products that are due.
+
+Each product has its own interval. A refresh that finds new reviews halves
+it, one that finds none doubles it, within ``REFRESH_INTERVAL_MIN`` and
+``REFRESH_INTERVAL_MAX``, so busy products are re-crawled often and quiet
+ones rarely. Product ids are unique across the supported sites (10 character
+ASINs, 16 character Flipkart ids), so they key the records on their own.
+"""
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Tuple
+
+import redis
+
+from config.env_config import sttgs
+
+logger = logging.getLogger(__name__)
+
+POPULARITY_DAYS = int(sttgs.get("POPULARITY_DAYS", 7))
+REFRESH_TOP_N = int(sttgs.get("REFRESH_TOP_N", 200))
+REFRESH_MIN_SCORE = float(sttgs.get("REFRESH_MIN_SCORE", 5))
+REFRESH_MAX_PER_RUN = int(sttgs.get("REFRESH_MAX_PER_RUN", 50))
+REFRESH_INTERVAL_MIN = int(sttgs.get("REFRESH_INTERVAL_MIN", 60 * 60))
+REFRESH_INTERVAL_MAX = int(sttgs.get("REFRESH_INTERVAL_MAX", 7 * 24 * 60 * 60))
+# Skip a run while more messages than this are waiting, so requested crawls go first
+REFRESH_MAX_QUEUE = int(sttgs.get("REFRESH_MAX_QUEUE", 100))
+# Comma separated UTC hour ranges, e.g. "22:00-06:00"; empty for any time
+REFRESH_WINDOWS = sttgs.get("REFRESH_WINDOWS", "")
+# A queued refresh holds the product this long, or until its crawl finishes
+REFRESH_LOCK_TTL = int(sttgs.get("REFRESH_LOCK_TTL", 2 * 60 * 60))
+# Crawl records of products nobody asks about expire
+CRAWL_RECORD_TTL = int(sttgs.get("CRAWL_RECORD_TTL", 30 * 24 * 60 * 60))
+
+client = None
+
+
+def get_client() -> redis.Redis:
+    global client
+    if client is None:
+        client = redis.Redis.from_url(sttgs.get("REDIS_HOST"))
+    return client
+
+
+def crawl_key(product_id: str) -> str:
+    return f"crawl::{product_id}"
+
+
+def refreshing_key(product_id: str) -> str:
+    return f"refreshing::{product_id}"
+
+
+def parse_windows(windows: str) -> List[Tuple[int, int]]:
+    """``"22:00-06:00,13:00-14:00"`` -> minutes of the day, ``[(1320, 360), (780, 840)]``."""
+    parsed = []
+    for window in filter(None, (part.strip() for part in windows.split(","))):
+        start, end = (
+            int(hours) * 60 + int(minutes)
+            for hours, minutes in (bound.split(":") for bound in window.split("-"))
+        )
+        parsed.append((start, end))
+    return parsed
+
+
+def in_refresh_window(now: datetime, windows: List[Tuple[int, int]]) -> bool:
+    if not windows:
+        return True
+    minute = now.hour * 60 + now.minute
+    for start, end in windows:
+        # A window that ends before it starts runs past midnight
+        if start <= minute < end if start <= end else minute >= start or minute < end:
+            return True
+    return False
+
+
+def next_interval(previous: Optional[int], new_reviews: int) -> int:
+    if not previous:
+        return REFRESH_INTERVAL_MIN
+    interval = previous // 2 if new_reviews else previous * 2
+    return max(REFRESH_INTERVAL_MIN, min(REFRESH_INTERVAL_MAX, interval))
+
+
+def crawl_record(data: dict, result: dict, job_id: str, previous: dict) -> dict:
+    """What is kept of a finished crawl: how to crawl again, and when."""
+    stored = result.get("stored", 0)
+    return {
+        "url": data["url"],
+        "platform": data["platform"],
+        "callback_url": data["callback_url"],
+        "job_id": job_id,
+        "refreshed_at": datetime.now(timezone.utc).isoformat(),
+        "new_reviews": stored,
+        # A first or full crawl starts the schedule over
+        "interval": next_interval(previous.get("interval") if result.get("incremental") else None, stored),
+    }
+
+
+def record_crawl(data: dict, result: dict, job_id: str) -> None:
+    """Remember a finished crawl so the product can be refreshed and served while fresh."""
+    product_id = (result.get("product_id") or "").strip().upper()
+    if not product_id:
+        return
+    try:
+        redis_client = get_client()
+        previous = redis_client.get(crawl_key(product_id))
+        record = crawl_record(data, result, job_id, json.loads(previous) if previous else {})
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(crawl_key(product_id), json.dumps(record), ex=CRAWL_RECORD_TTL)
+        pipe.delete(refreshing_key(product_id))
+        pipe.execute()
+        logger.info(
+            f"Recorded crawl of {product_id}: {record['new_reviews']} new reviews, "
+            f"next refresh in {record['interval']}s"
+        )
+    except Exception as e:
+        logger.error(f"Error recording crawl of {product_id}: {e}")
+
+
+def hot_products(redis_client: redis.Redis, now: datetime) -> List[Tuple[str, float]]:
+    """Most requested products over the last days, each day counting half the one after."""
+    keys = {
+        f"popularity::{(now - timedelta(days=age)).date().isoformat()}": 0.5**age
+        for age in range(POPULARITY_DAYS)
+    }
+    redis_client.zunionstore("popularity::hot", keys)
+    redis_client.expire("popularity::hot", 60 * 60)
+    products = redis_client.zrevrangebyscore(
+        "popularity::hot", "+inf", REFRESH_MIN_SCORE, start=0, num=REFRESH_TOP_N, withscores=True
+    )
+    return [(product_id.decode(), score) for product_id, score in products]
+
+
+def is_due(record: dict, now: datetime) -> bool:
+    refreshed_at = datetime.fromisoformat(record["refreshed_at"])
+    return (now - refreshed_at).total_seconds() >= record.get("interval", REFRESH_INTERVAL_MIN)
+
+
+def refresh(enqueue: Callable[[dict, str], None], queue_depth: Callable[[], int]) -> dict:
+    """Queue incremental crawls of the hottest due products; returns what was done."""
+    now = datetime.now(timezone.utc)
+    if not in_refresh_window(now, parse_windows(REFRESH_WINDOWS)):
+        return {"skipped": "outside refresh windows"}
+    depth = queue_depth()
+    if depth > REFRESH_MAX_QUEUE:
+        logger.info(f"Skipping product refresh: {depth} messages waiting")
+        return {"skipped": f"{depth} messages waiting"}
+
+    started = time.perf_counter()
+    redis_client = get_client()
+    hot = hot_products(redis_client, now)
+    if not hot:
+        return {"hot": 0, "queued": []}
+    records = redis_client.mget([crawl_key(product_id) for product_id, _ in hot])
+
+    queued = []
+    for (product_id, score), record in zip(hot, records):
+        if len(queued) >= REFRESH_MAX_PER_RUN:
+            break
+        # Never crawled: nothing to refresh until someone submits it
+        if not record:
+            continue
+        record = json.loads(record)
+        if not is_due(record, now):
+            continue
+        job_id = str(uuid.uuid4())
+        # Whoever holds the lock (this run, or the API revalidating) crawls the product
+        if not redis_client.set(
+            refreshing_key(product_id), json.dumps({"job_id": job_id}), nx=True, ex=REFRESH_LOCK_TTL
+        ):
+            continue
+        data = {
+            "url": record["url"],
+            "platform": record["platform"],
+            "callback_url": record["callback_url"],
+            "incremental": True,
+        }
+        enqueue(data, job_id)
+        queued.append(product_id)
+
+    logger.info(
+        f"Queued {len(queued)} refreshes out of {len(hot)} hot products "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return {"hot": len(hot), "queued": queued}
@@ -0,0 +1,39 @@
+from typing import Dict, Type
+
+from logic.platforms.base import BasePlatform, ParsedPage, PRODUCT_NAME_NOT_FOUND
+
+# One instance per platform per process; selectors are compiled on registration.
+PLATFORMS: Dict[str, BasePlatform] = {}
+
+
+def register_platform(cls: Type[BasePlatform]) -> Type[BasePlatform]:
+    PLATFORMS[cls.name] = cls()
+    return cls
+
+
+def get_platform(name: str) -> BasePlatform:
+    platform = PLATFORMS.get((name or "").lower())
+    if not platform:
+        raise ValueError(f"Unknown platform: {name}")
+    return platform
+
+
+def platform_for_url(url: str) -> BasePlatform:
+    for platform in PLATFORMS.values():
+        if platform.matches(url):
+            return platform
+    raise ValueError(f"Unsupported platform URL: {url}")
+
+
+# Importing the modules registers their platforms
+from logic.platforms import amazon, flipkart  # noqa: E402,F401
+
+__all__ = [
+    "BasePlatform",
+    "ParsedPage",
+    "PLATFORMS",
+    "PRODUCT_NAME_NOT_FOUND",
+    "get_platform",
+    "platform_for_url",
+    "register_platform",
+]
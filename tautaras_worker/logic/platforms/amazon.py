@@ -0,0 +1,84 @@
+import logging
+import re
+from typing import Any, Dict, Optional
+from urllib.parse import unquote, urlparse
+
+from logic.platforms import register_platform
+from logic.platforms.base import BasePlatform, PRODUCT_NAME_NOT_FOUND
+
+logger = logging.getLogger(__name__)
+
+ASIN_PATTERN = re.compile(r"/(?:dp|gp/product|gp/aw/d|product-reviews)/([A-Z0-9]{10})")
+RATING_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)")
+# e.g. "Reviewed in India on 3 October 2024"
+REVIEW_DATE_PATTERN = re.compile(r"Reviewed in (?P<location>.+?) on (?P<date>.+)$")
+NON_NAME_SEGMENTS = {"dp", "gp", "product-reviews"}
+BLOCK_PAGE_MARKERS = (
+    "/errors/validateCaptcha",
+    "Enter the characters you see below",
+    "api-services-support@amazon.com",
+)
+
+
+@register_platform
+class AmazonPlatform(BasePlatform):
+    name = "amazon"
+    hosts = re.compile(
+        r"^(?:[\w-]+\.)*amazon\."
+        r"(?:com|in|ca|de|fr|it|es|nl|se|pl|sg|ae|sa|eg|co\.uk|co\.jp|com\.au|com\.br|com\.mx|com\.tr|com\.be)$"
+    )
+    # Review listings are server rendered, so plain HTTP is enough
+    fetch_mode = "http"
+
+    def extract_product_id(self, url: str) -> Optional[str]:
+        match = ASIN_PATTERN.search(urlparse(url).path)
+        return match.group(1) if match else None
+
+    def extract_product_name(self, url: str) -> str:
+        try:
+            path_segments = urlparse(url).path.split("/")
+            product_name = path_segments[1] if len(path_segments) >= 3 else None
+            if product_name in NON_NAME_SEGMENTS:
+                product_name = None
+            if product_name:
+                product_name = unquote(product_name).replace("-", " ").title()
+            return product_name if product_name else PRODUCT_NAME_NOT_FOUND
+        except Exception as e:
+            logger.error(f"Error extracting product name from Amazon URL: {url} - {e}")
+            return PRODUCT_NAME_NOT_FOUND
+
+    def reviews_url(self, url: str) -> str:
+        asin = self.extract_product_id(url)
+        if not asin or "/product-reviews/" in url:
+            return url
+        parsed_url = urlparse(url)
+        return (
+            f"{parsed_url.scheme}://{parsed_url.netloc}/product-reviews/{asin}/"
+            "?reviewerType=all_reviews&pageNumber=1"
+        )
+
+    def recent_reviews_url(self, url: str) -> str:
+        return self.with_query(self.reviews_url(url), sortBy="recent", pageNumber="1")
+
+    def is_blocked(self, html: str) -> bool:
+        return any(marker in html for marker in BLOCK_PAGE_MARKERS)
+
+    def parse_review(self, element) -> Dict[str, Any]:
+        review = super().parse_review(element)
+
+        # "4.0 out of 5 stars" -> "4.0"
+        rating = review.get("rating")
+        if rating:
+            match = RATING_PATTERN.search(rating)
+            review["rating"] = match.group(1).replace(",", ".") if match else None
+
+        # The date line carries both the reviewer's country and the date
+        date_line = review.get("posted_at")
+        match = REVIEW_DATE_PATTERN.match(date_line) if date_line else None
+        if match:
+            review["reviewer_location"] = match.group("location")
+            review["posted_at"] = match.group("date")
+        else:
+            review["reviewer_location"] = None
+
+        return review
@@ -0,0 +1,138 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse
+
+import lxml.html
+from lxml import etree
+
+from constants.xpaths import XPATHS
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_NAME_NOT_FOUND = "Product name not found"
+
+
+class ParsedPage(NamedTuple):
+    reviews: List[Dict[str, Any]]
+    next_url: Optional[str]
+    product_name: Optional[str] = None
+
+
+class BasePlatform(ABC):
+    """A review site: URL matching, selectors, pagination and parsing.
+
+    Selectors are compiled once when the platform is registered, so the page
+    loop only evaluates precompiled XPath objects against an lxml tree.
+    """
+
+    name: str = ""
+    # Compiled pattern matched against the lowercased URL hostname
+    hosts: Pattern = None
+    # "browser" for pages that need a real browser, "http" for plain requests
+    fetch_mode: str = "browser"
+    # Keep a job on one proxy across pages, for sites that tie pagination to a session
+    sticky_session: bool = True
+    essential_fields = ("rating", "title", "description", "reviewer")
+    review_fields = (
+        "rating",
+        "title",
+        "description",
+        "reviewer",
+        "reviewer_location",
+        "posted_at",
+    )
+
+    def __init__(self):
+        xpaths = XPATHS.get(self.name)
+        if not xpaths:
+            raise ValueError(f"XPath configuration for platform {self.name} not found.")
+
+        # Raw expression kept for the browser wait condition
+        self.reviews_container = xpaths["reviews_container"]
+        self.selectors = {key: etree.XPath(expr) for key, expr in xpaths.items()}
+
+    def matches(self, url: str) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        return bool(self.hosts and self.hosts.match(host))
+
+    @abstractmethod
+    def extract_product_id(self, url: str) -> Optional[str]:
+        """Return the site's stable product identifier for the URL."""
+
+    @abstractmethod
+    def extract_product_name(self, url: str) -> str:
+        """Return a human readable product name derived from the URL."""
+
+    def reviews_url(self, url: str) -> str:
+        """Return the first review listing page for a product URL."""
+        return url
+
+    @staticmethod
+    def with_query(url: str, **params: str) -> str:
+        parsed_url = urlparse(url)
+        query = dict(parse_qsl(parsed_url.query, keep_blank_values=True))
+        query.update(params)
+        return parsed_url._replace(query=urlencode(query)).geturl()
+
+    def recent_reviews_url(self, url: str) -> str:
+        """Return the first review listing page sorted newest first, for incremental crawls."""
+        return self.reviews_url(url)
+
+    def is_blocked(self, html: str) -> bool:
+        """Return True when the page is a captcha or block page instead of reviews."""
+        return False
+
+    def parse_page(self, html, current_url: str) -> ParsedPage:
+        tree = lxml.html.document_fromstring(html)
+
+        reviews = []
+        skipped = 0
+        for element in self.selectors["reviews_container"](tree):
+            review = self.parse_review(element)
+            if all(review.get(field) for field in self.essential_fields):
+                reviews.append(review)
+            else:
+                skipped += 1
+
+        if skipped:
+            logger.warning(
+                f"Skipped {skipped} review elements with missing essential fields at {current_url}"
+            )
+
+        return ParsedPage(
+            reviews=reviews,
+            next_url=self.next_page_url(tree, current_url),
+            product_name=self.product_name_from_page(tree),
+        )
+
+    def parse_review(self, element) -> Dict[str, Any]:
+        return {field: self.text(element, field) for field in self.review_fields}
+
+    def next_page_url(self, tree, current_url: str) -> Optional[str]:
+        hrefs = self.selectors["pagination"](tree)
+        if not hrefs:
+            return None
+        return urljoin(current_url, str(hrefs[0]))
+
+    def product_name_from_page(self, tree) -> Optional[str]:
+        selector = self.selectors.get("product_name")
+        if selector is None:
+            return None
+        nodes = selector(tree)
+        return self.node_text(nodes[0]) if nodes else None
+
+    def text(self, element, field: str) -> Optional[str]:
+        nodes = self.selectors[field](element)
+        if not nodes:
+            return None
+        return self.node_text(nodes[0]) or None
+
+    @staticmethod
+    def node_text(node) -> str:
+        if isinstance(node, str):
+            return node.strip()
+        # Render <br> as a line break, like the browser's innerText does
+        for br in node.iter("br"):
+            br.tail = "\n" + (br.tail or "")
+        return "".join(node.itertext()).strip()
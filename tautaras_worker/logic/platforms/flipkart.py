@@ -0,0 +1,40 @@
+import logging
+import re
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from logic.platforms import register_platform
+from logic.platforms.base import BasePlatform, PRODUCT_NAME_NOT_FOUND
+
+logger = logging.getLogger(__name__)
+
+
+@register_platform
+class FlipkartPlatform(BasePlatform):
+    name = "flipkart"
+    hosts = re.compile(r"^(?:[\w-]+\.)*flipkart\.com$")
+    fetch_mode = "browser"
+
+    def extract_product_id(self, url: str) -> Optional[str]:
+        pid = parse_qs(urlparse(url).query).get("pid")
+        return pid[0] if pid else None
+
+    def extract_product_name(self, url: str) -> str:
+        try:
+            path_segments = urlparse(url).path.split("/")
+            product_name = path_segments[1] if len(path_segments) > 1 else None
+            if product_name:
+                product_name = unquote(product_name).replace("-", " ").title()
+            return product_name if product_name else PRODUCT_NAME_NOT_FOUND
+        except Exception as e:
+            logger.error(f"Error extracting product name from Flipkart URL: {url} - {e}")
+            return PRODUCT_NAME_NOT_FOUND
+
+    def reviews_url(self, url: str) -> str:
+        # Product pages live under /<slug>/p/<itm>, reviews under /<slug>/product-reviews/<itm>
+        parsed_url = urlparse(url)
+        path = re.sub(r"/p/(itm\w+)", r"/product-reviews/\1", parsed_url.path, count=1)
+        return parsed_url._replace(path=path).geturl()
+
+    def recent_reviews_url(self, url: str) -> str:
+        return self.with_query(self.reviews_url(url), sortOrder="MOST_RECENT")
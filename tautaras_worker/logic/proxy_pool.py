@@ -0,0 +1,192 @@
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+
+import redis
+
+from config.env_config import sttgs
+
+logger = logging.getLogger(__name__)
+
+STAT_FIELDS = ("success", "failure", "bans", "latency_total")
+
+
+class MemoryProxyState:
+    """Proxy scores kept in this process only; for tests and single workers."""
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.cooldowns: Dict[str, float] = {}
+        self.sticky: Dict[str, str] = {}
+
+    def get_stats(self, proxies: List[str]) -> Dict[str, Dict[str, float]]:
+        now = time.time()
+        result = {}
+        for proxy in proxies:
+            stats = dict.fromkeys(STAT_FIELDS, 0.0)
+            stats.update(self.stats.get(proxy, {}))
+            stats["cooling"] = self.cooldowns.get(proxy, 0) > now
+            result[proxy] = stats
+        return result
+
+    def incr(self, proxy: str, field: str, amount: float = 1) -> None:
+        stats = self.stats.setdefault(proxy, {})
+        stats[field] = stats.get(field, 0) + amount
+
+    def cool_down(self, proxy: str, seconds: int) -> None:
+        self.cooldowns[proxy] = time.time() + seconds
+
+    def get_sticky(self, key: str) -> Optional[str]:
+        return self.sticky.get(key)
+
+    def set_sticky(self, key: str, proxy: str, ttl: int) -> None:
+        self.sticky[key] = proxy
+
+    def clear_sticky(self, key: str) -> None:
+        self.sticky.pop(key, None)
+
+
+class RedisProxyState:
+    """Proxy scores shared by every worker through Redis.
+
+    Counters live in ``proxy_stats::<proxy>`` hashes, a cooldown is a key that
+    expires on its own, and sticky assignments are ``proxy_sticky::<job>`` keys.
+    """
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+
+    def get_stats(self, proxies: List[str]) -> Dict[str, Dict[str, float]]:
+        pipe = self.client.pipeline(transaction=False)
+        for proxy in proxies:
+            pipe.hgetall(f"proxy_stats::{proxy}")
+            pipe.exists(f"proxy_cooldown::{proxy}")
+        replies = pipe.execute()
+
+        result = {}
+        for i, proxy in enumerate(proxies):
+            raw, cooling = replies[2 * i], replies[2 * i + 1]
+            stats = dict.fromkeys(STAT_FIELDS, 0.0)
+            stats.update({key.decode(): float(value) for key, value in raw.items()})
+            stats["cooling"] = bool(cooling)
+            result[proxy] = stats
+        return result
+
+    def incr(self, proxy: str, field: str, amount: float = 1) -> None:
+        self.client.hincrbyfloat(f"proxy_stats::{proxy}", field, amount)
+
+    def cool_down(self, proxy: str, seconds: int) -> None:
+        self.client.set(f"proxy_cooldown::{proxy}", 1, ex=seconds)
+
+    def get_sticky(self, key: str) -> Optional[str]:
+        proxy = self.client.get(f"proxy_sticky::{key}")
+        return proxy.decode() if proxy else None
+
+    def set_sticky(self, key: str, proxy: str, ttl: int) -> None:
+        self.client.set(f"proxy_sticky::{key}", proxy, ex=ttl)
+
+    def clear_sticky(self, key: str) -> None:
+        self.client.delete(f"proxy_sticky::{key}")
+
+
+class ProxyPool:
+    """Weighted, health-scored choice of outbound proxies.
+
+    A proxy's weight is its smoothed success rate divided by its mean latency,
+    so fast reliable proxies take most of the traffic while the rest still get
+    probed. Failures and bans put a proxy on cooldown; bans for longer.
+    """
+
+    def __init__(
+        self,
+        proxies: List[str],
+        state=None,
+        failure_cooldown: int = 60,
+        ban_cooldown: int = 30 * 60,
+        sticky_ttl: int = 60 * 60,
+    ):
+        self.proxies = proxies
+        self.state = state or MemoryProxyState()
+        self.failure_cooldown = failure_cooldown
+        self.ban_cooldown = ban_cooldown
+        self.sticky_ttl = sticky_ttl
+
+    @staticmethod
+    def score(stats: Dict[str, float]) -> float:
+        attempts = stats["success"] + stats["failure"]
+        success_rate = (stats["success"] + 1) / (attempts + 2)
+        mean_latency = stats["latency_total"] / stats["success"] if stats["success"] else 1.0
+        ban_penalty = 1 / (1 + stats["bans"])
+        return success_rate * ban_penalty / max(mean_latency, 0.05)
+
+    def acquire(self, sticky_key: Optional[str] = None) -> Optional[str]:
+        """Pick a proxy, reusing the one pinned to ``sticky_key`` while it is healthy."""
+        if not self.proxies:
+            return None
+
+        stats = self.state.get_stats(self.proxies)
+
+        if sticky_key:
+            pinned = self.state.get_sticky(sticky_key)
+            if pinned in stats and not stats[pinned]["cooling"]:
+                return pinned
+
+        candidates = [proxy for proxy in self.proxies if not stats[proxy]["cooling"]]
+        if not candidates:
+            logger.warning("All proxies are cooling down, using the best scored one")
+            candidates = self.proxies
+
+        proxy = self.choose(candidates, [self.score(stats[proxy]) for proxy in candidates])
+
+        if sticky_key:
+            self.state.set_sticky(sticky_key, proxy, self.sticky_ttl)
+        return proxy
+
+    def choose(self, candidates: List[str], weights: List[float]) -> str:
+        return random.choices(candidates, weights=weights)[0]
+
+    def report_success(self, proxy: Optional[str], latency: float) -> None:
+        if not proxy:
+            return
+        self.state.incr(proxy, "success")
+        self.state.incr(proxy, "latency_total", latency)
+
+    def report_failure(
+        self, proxy: Optional[str], banned: bool = False, sticky_key: Optional[str] = None
+    ) -> None:
+        if not proxy:
+            return
+        self.state.incr(proxy, "failure")
+        if banned:
+            self.state.incr(proxy, "bans")
+        self.state.cool_down(proxy, self.ban_cooldown if banned else self.failure_cooldown)
+        if sticky_key:
+            self.state.clear_sticky(sticky_key)
+        logger.warning(f"Proxy {proxy} {'banned' if banned else 'failed'}, cooling down")
+
+
+proxy_pool = None
+
+
+def get_proxy_pool() -> Optional[ProxyPool]:
+    """Return this process's pool built from ``PROXY_LIST``, or None without proxies."""
+    global proxy_pool
+    if proxy_pool is None:
+        proxies = [p.strip() for p in sttgs.get("PROXY_LIST", "").split(",") if p.strip()]
+        if not proxies:
+            return None
+
+        state = None
+        if sttgs.get("REDIS_HOST"):
+            state = RedisProxyState(redis.Redis.from_url(sttgs.get("REDIS_HOST")))
+
+        proxy_pool = ProxyPool(
+            proxies,
+            state=state,
+            failure_cooldown=int(sttgs.get("PROXY_FAILURE_COOLDOWN", 60)),
+            ban_cooldown=int(sttgs.get("PROXY_BAN_COOLDOWN", 30 * 60)),
+            sticky_ttl=int(sttgs.get("PROXY_STICKY_TTL", 60 * 60)),
+        )
+        logger.info(f"Proxy pool initialised with {len(proxies)} proxies")
+    return proxy_pool
@@ -3,26 +3,50 @@ import json
 import time
 import random
 import requests
-from typing import Dict, Any, List
-from urllib.parse import urlparse, unquote
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait as wait
-from selenium.webdriver.support import expected_conditions as EC
-import selenium.common.exceptions
+from functools import partial
+from typing import Dict, Any, List, Optional
 
+from tautaras_common.review_identity import compute_review_id
+
+from config.env_config import sttgs
 from utility.decorators import retry_on_failure
-from constants.xpaths import XPATHS
+from utility.seen_filter import make_seen_filter
+from utility.tracing import current_traceparent, start_span
+from logic.fetchers import get_fetcher
+from logic.platforms import get_platform, PRODUCT_NAME_NOT_FOUND
+from logic.snapshot_store import get_snapshot_store
+from utility.metrics import (
+    DELIVERY_SECONDS,
+    DUPLICATES_DROPPED,
+    PAGE_LOAD_SECONDS,
+    PAGES_CRAWLED,
+    PARSE_SECONDS,
+    REVIEWS_EXTRACTED,
+)
 
 logger = logging.getLogger(__name__)
 
+MAX_BLOCKED_RETRIES = 3
+# Seconds to pause between pages, to mimic human behavior and avoid detection
+CRAWL_DELAY_MIN = float(sttgs.get("CRAWL_DELAY_MIN", 3))
+CRAWL_DELAY_MAX = float(sttgs.get("CRAWL_DELAY_MAX", 7))
+
 
 @retry_on_failure
-def post_reviews(callback_url: str, reviews: List[Dict[str, Any]]):
+def post_reviews(callback_url: str, reviews: List[Dict[str, Any]]) -> Optional[dict]:
+    """Deliver a page of reviews; returns the server's ``created`` and ``duplicates`` counts, if it says."""
     reviews_json = json.dumps(reviews)
-    response = requests.post(callback_url, data=reviews_json)
+    headers = {"Content-Type": "application/json"}
+    traceparent = current_traceparent()
+    if traceparent:
+        headers["traceparent"] = traceparent
+    response = requests.post(callback_url, data=reviews_json, headers=headers)
     if response.status_code == 200:
-        logger.info(f"Successfully posted reviews to {callback_url}")
+        logger.debug(f"Successfully posted reviews to {callback_url}")
+        try:
+            return response.json()
+        except ValueError:
+            return None
     else:
         logger.error(
             f"Failed to post reviews to {callback_url} - Status Code: {response.status_code}"
@@ -30,227 +54,161 @@ def post_reviews(callback_url: str, reviews: List[Dict[str, Any]]):
         response.raise_for_status()
 
 
-@retry_on_failure
-def navigate_to_url(driver, url: str):
-    driver.get(url)
-
-
-def extract_amazon_product_name(url: str) -> str:
+def save_snapshot(snapshot_store, task_id, platform_name, url, html, product_id, product_name):
+    # Snapshots are best effort; a full disk must not fail the crawl
     try:
-        parsed_url = urlparse(url)
-        path_segments = parsed_url.path.split("/")
-        if len(path_segments) >= 3:
-            product_name = path_segments[1]
-        else:
-            product_name = None
-        if product_name:
-            product_name = unquote(product_name).replace("-", " ").title()
-        return product_name if product_name else "Product name not found"
+        snapshot_store.put(task_id, platform_name, url, html, product_id, product_name)
     except Exception as e:
-        logger.error(f"Error extracting product name from Amazon URL: {url} - {e}")
-        return "Product name not found"
+        logger.error(f"Error saving snapshot for URL: {url} - {e}")
 
 
-def extract_flipkart_product_name(url: str) -> str:
-    try:
-        parsed_url = urlparse(url)
-        path_segments = parsed_url.path.split("/")
-        if len(path_segments) >= 1:
-            product_name = path_segments[1]
-        else:
-            product_name = None
-        if product_name:
-            product_name = unquote(product_name).replace("-", " ").title()
-        return product_name if product_name else "Product name not found"
-    except Exception as e:
-        logger.error(f"Error extracting product name from Flipkart URL: {url} - {e}")
-        return "Product name not found"
+def build_reviews(page_reviews, task_id, product_id, product_name, platform_name):
+    reviews = []
+    for review in page_reviews:
+        review = {
+            "token_id": task_id,
+            "product_id": product_id,
+            "product_name": product_name,
+            "site_name": platform_name,
+            "rating": review["rating"],
+            "title": review["title"],
+            "description": review["description"],
+            "posted_at": review["posted_at"],
+            "reviewer": review["reviewer"],
+            "reviewer_details": {"location": review["reviewer_location"]},
+        }
+        review["review_id"] = compute_review_id(review)
+        reviews.append(review)
+    return reviews
 
 
 def review_extractor(data: dict):
     url = data["url"]
     task_id = data["task_id"]
     callback_url = data.get("callback_url")
-    platform = data["platform"]
+    # Run inside the server (embedded mode), pages are handed straight to its ingest code
+    deliver = data.get("deliver") or partial(post_reviews, callback_url)
     product_name = "Unknown product"
     reviews = []
+    duplicates = 0
+    stored = 0
+    # Refreshes read the newest reviews first and stop where the last crawl reached
+    incremental = bool(data.get("incremental"))
+    seen_filter = make_seen_filter(task_id)
+    snapshot_store = get_snapshot_store()
 
     try:
-        # Determine product name based on the platform
-        if platform == "amazon":
-            product_name = extract_amazon_product_name(url)
-        elif platform == "flipkart":
-            product_name = extract_flipkart_product_name(url)
-        else:
-            logger.error(f"Unknown platform: {platform} for URL: {url}")
-
-        logger.info(f"Extracted product name: {product_name}")
-
-        # Get XPath for reviews based on platform
-        xpaths = XPATHS.get(platform)
-        if not xpaths:
-            raise ValueError(f"XPath configuration for platform {platform} not found.")
-
-        # Set up Selenium WebDriver
-        driver = webdriver.Chrome()
-        current_url = url
-
-        while current_url:
-            logger.info(f"Navigating to URL: {current_url}")
-            try:
-                navigate_to_url(driver, current_url)
-
-                # Wait until the reviews container is loaded
-                wait(driver, 10).until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH, xpaths["reviews_container"])
+        # Platform owns product naming, selectors, fetch mode and pagination
+        platform = get_platform(data["platform"])
+        product_name = platform.extract_product_name(url)
+        product_id = platform.extract_product_id(url)
+        logger.info(f"Extracted product name: {product_name} (id: {product_id})")
+
+        current_url = platform.recent_reviews_url(url) if incremental else platform.reviews_url(url)
+
+        sticky_key = task_id if platform.sticky_session else None
+        blocked_retries = 0
+
+        with get_fetcher(platform.fetch_mode, sticky_key) as fetcher:
+            while current_url:
+                with start_span("crawl.page", url=current_url, platform=platform.name):
+                    logger.debug(f"Navigating to URL: {current_url}")
+
+                    started = time.perf_counter()
+                    html = fetcher.fetch(current_url, platform.reviews_container)
+                    PAGE_LOAD_SECONDS.labels(platform.name, platform.fetch_mode).observe(
+                        time.perf_counter() - started
                     )
-                )
-
-                elements = driver.find_elements(By.XPATH, xpaths["reviews_container"])
-                if not elements:
-                    logger.warning(f"No reviews found for URL: {current_url}")
-
-                for element in elements:
-                    try:
-                        rating = None
-                        title = None
-                        description = None
-                        reviewer = None
-                        reviewer_location = None
-
-                        try:
-                            rating = element.find_element(
-                                By.XPATH, xpaths["rating"]
-                            ).text.strip()
-                        except selenium.common.exceptions.NoSuchElementException:
-                            logger.warning(
-                                f"Rating not found for review element at {current_url}"
-                            )
-
-                        try:
-                            title = element.find_element(
-                                By.XPATH, xpaths["title"]
-                            ).text.strip()
-                        except selenium.common.exceptions.NoSuchElementException:
-                            logger.warning(
-                                f"Title not found for review element at {current_url}"
-                            )
-
-                        try:
-                            description = element.find_element(
-                                By.XPATH, xpaths["description"]
-                            ).text.strip()
-                        except selenium.common.exceptions.NoSuchElementException:
-                            logger.warning(
-                                f"Description not found for review element at {current_url}"
-                            )
-
-                        try:
-                            reviewer = element.find_element(
-                                By.XPATH, xpaths["reviewer"]
-                            ).text.strip()
-                        except selenium.common.exceptions.NoSuchElementException:
-                            logger.warning(
-                                f"Reviewer not found for review element at {current_url}"
-                            )
+                    if platform.is_blocked(html):
+                        # Retry the same page through another proxy
+                        blocked_retries += 1
+                        if blocked_retries > MAX_BLOCKED_RETRIES:
+                            raise RuntimeError(f"Blocked by {platform.name} at {current_url}")
+                        logger.warning(f"Blocked page at {current_url}, retry {blocked_retries}")
+                        fetcher.report_blocked()
+                        continue
+                    blocked_retries = 0
+                    # Only a real page counts for the proxy; a 200 block page was a ban
+                    fetcher.report_success()
+
+                    if snapshot_store:
+                        save_snapshot(
+                            snapshot_store, task_id, platform.name, current_url, html,
+                            product_id, product_name,
+                        )
+                    started = time.perf_counter()
+                    with start_span("crawl.parse") as span:
+                        page = platform.parse_page(html, current_url)
+                        span.set_attribute("reviews", len(page.reviews))
+                    PARSE_SECONDS.labels(platform.name).observe(time.perf_counter() - started)
+                    PAGES_CRAWLED.labels(platform.name).inc()
 
-                        try:
-                            reviewer_location = element.find_element(
-                                By.XPATH, xpaths["reviewer_location"]
-                            ).text.strip()
-                        except selenium.common.exceptions.NoSuchElementException:
-                            logger.warning(
-                                f"Reviewer location not found for review element at {current_url}"
-                            )
-                        try:
-                            posted_at = element.find_element(
-                                By.XPATH, xpaths["posted_at"]
-                            ).text.strip()
-                        except selenium.common.exceptions.NoSuchElementException:
-                            logger.warning(
-                                f"Posted date not found for review element at {current_url}"
-                            )
+                    if page.product_name and product_name == PRODUCT_NAME_NOT_FOUND:
+                        product_name = page.product_name
 
-                        # Check if essential fields are missing
-                        if not (
-                            product_name
-                            and platform
-                            and rating
-                            and title
-                            and description
-                            and reviewer
-                        ):
-                            raise ValueError(
-                                f"Missing essential review information for URL: {current_url}"
-                            )
+                    if not page.reviews:
+                        logger.warning(f"No reviews found for URL: {current_url}")
 
-                        # Append the review, with None for missing fields
-                        reviews.append(
-                            {
-                                "token_id": task_id,
-                                "product_name": product_name,
-                                "site_name": platform,
-                                "rating": rating,
-                                "title": title,
-                                "description": description,
-                                "posted_at": posted_at,
-                                "reviewer": reviewer,
-                                "reviewer_details": {"location": reviewer_location},
-                            }
-                        )
+                    page_reviews = build_reviews(
+                        page.reviews, task_id, product_id, product_name, platform.name
+                    )
 
-                    except Exception as e:
-                        logger.error(
-                            f"Error processing review element for URL: {current_url} - {e}"
+                    # Pages shift while being crawled; drop reviews already delivered
+                    is_new = seen_filter.check([r["review_id"] for r in page_reviews])
+                    duplicates += is_new.count(False)
+                    DUPLICATES_DROPPED.labels(platform.name).inc(is_new.count(False))
+                    page_size = len(page_reviews)
+                    page_reviews = [r for r, new in zip(page_reviews, is_new) if new]
+
+                    # Send this page's reviews to the callback URL, or the embedded server.
+                    # Reviews this job already delivered are stored; the rest, if the server says
+                    page_stored_before = page_size - len(page_reviews)
+                    if page_reviews:
+                        started = time.perf_counter()
+                        with start_span("crawl.deliver", reviews=len(page_reviews)):
+                            counts = deliver(page_reviews) or {}
+                        # Only now, so a retry after a failed delivery sends them again
+                        seen_filter.add([r["review_id"] for r in page_reviews])
+                        # Older servers do not say; count every delivered review then
+                        stored += counts.get("created", len(page_reviews))
+                        if counts.get("duplicates") is None:
+                            page_stored_before = None
+                        else:
+                            page_stored_before += counts["duplicates"]
+                        DELIVERY_SECONDS.labels(platform.name).observe(
+                            time.perf_counter() - started
                         )
-                        continue
-
-                # Send extracted reviews to callback URL
-                if reviews:
-                    post_reviews(callback_url, reviews)
-
-                # Random sleep to mimic human behavior and avoid detection
-                time.sleep(random.randint(3, 7))
+                        REVIEWS_EXTRACTED.labels(platform.name).inc(len(page_reviews))
+                        reviews.extend(page_reviews)
 
-                # Check for the "Next" page
-                try:
-                    next_button = driver.find_element(By.XPATH, xpaths["pagination"])
-                    next_page_url = next_button.get_attribute("href")
-                    if next_page_url:
-                        logger.info(f"Navigating to next page: {next_page_url}")
-                        current_url = next_page_url
-                    else:
-                        logger.info("No more pages found. Ending review extraction.")
-                        current_url = None
+                    # One line per page instead of one per step
+                    logger.info(
+                        f"Crawled {current_url}: {len(page.reviews)} reviews, "
+                        f"{len(page_reviews)} new, {len(reviews)} total for task {task_id}"
+                    )
 
-                except selenium.common.exceptions.NoSuchElementException:
-                    logger.info("No 'Next' button found, ending pagination.")
+                if incremental and page.reviews and page_stored_before == page_size:
+                    # Sorted newest first, so every later page is older still
+                    logger.info(f"Every review at {current_url} was already stored; refresh done")
                     current_url = None
+                else:
+                    current_url = page.next_url
+                if current_url:
+                    time.sleep(random.uniform(CRAWL_DELAY_MIN, CRAWL_DELAY_MAX))
+                else:
+                    logger.info("No more pages found. Ending review extraction.")
 
-            except selenium.common.exceptions.TimeoutException as te:
-                logger.error(f"Timeout error while loading URL: {current_url} - {te}")
-                try:
-                    next_button = driver.find_element(By.XPATH, xpaths["pagination"])
-                    next_page_url = next_button.get_attribute("href")
-                    if next_page_url:
-                        logger.info(
-                            f"Timeout occurred, but 'Next' page exists. Moving to: {next_page_url}"
-                        )
-                        current_url = next_page_url
-                    else:
-                        logger.error("Timeout and no next page. Ending extraction.")
-                        current_url = None
-                except selenium.common.exceptions.NoSuchElementException:
-                    logger.error("Timeout and no 'Next' button. Ending extraction.")
-                    current_url = None
+        if duplicates:
+            logger.info(f"Dropped {duplicates} duplicate reviews for task {task_id}")
 
-        driver.quit()
         # remove return add logs instead
         return {
             "status": "Reviews extracted successfully",
+            "product_id": product_id,
             "product_name": product_name,
             "reviews": reviews,
+            "stored": stored,
+            "incremental": incremental,
         }
 
     except ValueError as ve:
@@ -267,3 +225,6 @@ def review_extractor(data: dict):
             "error_message": str(e),
             "product_name": product_name,
         }
+
+    finally:
+        seen_filter.close()
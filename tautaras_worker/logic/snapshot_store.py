@@ -0,0 +1,87 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from config.env_config import sttgs
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStore:
+    """Content-addressed store of fetched review pages.
+
+    Pages are gzip-compressed under ``objects/<sha[:2]>/<sha>.html.gz`` keyed by
+    the SHA-256 of the HTML, so identical pages are stored once. Each job has an
+    append-only ``index/<job_id>.jsonl`` listing the URL and snapshot of every
+    page it fetched, which is what the re-parse command replays.
+    """
+
+    def __init__(self, root: str, compression_level: int = 6):
+        self.root = Path(root)
+        self.compression_level = compression_level
+        self.objects_dir = self.root / "objects"
+        self.index_dir = self.root / "index"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.html.gz"
+
+    def put(
+        self,
+        job_id: str,
+        platform: str,
+        url: str,
+        html: str,
+        product_id: Optional[str] = None,
+        product_name: Optional[str] = None,
+    ) -> str:
+        raw = html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+
+        path = self.object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so readers never see a partial object
+            tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+            tmp_path.write_bytes(gzip.compress(raw, compresslevel=self.compression_level))
+            os.replace(tmp_path, path)
+
+        entry = {
+            "job_id": job_id,
+            "platform": platform,
+            "url": url,
+            "sha256": digest,
+            "product_id": product_id,
+            "product_name": product_name,
+            "size": len(raw),
+            "fetched_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(self.index_dir / f"{job_id}.jsonl", "a", encoding="utf-8") as index_file:
+            index_file.write(json.dumps(entry) + "\n")
+        return digest
+
+    def get(self, digest: str) -> str:
+        return gzip.decompress(self.object_path(digest).read_bytes()).decode("utf-8")
+
+    def jobs(self) -> List[str]:
+        return sorted(path.stem for path in self.index_dir.glob("*.jsonl"))
+
+    def entries(self, job_id: str) -> Iterator[Dict[str, Any]]:
+        with open(self.index_dir / f"{job_id}.jsonl", encoding="utf-8") as index_file:
+            for line in index_file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """Return the store configured by ``SNAPSHOT_DIR``, or None when disabled."""
+    root = sttgs.get("SNAPSHOT_DIR")
+    if not root:
+        return None
+    return SnapshotStore(root, int(sttgs.get("SNAPSHOT_COMPRESSION_LEVEL", 6)))
@@ -0,0 +1,95 @@
+"""Re-parse stored review page snapshots with the current extractors.
+
+Replays pages saved under ``SNAPSHOT_DIR`` (see ``logic/snapshot_store.py``)
+through the platform parsers, without touching the live site. Reviews are
+written as JSON lines and/or posted to an ingest callback.
+
+    python reparse.py --output reviews.jsonl
+    python reparse.py --job <task_id> --callback-url http://0.0.0.0:80/api/v1/reviews/ingest
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from multiprocessing import Pool
+from typing import Any, Dict, List, Tuple
+
+from config.env_config import sttgs
+from logic.platforms import get_platform
+from logic.review_extractor import build_reviews, post_reviews
+from logic.snapshot_store import SnapshotStore
+from utility.seen_filter import MemorySeenFilter
+
+logger = logging.getLogger(__name__)
+
+store = None
+
+
+def init_process(snapshot_dir: str):
+    global store
+    store = SnapshotStore(snapshot_dir)
+
+
+def parse_entry(entry: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    platform = get_platform(entry["platform"])
+    page = platform.parse_page(store.get(entry["sha256"]), entry["url"])
+    product_name = entry.get("product_name") or page.product_name
+    reviews = build_reviews(
+        page.reviews, entry["job_id"], entry.get("product_id"), product_name, platform.name
+    )
+    return entry, reviews
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--snapshot-dir", default=sttgs.get("SNAPSHOT_DIR"))
+    parser.add_argument("--job", action="append", help="Job id to replay (repeatable, default all)")
+    parser.add_argument("--output", help="Write reviews as JSON lines to this file")
+    parser.add_argument("--callback-url", help="Post reviews to this ingest endpoint")
+    parser.add_argument("--processes", type=int, default=None, help="Parser processes (default CPU count)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    if not args.snapshot_dir:
+        parser.error("--snapshot-dir or SNAPSHOT_DIR is required")
+
+    snapshot_store = SnapshotStore(args.snapshot_dir)
+    job_ids = args.job or snapshot_store.jobs()
+    entries = [entry for job_id in job_ids for entry in snapshot_store.entries(job_id)]
+    logger.info(f"Re-parsing {len(entries)} pages from {len(job_ids)} jobs")
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    seen_filters = {}
+    pages = total = 0
+    started = time.perf_counter()
+
+    try:
+        with Pool(args.processes, initializer=init_process, initargs=(args.snapshot_dir,)) as pool:
+            for entry, reviews in pool.imap(parse_entry, entries, chunksize=16):
+                pages += 1
+                seen_filter = seen_filters.setdefault(entry["job_id"], MemorySeenFilter())
+                is_new = seen_filter.check([review["review_id"] for review in reviews])
+                reviews = [review for review, new in zip(reviews, is_new) if new]
+                seen_filter.add([review["review_id"] for review in reviews])
+                total += len(reviews)
+
+                if output:
+                    for review in reviews:
+                        output.write(json.dumps(review, ensure_ascii=False) + "\n")
+                if args.callback_url and reviews:
+                    post_reviews(args.callback_url, reviews)
+    finally:
+        if output:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Re-parsed {pages} pages into {total} reviews in {elapsed:.1f}s "
+        f"({pages / elapsed if elapsed else 0:.0f} pages/s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
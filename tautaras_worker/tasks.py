@@ -1,8 +1,24 @@
 import logging
+import os
+import time
+from logic import hot_products
 from logic.review_extractor import review_extractor
 from celery.exceptions import Reject
+from celery.signals import (
+    setup_logging,
+    task_postrun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_shutdown,
+)
 
+from config import log_config
 from config.env_config import sttgs
+from utility import metrics
+from utility.profiling import profile_task
+from utility import tracing
+from utility.tracing import start_span
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +30,61 @@ celery_app = Celery(
     backend=sttgs.get("CELERY_BAKCEND_URI"),
 )
 
+CELERY_QUEUE = sttgs.get("CELERY_QUEUE", "celery")
+
+# Run by `celery -A tasks beat`; the task decides which products are due
+celery_app.conf.beat_schedule = {
+    "refresh-hot-products": {
+        "task": "tasks.refresh_hot_products",
+        "schedule": float(sttgs.get("REFRESH_TICK", 10 * 60)),
+    },
+}
+
+
+@setup_logging.connect
+def configure_logging(loglevel=None, **kwargs):
+    # Connecting here stops Celery from installing its own handlers
+    log_config.setup_logging(logging.getLevelName(loglevel) if loglevel else None)
+
+
+@worker_process_init.connect
+def restart_log_listener(**kwargs):
+    # The parent's listener thread is not carried over into forked pool processes
+    log_config.setup_logging()
+
+
+@worker_init.connect
+def start_metrics_exporter(sender=None, **kwargs):
+    port = sttgs.get("WORKER_METRICS_PORT")
+    if not port:
+        return
+    metrics.start_exporter(int(port))
+    metrics.BROWSER_CAPACITY.set(getattr(sender, "concurrency", None) or os.cpu_count())
+    metrics.start_queue_monitor(
+        celery_app,
+        queue=CELERY_QUEUE,
+        interval=int(sttgs.get("QUEUE_MONITOR_INTERVAL", 15)),
+    )
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    if sttgs.get("WORKER_METRICS_PORT"):
+        metrics.mark_process_dead(pid or os.getpid())
+
+
+@task_postrun.connect
+@worker_process_shutdown.connect
+def flush_traces(**kwargs):
+    # Each task's spans are written when it ends, not only at a clean exit
+    tracing.flush()
+
+
+@worker_shutdown.connect
+def remove_metrics_dir(**kwargs):
+    if sttgs.get("WORKER_METRICS_PORT"):
+        metrics.cleanup_metrics_dir()
+
 
 """Celery task to extract reviews from a given URL and process them."""
 @celery_app.task(bind=True, track_started=True)
@@ -41,8 +112,19 @@ def extract_reviews_from_page(self, data: dict):
             f"Extracting reviews for URL: {data['url']} on platform: {platform}"
         )
 
-        # Perform the review extraction
-        review_extractor(data)
+        # Perform the review extraction, continuing the trace started by the API
+        traceparent = getattr(self.request, "traceparent", None) or data.get("traceparent")
+        started = time.perf_counter()
+        with start_span(
+            "extract_reviews_from_page", traceparent, task_id=self.request.id, platform=platform
+        ) as span:
+            with profile_task(f"task-{platform}-{self.request.id}", data.get("profile", False)):
+                result = review_extractor(data)
+            span.set_attribute("status", result.get("status"))
+        status = "success" if result.get("status") == "Reviews extracted successfully" else "error"
+        metrics.TASK_SECONDS.labels(platform, status).observe(time.perf_counter() - started)
+        if status == "success":
+            hot_products.record_crawl(data, result, self.request.id)
 
         # Update task state to success upon completion
         self.update_state(
@@ -60,3 +142,21 @@ def extract_reviews_from_page(self, data: dict):
         logger.error(error_message, exc_info=True)
         self.update_state(state="FAILURE", meta={"error": error_message})
         raise Reject(error_message)
+
+
+def queue_depth() -> int:
+    with celery_app.connection_for_read() as connection:
+        _, depth, _ = connection.default_channel.queue_declare(queue=CELERY_QUEUE, passive=True)
+    return depth
+
+
+@celery_app.task(ignore_result=True)
+def refresh_hot_products():
+    """Queue incremental crawls of popular products whose reviews are due a refresh."""
+    with start_span("refresh_hot_products"):
+        return hot_products.refresh(
+            enqueue=lambda data, job_id: extract_reviews_from_page.apply_async(
+                kwargs={"data": data}, task_id=job_id
+            ),
+            queue_depth=queue_depth,
+        )
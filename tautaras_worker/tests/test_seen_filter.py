@@ -0,0 +1,24 @@
+import pytest
+
+from utility.seen_filter import BloomSeenFilter, MemorySeenFilter
+
+
+@pytest.fixture(params=["memory", "bloom"])
+def seen(request):
+    if request.param == "bloom":
+        return BloomSeenFilter(capacity=1000, error_rate=0.001)
+    return MemorySeenFilter()
+
+
+def test_check_marks_repeats_in_a_page(seen):
+    assert seen.check(["a", "b", "a"]) == [True, True, False]
+
+
+def test_ids_are_seen_only_once_delivered(seen):
+    assert seen.check(["a", "b"]) == [True, True]
+    # A failed delivery records nothing, so the retry sends the reviews again
+    assert seen.check(["a", "b"]) == [True, True]
+
+    seen.add(["a"])
+
+    assert seen.check(["a", "b"]) == [False, True]
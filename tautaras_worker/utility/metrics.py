@@ -0,0 +1,131 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from config.env_config import sttgs
+
+# Prefork children write samples to files the exporter aggregates; the
+# directory must be known before prometheus_client is imported. Only one
+# created here is removed on shutdown, never one the operator configured.
+created_metrics_dir = None
+if sttgs.get("WORKER_METRICS_PORT") and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    created_metrics_dir = tempfile.mkdtemp(prefix="tautaras_metrics_")
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = created_metrics_dir
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram  # noqa: E402
+from prometheus_client import multiprocess, start_http_server  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+PAGES_CRAWLED = Counter(
+    "tautaras_worker_pages_total",
+    "Review pages fetched and parsed",
+    ["platform"],
+)
+
+REVIEWS_EXTRACTED = Counter(
+    "tautaras_worker_reviews_total",
+    "Reviews delivered to the callback",
+    ["platform"],
+)
+
+DUPLICATES_DROPPED = Counter(
+    "tautaras_worker_duplicate_reviews_total",
+    "Reviews dropped by the per-job seen filter",
+    ["platform"],
+)
+
+PAGE_LOAD_SECONDS = Histogram(
+    "tautaras_worker_page_load_seconds",
+    "Time to fetch a review page",
+    ["platform", "fetch_mode"],
+    buckets=SECONDS_BUCKETS,
+)
+
+PARSE_SECONDS = Histogram(
+    "tautaras_worker_parse_seconds",
+    "Time to parse a fetched review page",
+    ["platform"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+DELIVERY_SECONDS = Histogram(
+    "tautaras_worker_delivery_seconds",
+    "Time to post a page of reviews to the callback",
+    ["platform"],
+    buckets=SECONDS_BUCKETS,
+)
+
+TASK_SECONDS = Histogram(
+    "tautaras_worker_task_seconds",
+    "Duration of review extraction tasks",
+    ["platform", "status"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 3600),
+)
+
+BROWSERS_ACTIVE = Gauge(
+    "tautaras_worker_browsers_active",
+    "Chrome instances currently running",
+    multiprocess_mode="livesum",
+)
+
+BROWSER_CAPACITY = Gauge(
+    "tautaras_worker_browser_capacity",
+    "Worker processes available to run a browser",
+    multiprocess_mode="max",
+)
+
+QUEUE_DEPTH = Gauge(
+    "tautaras_worker_queue_depth",
+    "Messages waiting in the task queue",
+    ["queue"],
+    multiprocess_mode="max",
+)
+
+QUEUE_CONSUMERS = Gauge(
+    "tautaras_worker_queue_consumers",
+    "Consumers attached to the task queue",
+    ["queue"],
+    multiprocess_mode="max",
+)
+
+
+def start_exporter(port: int) -> None:
+    """Serve metrics aggregated over every worker process on ``port``."""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(port, registry=registry)
+    logger.info(f"Worker metrics exporter listening on port {port}")
+
+
+def mark_process_dead(pid: int) -> None:
+    multiprocess.mark_process_dead(pid)
+
+
+def cleanup_metrics_dir() -> None:
+    if created_metrics_dir:
+        shutil.rmtree(created_metrics_dir, ignore_errors=True)
+
+
+def start_queue_monitor(app, queue: str, interval: int) -> None:
+    """Poll the broker for queue depth in a daemon thread."""
+
+    def poll():
+        while True:
+            try:
+                with app.connection_for_read() as connection:
+                    _, depth, consumers = connection.default_channel.queue_declare(
+                        queue=queue, passive=True
+                    )
+                QUEUE_DEPTH.labels(queue).set(depth)
+                QUEUE_CONSUMERS.labels(queue).set(consumers)
+            except Exception as e:
+                logger.warning(f"Could not read depth of queue {queue}: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=poll, name="queue-monitor", daemon=True).start()
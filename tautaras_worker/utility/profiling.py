@@ -0,0 +1,42 @@
+"""Task profiling with the shared sampler (see "Profiling" in the readme).
+
+A task is profiled when the API flagged it (``"profile": true`` in the task
+data) or by ``PROFILE_SAMPLE_RATE``; only the task thread is sampled.
+"""
+import logging
+import random
+import threading
+from contextlib import contextmanager
+
+from tautaras_common.profiling import SamplingProfiler
+
+from config.env_config import sttgs
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = sttgs.get("PROFILE_DIR")
+PROFILE_SAMPLE_RATE = float(sttgs.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_INTERVAL = float(sttgs.get("PROFILE_INTERVAL_MS", 5)) / 1000
+PROFILE_MAX_FILES = int(sttgs.get("PROFILE_MAX_FILES", 50))
+
+
+@contextmanager
+def profile_task(label: str, requested: bool = False):
+    """Profile the calling thread for the duration of the block, if selected."""
+    if not PROFILE_DIR or not (
+        requested or (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+    ):
+        yield
+        return
+
+    profiler = SamplingProfiler(PROFILE_INTERVAL, threading.get_ident()).start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        try:
+            path = profiler.write(PROFILE_DIR, label, PROFILE_MAX_FILES)
+            if path:
+                logger.info(f"Wrote profile of {profiler.samples} samples to {path}")
+        except OSError as e:
+            logger.error(f"Error writing profile for {label} - {e}")
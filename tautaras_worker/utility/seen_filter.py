@@ -0,0 +1,178 @@
+import hashlib
+import logging
+import math
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import redis
+
+from config.env_config import sttgs
+
+logger = logging.getLogger(__name__)
+
+
+class SeenFilter(ABC):
+    """Per-job record of review ids that were already delivered.
+
+    ``check`` only reads; ids are recorded with ``add`` once their reviews
+    have been delivered, so a delivery that fails leaves them unseen for the
+    retry.
+    """
+
+    @abstractmethod
+    def contains(self, review_ids: List[str]) -> List[bool]:
+        """For each id, whether it was recorded."""
+        pass
+
+    @abstractmethod
+    def add(self, review_ids: List[str]) -> None:
+        """Record the ids as delivered."""
+        pass
+
+    def check(self, review_ids: List[str]) -> List[bool]:
+        """For each id, whether it is new: not recorded, and not earlier in the list."""
+        if not review_ids:
+            return []
+        result, batch = [], set()
+        for review_id, seen in zip(review_ids, self.contains(review_ids)):
+            result.append(not seen and review_id not in batch)
+            batch.add(review_id)
+        return result
+
+    def close(self) -> None:
+        pass
+
+
+class MemorySeenFilter(SeenFilter):
+    def __init__(self):
+        self.seen = set()
+
+    def contains(self, review_ids: List[str]) -> List[bool]:
+        return [review_id in self.seen for review_id in review_ids]
+
+    def add(self, review_ids: List[str]) -> None:
+        self.seen.update(review_ids)
+
+
+class RedisSeenFilter(SeenFilter):
+    """Exact seen-set in a Redis set, so retries of a job share it."""
+
+    def __init__(self, client: redis.Redis, key: str, ttl: int):
+        self.client = client
+        self.key = key
+        self.ttl = ttl
+
+    def contains(self, review_ids: List[str]) -> List[bool]:
+        pipe = self.client.pipeline(transaction=False)
+        for review_id in review_ids:
+            pipe.sismember(self.key, review_id)
+        return [bool(member) for member in pipe.execute()]
+
+    def add(self, review_ids: List[str]) -> None:
+        if not review_ids:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(self.key, *review_ids)
+        pipe.expire(self.key, self.ttl)
+        pipe.execute()
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class BloomSeenFilter(SeenFilter):
+    """Bloom filter for products with very many reviews.
+
+    Memory stays fixed regardless of the number of reviews; a false positive
+    drops a review that was in fact new, at roughly ``error_rate``. Bits live
+    in a Redis bitmap when a client is given and in a local bytearray otherwise.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        client: Optional[redis.Redis] = None,
+        key: Optional[str] = None,
+        ttl: int = 0,
+    ):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.client = client
+        self.key = key
+        self.ttl = ttl
+        self.bits = None if client else bytearray((self.size + 7) // 8)
+
+    def positions(self, review_id: str) -> List[int]:
+        digest = hashlib.blake2b(review_id.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def contains(self, review_ids: List[str]) -> List[bool]:
+        all_positions = [self.positions(review_id) for review_id in review_ids]
+        if not self.client:
+            return [
+                all(self.bits[position // 8] & (1 << position % 8) for position in positions)
+                for positions in all_positions
+            ]
+
+        pipe = self.client.pipeline(transaction=False)
+        for positions in all_positions:
+            for position in positions:
+                pipe.getbit(self.key, position)
+        bits = pipe.execute()
+
+        # A review was seen if every one of its bits is set
+        result, offset = [], 0
+        for positions in all_positions:
+            result.append(all(bits[offset : offset + len(positions)]))
+            offset += len(positions)
+        return result
+
+    def add(self, review_ids: List[str]) -> None:
+        if not review_ids:
+            return
+        positions = [position for review_id in review_ids for position in self.positions(review_id)]
+        if not self.client:
+            for position in positions:
+                self.bits[position // 8] |= 1 << position % 8
+            return
+
+        pipe = self.client.pipeline(transaction=False)
+        for position in positions:
+            pipe.setbit(self.key, position, 1)
+        pipe.expire(self.key, self.ttl)
+        pipe.execute()
+
+    def close(self) -> None:
+        if self.client:
+            self.client.close()
+
+
+def make_seen_filter(job_id: str) -> SeenFilter:
+    """Build the filter configured by ``SEEN_FILTER`` (memory, redis or bloom)."""
+    kind = sttgs.get("SEEN_FILTER", "redis").lower()
+    ttl = int(sttgs.get("SEEN_FILTER_TTL", 24 * 60 * 60))
+    redis_host = sttgs.get("REDIS_HOST")
+
+    client = None
+    if kind in ("redis", "bloom") and redis_host:
+        try:
+            client = redis.Redis.from_url(redis_host)
+            client.ping()
+        except redis.RedisError as e:
+            logger.warning(f"Redis unavailable for seen filter, using memory: {e}")
+            client = None
+
+    if kind == "bloom":
+        return BloomSeenFilter(
+            capacity=int(sttgs.get("BLOOM_CAPACITY", 1_000_000)),
+            error_rate=float(sttgs.get("BLOOM_ERROR_RATE", 0.001)),
+            client=client,
+            key=f"seen_bloom::{job_id}",
+            ttl=ttl,
+        )
+    if kind == "redis" and client:
+        return RedisSeenFilter(client, f"seen::{job_id}", ttl)
+    return MemorySeenFilter()
@@ -0,0 +1,9 @@
+"""Task tracing: the shared span code, configured from the worker's ``.env``."""
+from tautaras_common import tracing
+from tautaras_common.tracing import current_span, current_traceparent, flush, start_span
+
+from config.env_config import sttgs
+
+__all__ = ["current_span", "current_traceparent", "flush", "start_span"]
+
+tracing.configure(sttgs.get("TRACE_SERVICE_NAME", "tautaras-worker"), sttgs.get("TRACE_EXPORT_PATH"))